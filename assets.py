@@ -0,0 +1,247 @@
+"""Image assets for the dashboard pages: resized, cached, web-friendly variants.
+
+Originals in ``images/`` are multi-megabyte camera and design exports. The
+first request for an image (or ``python -m assets`` at build time) writes
+width-capped WebP variants plus a JPEG/PNG fallback into ``static/img``,
+which Streamlit serves as plain, browser-cacheable files. Pages then emit a
+``<picture>`` with a ``srcset`` so each browser downloads only the variant
+that fits its column width and pixel density.
+
+When static serving is disabled, the best fallback variant is handed to
+``st.image`` from a process-wide byte cache instead, so Streamlit never has
+to decode and re-encode the original. Missing or unreadable images render a
+placeholder rather than raising.
+"""
+
+import html
+import io
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import streamlit as st
+from PIL import Image, ImageOps, ImageSequence, UnidentifiedImageError
+
+from tracing import span
+
+ROOT = Path(__file__).resolve().parent
+IMAGE_DIR = ROOT / "images"
+STATIC_DIR = ROOT / "static" / "img"
+STATIC_URL = "app/static/img"
+
+WIDTHS = (480, 960, 1440)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# Side column of the pages' [1.5, 1] layouts inside the 1200px container;
+# columns stack to full width on narrow screens.
+SIDE_COLUMN_WIDTH = 450
+MOBILE_BREAKPOINT = 640
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+SUFFIXES = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+ORIENTATION_TAG = 0x0112
+
+_build_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Variant:
+    """One encoded rendition of a source image, written under ``STATIC_DIR``."""
+
+    width: int
+    height: int
+    filename: str
+    mimetype: str
+
+    @property
+    def path(self) -> Path:
+        return STATIC_DIR / self.filename
+
+    @property
+    def url(self) -> str:
+        return f"{STATIC_URL}/{self.filename}"
+
+
+@dataclass(frozen=True)
+class ImageAsset:
+    """All variants of one source image, smallest first."""
+
+    name: str
+    webp: tuple[Variant, ...]
+    fallback: tuple[Variant, ...]
+
+    def best_fallback(self, max_width: int) -> Variant:
+        """Largest fallback variant no wider than ``max_width`` (or the smallest)."""
+        fitting = [v for v in self.fallback if v.width <= max_width]
+        return fitting[-1] if fitting else self.fallback[0]
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        return image.convert("RGBA").getchannel("A").getextrema()[0] < 255
+    return False
+
+
+def _slug(name: str) -> str:
+    stem = Path(name).stem.lower()
+    return "".join(c if c.isalnum() else "-" for c in stem).strip("-")
+
+
+def _target_sizes(width: int, height: int) -> list[tuple[int, int]]:
+    """Variant sizes for a ``width`` x ``height`` source, never upscaling."""
+    return [(w, round(height * w / width)) for w in sorted({min(w, width) for w in WIDTHS})]
+
+
+def _existing(stem: str, width: int, height: int) -> tuple[tuple[Variant, ...], tuple[Variant, ...]] | None:
+    """Already-built ``(webp, fallback)`` variants, so restarts skip decoding the original."""
+    webp, fallback = [], []
+    for w, h in _target_sizes(width, height):
+        webp.append(Variant(w, h, f"{stem}-{w}.webp", "image/webp"))
+        fallback += [
+            Variant(w, h, f"{stem}-{w}.{SUFFIXES[fmt]}", f"image/{fmt.lower()}")
+            for fmt in ("JPEG", "PNG")
+            if (STATIC_DIR / f"{stem}-{w}.{SUFFIXES[fmt]}").exists()
+        ]
+    if len(fallback) != len(webp) or not all(v.path.exists() for v in webp):
+        return None
+    return tuple(webp), tuple(fallback)
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "WEBP":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    elif fmt == "JPEG":
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _write(variant: Variant, data: bytes) -> None:
+    # Write-then-rename so concurrent servers never serve a truncated file.
+    tmp = variant.path.with_suffix(variant.path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(variant.path)
+
+
+def _build(source: Path, version: str) -> ImageAsset:
+    with Image.open(source) as original:
+        if getattr(original, "is_animated", False):
+            # Animations are copied through untouched; resizing every frame
+            # rarely pays off for the short loops used on these pages.
+            variant = Variant(
+                original.width,
+                original.height,
+                f"{_slug(source.name)}-{version}{source.suffix.lower()}",
+                Image.MIME.get(original.format, "image/gif"),
+            )
+            if not variant.path.exists():
+                _write(variant, source.read_bytes())
+            return ImageAsset(source.name, (), (variant,))
+
+        width, height = original.size
+        if original.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+            width, height = height, width
+        stem = f"{_slug(source.name)}-{version}"
+        built = _existing(stem, width, height)
+        if built is not None:
+            return ImageAsset(source.name, *built)
+
+        image = ImageOps.exif_transpose(next(ImageSequence.Iterator(original)))
+        alpha = _has_alpha(image)
+        image = image.convert("RGBA" if alpha else "RGB")
+        fallback_format = "PNG" if alpha else "JPEG"
+
+        webp, fallback = [], []
+        for w, h in _target_sizes(width, height):
+            resized = image if w == width else image.resize((w, h), Image.LANCZOS)
+            for fmt, out in (("WEBP", webp), (fallback_format, fallback)):
+                variant = Variant(w, h, f"{stem}-{w}.{SUFFIXES[fmt]}", f"image/{fmt.lower()}")
+                if not variant.path.exists():
+                    _write(variant, _encode(resized, fmt))
+                out.append(variant)
+    return ImageAsset(source.name, tuple(webp), tuple(fallback))
+
+
+@lru_cache(maxsize=64)
+def _asset(name: str, version: str) -> ImageAsset:
+    with _build_lock, span("image.build", image=name):
+        STATIC_DIR.mkdir(parents=True, exist_ok=True)
+        return _build(IMAGE_DIR / name, version)
+
+
+def get_asset(name: str) -> ImageAsset | None:
+    """Variants for ``images/<name>``, built on first use; ``None`` if unavailable."""
+    source = IMAGE_DIR / name
+    try:
+        stat = source.stat()
+        # The source's size and mtime name the variants, so edits rebuild them.
+        return _asset(name, f"{stat.st_size:x}{stat.st_mtime_ns:x}"[-10:])
+    except (OSError, UnidentifiedImageError):
+        return None
+
+
+@lru_cache(maxsize=64)
+def _read(path: Path) -> bytes:
+    return path.read_bytes()
+
+
+def _picture_html(asset: ImageAsset, width: int | None, alt: str) -> str:
+    sizes = f"(max-width: {MOBILE_BREAKPOINT}px) 100vw, {width or SIDE_COLUMN_WIDTH}px"
+    default = asset.best_fallback(2 * (width or SIDE_COLUMN_WIDTH))
+    style = f"width: 100%; max-width: {width}px;" if width else "width: 100%;"
+    parts = ["<picture>"]
+    if asset.webp:
+        srcset = ", ".join(f"{v.url} {v.width}w" for v in asset.webp)
+        parts.append(f'<source type="image/webp" srcset="{srcset}" sizes="{sizes}">')
+    fallback_srcset = ", ".join(f"{v.url} {v.width}w" for v in asset.fallback)
+    parts.append(
+        f'<img src="{default.url}" srcset="{fallback_srcset}" sizes="{sizes}" '
+        f'width="{default.width}" height="{default.height}" alt="{html.escape(alt)}" '
+        f'decoding="async" style="{style} height: auto;">'
+    )
+    parts.append("</picture>")
+    return "".join(parts)
+
+
+def show_image(name: str, width: int | None = None, caption: str | None = None, alt: str = "") -> None:
+    """Display ``images/<name>`` at up to ``width`` CSS pixels (default: column width)."""
+    with span("image", image=name):
+        asset = get_asset(name)
+        if asset is None:
+            st.info(f"🖼️ Image not available: {name}")
+            return
+        if st.get_option("server.enableStaticServing"):
+            st.markdown(_picture_html(asset, width, alt or caption or ""), unsafe_allow_html=True)
+            if caption:
+                st.caption(caption)
+            return
+        # Two device pixels per CSS pixel, capped at the largest variant.
+        variant = asset.best_fallback(2 * (width or SIDE_COLUMN_WIDTH))
+        st.image(_read(variant.path), caption=caption, width=width or "stretch")
+
+
+def build_all() -> list[ImageAsset]:
+    """Pre-build variants for every image in ``IMAGE_DIR``."""
+    assets = []
+    for source in sorted(IMAGE_DIR.iterdir()):
+        if source.suffix.lower() in IMAGE_SUFFIXES:
+            asset = get_asset(source.name)
+            if asset is not None:
+                assets.append(asset)
+    return assets
+
+
+def main() -> None:
+    for asset in build_all():
+        original = (IMAGE_DIR / asset.name).stat().st_size
+        variants = asset.webp + asset.fallback
+        sizes = ", ".join(f"{v.path.suffix[1:]} {v.width}px {v.path.stat().st_size / 1024:.0f}KB" for v in variants)
+        print(f"{asset.name} ({original / 1024:.0f}KB): {sizes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Validate and time the batched IRR solver against numpy_financial.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_irr --rows 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import numpy_financial as npf
+
+from model.batch import AssumptionBatch
+from model.engine import robotics_cash_flow, with_investment
+from model.irr import irr_batch
+
+
+def random_scenarios(n: int, seed: int = 0) -> AssumptionBatch:
+    """Assumption rows drawn across (and beyond) the dashboard slider ranges."""
+    rng = np.random.default_rng(seed)
+    return AssumptionBatch({
+        "baseline_jobs": rng.integers(20, 61, n),
+        "baseline_rev": rng.integers(10, 41, n) * 5_000.0,
+        "baseline_exp": rng.integers(2, 21, n) * 5_000.0,
+        "baseline_shrink": rng.integers(-20, 21, n) / 100,
+        "stage1_cost": rng.uniform(5e4, 2e6, n),
+        "stage1_duration": rng.uniform(0.1, 2.0, n),
+        "stage2_cost": rng.uniform(1e5, 2e7, n),
+        "stage2_duration": rng.uniform(0.5, 3.0, n),
+        "uplift1": rng.integers(0, 101, n) / 100,
+        "uplift2": rng.integers(0, 201, n) / 100,
+        "rev_growth": rng.integers(0, 21, n) / 100,
+        "exp_reduction": rng.integers(0, 51, n) / 100,
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="best-of-N timing for the batched solver")
+    args = parser.parse_args()
+
+    batch = random_scenarios(args.rows, args.seed)
+    cashflows = with_investment(robotics_cash_flow(batch), batch)
+
+    vectorized = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = irr_batch(cashflows)
+        vectorized = min(vectorized, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    reference = np.array([npf.irr(row) for row in cashflows])
+    looped = time.perf_counter() - start
+
+    both = np.isfinite(reference) & np.isfinite(result.rate)
+    error = np.abs(result.rate[both] - reference[both]) / (1 + np.abs(reference[both]))
+    print(f"rows:            {args.rows:,}")
+    print(f"npf.irr loop:    {looped:.3f} s")
+    print(f"batched irr:     {vectorized:.3f} s  ({looped / vectorized:.0f}x)")
+    print(f"iterations:      max {result.iterations.max()}, mean {result.iterations.mean():.2f}")
+    print(f"finite rates:    {np.isfinite(reference).sum():,} reference, {np.isfinite(result.rate).sum():,} batched")
+    print(f"max rel. error:  {error.max(initial=0):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Load-test a dashboard page with concurrent headless sessions.
+
+Each session is a Streamlit ``AppTest`` that drags random sliders and reruns
+the page, all in one process and thread pool, the way a single server
+instance serves its sessions. Model and chart functions are wrapped with
+timers so compute and render time are reported apart from the rerun total.
+
+A drag sends ``--drag-ticks`` values. In Live input mode every tick reruns
+the page; On Apply, ticks on the assumption form's sliders stay in the
+browser and only the final Apply reruns it.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sessions --sessions 8 --interactions 25 --json bench.json
+    python -m benchmarks.bench_sessions --input-mode Live --compare bench.json
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import streamlit as st
+from matplotlib.figure import Figure
+from streamlit.testing.v1 import AppTest
+
+import charts
+import model
+import model.goalseek
+import model.montecarlo
+import model.sensitivity
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PAGE = "pages/04_Financial_Model.py"
+FEATURES = ("mc_enabled", "tornado_enabled", "goal_enabled")
+PERCENTILES = (50, 90, 95, 99)
+
+# (owner, attribute, category): what counts as model compute vs chart render.
+TIMED = (
+    (model, "run_model", "compute"),
+    (charts, "run_model", "compute"),
+    (model.montecarlo, "simulate", "compute"),
+    (model.sensitivity, "analyze", "compute"),
+    (model.goalseek, "goal_seek", "compute"),
+    (model.goalseek, "breakeven_curve", "compute"),
+    (model.goalseek, "metric_surface", "compute"),
+    (Figure, "savefig", "render"),
+    (charts.CashFlowFigure, "update", "render"),
+    (charts, "cash_flow_spec", "render"),
+)
+
+
+class Recorder:
+    """Thread-safe durations per ``category/name``, in seconds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def add(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self.samples[key].append(seconds)
+
+    def by_category(self, category: str) -> dict[str, list[float]]:
+        prefix = f"{category}/"
+        return {k[len(prefix):]: v for k, v in self.samples.items() if k.startswith(prefix)}
+
+
+@contextmanager
+def instrument(recorder: Recorder):
+    """Wrap every ``TIMED`` target with a timer for the duration of the block."""
+    originals = []
+    wrappers = {}
+    for owner, name, category in TIMED:
+        original = getattr(owner, name)
+        if original not in wrappers:
+            wrappers[original] = _timed(original, f"{category}/{name}", recorder)
+        originals.append((owner, name, original))
+        setattr(owner, name, wrappers[original])
+    try:
+        yield
+    finally:
+        for owner, name, original in reversed(originals):
+            setattr(owner, name, original)
+
+
+def _timed(fn, key: str, recorder: Recorder):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            recorder.add(key, time.perf_counter() - start)
+    return wrapper
+
+
+def _rss_mb() -> float:
+    """Current resident set size; falls back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        scale = 2**20 if sys.platform == "darwin" else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _random_value(slider, rng: random.Random):
+    steps = int(round((slider.max - slider.min) / slider.step))
+    value = slider.min + rng.randint(0, steps) * slider.step
+    return int(round(value)) if isinstance(slider.value, int) else round(value, 6)
+
+
+def _drag(slider, target, ticks: int) -> list:
+    """Values a slider passes through on its way to ``target``, ending there."""
+    values = np.linspace(slider.value, target, ticks + 1)[1:]
+    values = slider.min + np.round((values - slider.min) / slider.step) * slider.step
+    return [int(round(v)) if isinstance(slider.value, int) else round(float(v), 6) for v in values]
+
+
+def run_session(
+    page: str,
+    interactions: int,
+    seed: int,
+    features: tuple[str, ...],
+    recorder: Recorder,
+    start: threading.Barrier,
+    timeout: float,
+    input_mode: str = "On Apply",
+    drag_ticks: int = 1,
+) -> AppTest:
+    """One simulated investor: load ``page``, then drag ``interactions`` random sliders."""
+    rng = random.Random(seed)
+    at = AppTest.from_file(page, default_timeout=timeout)
+    start.wait()
+    began = time.perf_counter()
+    at.run()
+    recorder.add("first_run", time.perf_counter() - began)
+    toggles = [(at.toggle, key, True) for key in features]
+    if any(radio.key == "input_mode" for radio in at.radio):
+        toggles.append((at.radio, "input_mode", input_mode))
+    for widgets, key, value in toggles:
+        widgets(key=key).set_value(value)
+        began = time.perf_counter()
+        at.run()
+        recorder.add("rerun", time.perf_counter() - began)
+    for _ in range(interactions):
+        slider = rng.choice(at.slider)
+        began = time.perf_counter()
+        if slider.form_id:
+            # Form widgets only reach the server, in one rerun, when the form is submitted.
+            slider.set_value(_random_value(slider, rng))
+            next(b for b in at.button if b.form_id == slider.form_id).click()
+            at.run()
+            recorder.add("rerun", time.perf_counter() - began)
+        else:
+            for value in _drag(slider, _random_value(slider, rng), drag_ticks):
+                tick = time.perf_counter()
+                at.slider(key=slider.key).set_value(value)
+                at.run()
+                recorder.add("rerun", time.perf_counter() - tick)
+        recorder.add("interaction", time.perf_counter() - began)
+        if at.exception:
+            recorder.add("errors", 0.0)
+    return at
+
+
+def summarize(samples: list[float]) -> dict:
+    """Count, total, mean, max and percentiles of ``samples`` in milliseconds."""
+    if not samples:
+        return {"count": 0}
+    ms = np.asarray(samples) * 1000
+    stats = {"count": len(ms), "total_ms": float(ms.sum()), "mean_ms": float(ms.mean()), "max_ms": float(ms.max())}
+    stats.update({f"p{q}_ms": float(v) for q, v in zip(PERCENTILES, np.percentile(ms, PERCENTILES))})
+    return stats
+
+
+def _git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def run_benchmark(args) -> dict:
+    page = os.path.join(ROOT, args.page)
+    features = tuple(args.feature)
+    recorder = Recorder()
+    st.cache_data.clear()
+    charts._render_cash_flow.cache_clear()
+
+    rss_before = _rss_mb()
+    barrier = threading.Barrier(args.sessions)
+    began, cpu_began = time.perf_counter(), time.process_time()
+    with instrument(recorder), ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        futures = [
+            pool.submit(run_session, page, args.interactions, args.seed + i, features, recorder, barrier,
+                        args.timeout, args.input_mode, args.drag_ticks)
+            for i in range(args.sessions)
+        ]
+        # Keep every session alive until memory has been measured.
+        sessions = [future.result() for future in futures]
+    wall = time.perf_counter() - began
+    cpu = time.process_time() - cpu_began
+    rss_after = _rss_mb()
+    del sessions
+
+    reruns = recorder.samples["rerun"] + recorder.samples["first_run"]
+    compute = recorder.by_category("compute")
+    render = recorder.by_category("render")
+    return {
+        "meta": {
+            **_git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "streamlit": st.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {
+            "page": args.page,
+            "sessions": args.sessions,
+            "interactions": args.interactions,
+            "features": list(features),
+            "seed": args.seed,
+            "input_mode": args.input_mode,
+            "drag_ticks": args.drag_ticks,
+        },
+        "wall_s": wall,
+        "reruns_per_s": len(reruns) / wall,
+        "errors": len(recorder.samples["errors"]),
+        "first_run": summarize(recorder.samples["first_run"]),
+        "rerun": summarize(recorder.samples["rerun"]),
+        "interaction": summarize(recorder.samples["interaction"]),
+        "cpu_s": cpu,
+        "cpu_per_interaction_ms": cpu * 1000 / (args.sessions * args.interactions),
+        "compute": summarize([s for v in compute.values() for s in v]),
+        "render": summarize([s for v in render.values() for s in v]),
+        "compute_by_function": {name: summarize(v) for name, v in sorted(compute.items())},
+        "render_by_function": {name: summarize(v) for name, v in sorted(render.items())},
+        "memory": {
+            "rss_before_mb": rss_before,
+            "rss_after_mb": rss_after,
+            "per_session_mb": (rss_after - rss_before) / args.sessions,
+        },
+    }
+
+
+def _print_report(report: dict) -> None:
+    config = report["config"]
+    print(f"page:            {config['page']}  ({config['sessions']} sessions x {config['interactions']} interactions)")
+    print(f"inputs:          {config['input_mode']}, {config['drag_ticks']} ticks per drag")
+    print(f"wall time:       {report['wall_s']:.2f} s  ({report['reruns_per_s']:.1f} reruns/s, "
+          f"{report['errors']} errors)")
+    print(f"cpu:             {report['cpu_s']:.2f} s  ({report['cpu_per_interaction_ms']:.1f} ms per interaction)")
+    for label in ("first_run", "rerun", "interaction", "compute", "render"):
+        stats = report[label]
+        if stats["count"]:
+            pct = "  ".join(f"p{q} {stats[f'p{q}_ms']:7.1f}" for q in PERCENTILES)
+            print(f"{label + ':':<16} {pct}  max {stats['max_ms']:7.1f} ms  (n={stats['count']})")
+    memory = report["memory"]
+    print(f"memory:          {memory['rss_before_mb']:.0f} -> {memory['rss_after_mb']:.0f} MB RSS  "
+          f"(~{memory['per_session_mb']:.1f} MB/session)")
+
+
+def _print_comparison(old: dict, new: dict) -> None:
+    print(f"\nvs {old['meta'].get('commit') or '?'} ({old['meta'].get('timestamp', '?')}):")
+    for label in ("rerun", "interaction", "compute", "render"):
+        for stat in ("p50_ms", "p95_ms"):
+            before, after = old.get(label, {}).get(stat), new[label].get(stat)
+            if before and after:
+                print(f"  {label} {stat[:3]}: {before:8.1f} -> {after:8.1f} ms  ({after / before - 1:+.0%})")
+    before, after = old.get("cpu_per_interaction_ms"), new["cpu_per_interaction_ms"]
+    if before:
+        print(f"  cpu/interaction: {before:8.1f} -> {after:8.1f} ms  ({after / before - 1:+.0%})")
+    before, after = old["memory"]["per_session_mb"], new["memory"]["per_session_mb"]
+    print(f"  memory/session: {before:.1f} -> {after:.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", default=DEFAULT_PAGE, help="page script, relative to the repository root")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions")
+    parser.add_argument("--interactions", type=int, default=20, help="slider drags per session")
+    parser.add_argument("--drag-ticks", type=int, default=10, help="values a slider sends while dragged")
+    parser.add_argument("--input-mode", choices=("On Apply", "Live"), default="On Apply",
+                        help="the Financial Model page's assumption update mode")
+    parser.add_argument("--feature", action="append", default=[], choices=FEATURES,
+                        help="toggle a Financial Model section on in every session; repeatable")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="seconds allowed per rerun")
+    parser.add_argument("--json", metavar="PATH", help="write machine-readable results here")
+    parser.add_argument("--compare", metavar="PATH", help="earlier --json results to diff against")
+    args = parser.parse_args()
+
+    # Pages import from the repository root and resolve images relative to it.
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    report = run_benchmark(args)
+    _print_report(report)
+    if args.compare:
+        with open(args.compare) as f:
+            _print_comparison(json.load(f), report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Profile cold start: imports, each page's first render and time to first interaction.
+
+Every measurement runs in a fresh interpreter, so nothing is already imported
+or cached. A page's first run is the headless ``AppTest`` render of its script.
+The journey measures what a visitor feels: Home renders, the visitor reads
+for ``--think`` seconds, then opens the Financial Model. Its first render
+there is the time to first interaction.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup --repeat 5 --json startup.json
+    python -m benchmarks.bench_startup --compare startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = (
+    "Home.py",
+    "pages/01_Problem.py",
+    "pages/02_Opportunity.py",
+    "pages/03_Roadmap.py",
+    "pages/04_Financial_Model.py",
+    "pages/05_Investment_Case.py",
+)
+LANDING_PAGE = "Home.py"
+MODEL_PAGE = "pages/04_Financial_Model.py"
+
+
+def _probe(pages: list[str], think: float) -> dict:
+    """Runs inside the child interpreter: time the imports, then each page in turn."""
+    began = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    timings = {"import_s": time.perf_counter() - began, "pages": []}
+    for i, page in enumerate(pages):
+        if i:
+            time.sleep(think)
+        at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=120)
+        began = time.perf_counter()
+        at.run()
+        timings["pages"].append(time.perf_counter() - began)
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].message}")
+    return timings
+
+
+def _child(pages: list[str], think: float = 0.0) -> dict:
+    command = [sys.executable, "-m", "benchmarks.bench_startup", "--probe", json.dumps([pages, think])]
+    out = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def summarize(samples: list[float]) -> dict:
+    """Count, median, min and max of ``samples`` in milliseconds."""
+    ms = np.asarray(samples) * 1000
+    return {"count": len(ms), "median_ms": float(np.median(ms)), "min_ms": float(ms.min()), "max_ms": float(ms.max())}
+
+
+def _git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+def run_benchmark(args) -> dict:
+    imports, first_run = [], {page: [] for page in PAGES}
+    landing, interactive = [], []
+    for _ in range(args.repeat):
+        for page in PAGES:
+            timings = _child([page])
+            imports.append(timings["import_s"])
+            first_run[page].append(timings["pages"][0])
+        timings = _child([LANDING_PAGE, MODEL_PAGE], args.think)
+        landing.append(timings["pages"][0])
+        interactive.append(timings["pages"][1])
+
+    import streamlit as st
+
+    return {
+        "meta": {
+            **_git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "streamlit": st.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": {"repeat": args.repeat, "think_s": args.think},
+        "import": summarize(imports),
+        "first_run": {page: summarize(samples) for page, samples in first_run.items()},
+        "journey": {"landing": summarize(landing), "time_to_interactive": summarize(interactive)},
+    }
+
+
+def _print_report(report: dict) -> None:
+    config = report["config"]
+    print(f"cold starts:     {config['repeat']} per page, fresh interpreter each")
+    rows = [("streamlit import", report["import"])]
+    rows += [(f"first run {page}", stats) for page, stats in report["first_run"].items()]
+    rows += [("journey: Home", report["journey"]["landing"]),
+             (f"journey: model after {config['think_s']:g} s", report["journey"]["time_to_interactive"])]
+    for label, stats in rows:
+        print(f"{label:<42} median {stats['median_ms']:7.1f}  min {stats['min_ms']:7.1f}  "
+              f"max {stats['max_ms']:7.1f} ms")
+
+
+def _print_comparison(old: dict, new: dict) -> None:
+    print(f"\nvs {old['meta'].get('commit') or '?'} ({old['meta'].get('timestamp', '?')}):")
+    pairs = [("import", old["import"], new["import"])]
+    pairs += [(page, old["first_run"].get(page), stats) for page, stats in new["first_run"].items()]
+    pairs += [("time to interactive", old["journey"]["time_to_interactive"], new["journey"]["time_to_interactive"])]
+    for label, before, after in pairs:
+        if before and after:
+            before, after = before["median_ms"], after["median_ms"]
+            print(f"  {label:<30} {before:8.1f} -> {after:8.1f} ms  ({after / before - 1:+.0%})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per measurement")
+    parser.add_argument("--think", type=float, default=3.0,
+                        help="seconds spent on Home before opening the Financial Model")
+    parser.add_argument("--json", metavar="PATH", help="write machine-readable results here")
+    parser.add_argument("--compare", metavar="PATH", help="earlier --json results to diff against")
+    parser.add_argument("--probe", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Pages import from the repository root and resolve images relative to it.
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    if args.probe:
+        pages, think = json.loads(args.probe)
+        print(json.dumps(_probe(pages, think)))
+        return
+    report = run_benchmark(args)
+    _print_report(report)
+    if args.compare:
+        with open(args.compare) as f:
+            _print_comparison(json.load(f), report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
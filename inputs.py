@@ -0,0 +1,78 @@
+"""The Financial Model page's input widgets, without Streamlit.
+
+Slider ranges and steps, and the conversions between assumptions and widget
+values, live here so code outside the page (the background warm-up in
+``utils``) can work out the exact assumptions the page opens on.
+"""
+
+from dataclasses import asdict
+
+from model import Assumptions
+from model.calibrate import CALIBRATED_FIELDS, Calibration
+
+# Slider ranges in model units; goal seek and surfaces search the same ranges.
+INPUT_BOUNDS = {
+    "baseline_jobs": (20, 60),
+    "baseline_rev": (50_000, 200_000),
+    "baseline_exp": (10_000, 100_000),
+    "baseline_shrink": (-0.20, 0.20),
+    "stage1_cost": (0, 1_000_000),
+    "stage1_duration": (0.1, 2.0),
+    "stage2_cost": (0, 2_000_000),
+    "stage2_duration": (0.5, 3.0),
+    "uplift1": (0.0, 1.0),
+    "uplift2": (0.0, 2.0),
+    "rev_growth": (0.0, 0.20),
+    "exp_reduction": (0.0, 0.50),
+    "discount_rate": (0.0, 0.20),
+}
+PERCENT_INPUTS = {"baseline_shrink", "uplift1", "uplift2", "rev_growth", "exp_reduction", "discount_rate"}
+
+# Inputs typed into a number box rather than picked on a bounded slider.
+UNBOUNDED_INPUTS = {"stage1_cost", "stage2_cost"}
+
+# Slider steps in widget units (percent for PERCENT_INPUTS).
+SLIDER_STEPS = {
+    "baseline_jobs": 1, "baseline_rev": 5_000, "baseline_exp": 5_000, "baseline_shrink": 1,
+    "stage1_duration": 0.01, "stage2_duration": 0.01, "uplift1": 1, "uplift2": 1, "rev_growth": 1,
+    "exp_reduction": 1, "discount_rate": 1,
+}
+SLIDER_BOUNDS = {
+    name: tuple(round(bound * 100) if name in PERCENT_INPUTS else bound for bound in INPUT_BOUNDS[name])
+    for name in SLIDER_STEPS
+}
+
+
+def widget_values(a: Assumptions) -> dict:
+    """Widget state nearest ``a``: clipped to the slider ranges and snapped to the slider steps."""
+    values = {}
+    for name, value in asdict(a).items():
+        if name in PERCENT_INPUTS:
+            value *= 100
+        if name in SLIDER_STEPS:
+            low, high = SLIDER_BOUNDS[name]
+            step = SLIDER_STEPS[name]
+            value = round(low + round((min(max(value, low), high) - low) / step) * step, 6)
+        if not name.endswith("_duration"):
+            value = int(round(value))
+        values[name] = value
+    return values
+
+
+def clipped_inputs(a: Assumptions) -> list[str]:
+    """Inputs of ``a`` outside their slider ranges, which ``widget_values`` moves to the nearest end."""
+    return [name for name, (low, high) in INPUT_BOUNDS.items()
+            if name not in UNBOUNDED_INPUTS and not low <= getattr(a, name) <= high]
+
+
+def widget_assumptions(values: dict) -> Assumptions:
+    """The assumptions the page builds from these widget values (the inverse of ``widget_values``)."""
+    return Assumptions(**{name: value / 100 if name in PERCENT_INPUTS else value for name, value in values.items()})
+
+
+def starting_assumptions(calibrated: Calibration | None) -> Assumptions:
+    """What the page computes before any input is touched: model defaults, with the calibrated baseline if any."""
+    a = Assumptions()
+    if calibrated is not None:
+        a = a.replace(**{name: getattr(calibrated.assumptions, name) for name in CALIBRATED_FIELDS})
+    return widget_assumptions(widget_values(a))
@@ -0,0 +1,132 @@
+"""Financial model for the NDT Robotics investor dashboard.
+
+Submodules load on first use of one of their names, so ``import model`` (and
+the headless CLI) costs little more than NumPy.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from model.batch import AssumptionBatch, BatchResult, iter_batches, run_batch
+    from model.cache import SharedCache, shared_cache
+    from model.calibrate import Calibration, LedgerStats
+    from model.engine import (
+        ASSUMPTION_FIELDS,
+        YEARS,
+        Assumptions,
+        ModelResult,
+        baseline_cash_flow,
+        breakeven_year,
+        calculate_irr,
+        cumulative_advantage,
+        npv,
+        payback_period,
+        robotics_cash_flow,
+        robotics_cash_flow_with_investment,
+        run_model,
+    )
+    from model.fleet import FleetResult, FleetSpec, simulate_fleet
+    from model.goalseek import Goal, breakeven_curve, goal_seek, metric_surface
+    from model.graph import ModelGraph
+    from model.irr import IRRResult, irr_batch
+    from model.montecarlo import Distribution, MonteCarloResult, MonteCarloSpec, simulate
+    from model.options import OptionResult, OptionSpec, value_options
+    from model.periods import PeriodGrid, annual_totals, xirr, xnpv
+    from model.portfolio import GroupRollup, Portfolio, PortfolioMetrics, load_sites
+    from model.sensitivity import SensitivityResult, analyze
+
+_SUBMODULES = {
+    "batch": ("AssumptionBatch", "BatchResult", "iter_batches", "run_batch"),
+    "cache": ("SharedCache", "shared_cache"),
+    "calibrate": ("Calibration", "LedgerStats"),
+    "engine": (
+        "ASSUMPTION_FIELDS",
+        "YEARS",
+        "Assumptions",
+        "ModelResult",
+        "baseline_cash_flow",
+        "breakeven_year",
+        "calculate_irr",
+        "cumulative_advantage",
+        "npv",
+        "payback_period",
+        "robotics_cash_flow",
+        "robotics_cash_flow_with_investment",
+        "run_model",
+    ),
+    "fleet": ("FleetResult", "FleetSpec", "simulate_fleet"),
+    "goalseek": ("Goal", "breakeven_curve", "goal_seek", "metric_surface"),
+    "graph": ("ModelGraph",),
+    "irr": ("IRRResult", "irr_batch"),
+    "montecarlo": ("Distribution", "MonteCarloResult", "MonteCarloSpec", "simulate"),
+    "options": ("OptionResult", "OptionSpec", "value_options"),
+    "periods": ("PeriodGrid", "annual_totals", "xirr", "xnpv"),
+    "portfolio": ("GroupRollup", "Portfolio", "PortfolioMetrics", "load_sites"),
+    "sensitivity": ("SensitivityResult", "analyze"),
+}
+_LOCATIONS = {name: module for module, names in _SUBMODULES.items() for name in names}
+
+__all__ = [
+    "ASSUMPTION_FIELDS",
+    "YEARS",
+    "AssumptionBatch",
+    "Assumptions",
+    "BatchResult",
+    "Calibration",
+    "Distribution",
+    "FleetResult",
+    "FleetSpec",
+    "Goal",
+    "GroupRollup",
+    "IRRResult",
+    "LedgerStats",
+    "ModelGraph",
+    "ModelResult",
+    "MonteCarloResult",
+    "MonteCarloSpec",
+    "OptionResult",
+    "OptionSpec",
+    "PeriodGrid",
+    "Portfolio",
+    "PortfolioMetrics",
+    "SensitivityResult",
+    "SharedCache",
+    "analyze",
+    "annual_totals",
+    "baseline_cash_flow",
+    "breakeven_curve",
+    "breakeven_year",
+    "calculate_irr",
+    "cumulative_advantage",
+    "goal_seek",
+    "irr_batch",
+    "iter_batches",
+    "load_sites",
+    "metric_surface",
+    "npv",
+    "payback_period",
+    "robotics_cash_flow",
+    "robotics_cash_flow_with_investment",
+    "run_batch",
+    "run_model",
+    "shared_cache",
+    "simulate",
+    "simulate_fleet",
+    "value_options",
+    "xirr",
+    "xnpv",
+]
+
+
+def __getattr__(name: str):
+    if name not in _LOCATIONS:
+        raise AttributeError(f"module 'model' has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"model.{_LOCATIONS[name]}"), name)
+    # Cache on the package so later lookups (and monkeypatching) see a plain attribute.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,7 @@
+"""``python -m model``: the headless CLI in :mod:`model.cli`."""
+
+import sys
+
+from model.cli import main
+
+sys.exit(main())
@@ -0,0 +1,151 @@
+"""Batched scenario evaluation: many assumption sets in one array call.
+
+Rows are processed in fixed-size chunks so intermediate arrays stay bounded
+no matter how many scenarios are requested; within a chunk everything is
+plain NumPy broadcasting against the year axis.
+"""
+
+from collections.abc import Iterator, Mapping
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from model.engine import ASSUMPTION_FIELDS, YEARS, Assumptions
+from model.graph import ModelGraph
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+
+def _column(value, n: int) -> np.ndarray:
+    # Read-only columns of another batch are reused as they are, so a model
+    # graph sees the same object and can skip comparing it.
+    if isinstance(value, np.ndarray) and value.shape == (n,) and value.dtype == float and not value.flags.writeable:
+        return value
+    return np.broadcast_to(np.asarray(value, dtype=float).ravel(), (n,))
+
+
+class AssumptionBatch:
+    """Column-oriented set of N assumption rows.
+
+    Exposes the same attribute names as :class:`Assumptions`, each holding a
+    length-N float array, so the engine functions accept it unchanged.
+    """
+
+    def __init__(self, columns: Mapping[str, np.ndarray]):
+        unknown = set(columns) - set(ASSUMPTION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown assumption columns: {sorted(unknown)}")
+        lengths = {np.size(v) for v in columns.values() if np.ndim(v) > 0}
+        if len(lengths) > 1:
+            raise ValueError(f"Assumption columns have mismatched lengths: {sorted(lengths)}")
+        n = lengths.pop() if lengths else 1
+        defaults = asdict(Assumptions())
+        self._columns = {name: _column(columns.get(name, defaults[name]), n) for name in ASSUMPTION_FIELDS}
+        self._n = n
+
+    @classmethod
+    def from_data(cls, data) -> "AssumptionBatch":
+        """Build from a DataFrame, a structured array, a mapping or Assumptions.
+
+        Columns that are absent fall back to the :class:`Assumptions` defaults.
+        """
+        if isinstance(data, AssumptionBatch):
+            return data
+        if isinstance(data, Assumptions):
+            return cls(asdict(data))
+        if isinstance(data, np.ndarray) and data.dtype.names:
+            return cls({name: data[name] for name in data.dtype.names})
+        if hasattr(data, "columns"):  # pandas DataFrame, without importing pandas
+            return cls({name: data[name].to_numpy() for name in data.columns})
+        if isinstance(data, Mapping):
+            return cls(data)
+        raise TypeError(f"Cannot build an AssumptionBatch from {type(data).__name__}")
+
+    @classmethod
+    def grid(cls, base: Assumptions | None = None, **axes) -> "AssumptionBatch":
+        """Full-factorial grid over ``axes``, other fields taken from ``base``."""
+        base = base or Assumptions()
+        names = list(axes)
+        mesh = np.meshgrid(*(np.asarray(axes[n], dtype=float) for n in names), indexing="ij")
+        columns = asdict(base)
+        columns.update({n: m.ravel() for n, m in zip(names, mesh)})
+        return cls(columns)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.__dict__["_columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, index) -> "AssumptionBatch":
+        return AssumptionBatch({k: v[index] for k, v in self._columns.items()})
+
+    def row(self, i: int) -> Assumptions:
+        """The i-th scenario as a scalar :class:`Assumptions`."""
+        return Assumptions(**{k: float(v[i]) for k, v in self._columns.items()})
+
+    def to_records(self) -> np.ndarray:
+        """Structured array with one field per assumption."""
+        out = np.empty(self._n, dtype=[(name, float) for name in ASSUMPTION_FIELDS])
+        for name, values in self._columns.items():
+            out[name] = values
+        return out
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Per-scenario flows (N, T) and metric vectors (N,); NaN means 'never' or undefined."""
+
+    years: np.ndarray
+    baseline_cf: np.ndarray
+    robotics_cf: np.ndarray
+    baseline_npv: np.ndarray
+    robotics_npv: np.ndarray
+    robotics_irr: np.ndarray
+    robotics_payback: np.ndarray
+    breakeven_year: np.ndarray
+    cumulative_advantage: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.baseline_npv)
+
+
+_FIELDS = ("baseline_cf", "robotics_cf", "baseline_npv", "robotics_npv", "robotics_irr", "robotics_payback",
+           "breakeven_year", "cumulative_advantage")
+
+
+def _evaluate(batch: AssumptionBatch, years: np.ndarray) -> BatchResult:
+    return BatchResult(years=years, **ModelGraph(years).evaluate(batch, _FIELDS))
+
+
+def iter_batches(
+    data, chunk_size: int = DEFAULT_CHUNK_SIZE, years: np.ndarray = YEARS
+) -> Iterator[tuple[slice, BatchResult]]:
+    """Yield ``(rows, result)`` one chunk at a time for streaming consumers."""
+    batch = AssumptionBatch.from_data(data)
+    for start in range(0, len(batch), chunk_size):
+        rows = slice(start, min(start + chunk_size, len(batch)))
+        yield rows, _evaluate(batch[rows], years)
+
+
+def run_batch(data, chunk_size: int = DEFAULT_CHUNK_SIZE, years: np.ndarray = YEARS) -> BatchResult:
+    """Evaluate every assumption row in ``data`` and return stacked results."""
+    batch = AssumptionBatch.from_data(data)
+    n, t = len(batch), len(years)
+    out = {
+        "baseline_cf": np.empty((n, t)),
+        "robotics_cf": np.empty((n, t)),
+        "baseline_npv": np.empty(n),
+        "robotics_npv": np.empty(n),
+        "robotics_irr": np.empty(n),
+        "robotics_payback": np.empty(n),
+        "breakeven_year": np.empty(n),
+        "cumulative_advantage": np.empty(n),
+    }
+    for rows, chunk in iter_batches(batch, chunk_size, years):
+        for name, array in out.items():
+            array[rows] = getattr(chunk, name)
+    return BatchResult(years=years, **out)
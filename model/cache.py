@@ -0,0 +1,569 @@
+"""Result cache shared by every session, process and replica of the dashboard.
+
+:class:`SharedCache` stores pickled results (model outputs, rendered chart
+bytes) under content addresses from :func:`model.store.result_key`, on a
+pluggable backend chosen by ``NDT_CACHE_URL``:
+
+- unset or ``sqlite:///path/to/store.sqlite3``: the scenario store's result
+  table, shared by the processes on one machine (the default);
+- ``memory://``: this process only;
+- ``redis://host:6379/0``: any Redis-protocol server, shared by replicas on
+  any machine. Entries expire with their TTL; size the server with
+  ``maxmemory`` and an ``allkeys-lru`` policy.
+
+Payloads are pickles, so each carries an HMAC-SHA256 tag and is only
+unpickled once the tag checks out: whoever can write to the backend but lacks
+the key cannot plant a payload. The key is ``NDT_CACHE_KEY``, which every
+replica sharing a Redis server must set alike; a Redis URL is refused without
+it. Unset, a scenario store signs with a random secret kept beside it
+(``store.key`` next to ``store.sqlite3``, readable by its owner only), and
+``memory://`` with one that lives as long as the process.
+
+Identical requests compute once (single-flight): concurrent callers in a
+process wait for the first, and processes coordinate through a short-lived
+lock on the backend, polling for the result while another holds it. A backend
+that fails or times out is treated as a miss, so the page still renders.
+Hits, misses, waits, computes, errors and rejected payloads are counted per kind for
+``tracing``'s Prometheus endpoint.
+
+For development, ``python -m model.cache serve`` runs a small Redis-protocol
+stand-in (GET, SET with PX/EX/NX, DEL and friends, LRU-bounded). Usage from
+the repository root::
+
+    python -m model.cache serve --port 6380 --max-mb 256
+    NDT_CACHE_URL=redis://localhost:6380/0 streamlit run Home.py
+    python -m model.cache stats
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import pickle
+import secrets
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from model.store import DEFAULT_PATH, ScenarioStore, result_key
+
+CACHE_URL = os.environ.get("NDT_CACHE_URL", "")
+CACHE_KEY = os.environ.get("NDT_CACHE_KEY", "").encode()
+TAG_BYTES = hashlib.sha256().digest_size
+# Signs memory:// payloads when NDT_CACHE_KEY is unset; they never leave the process.
+_PROCESS_KEY = secrets.token_bytes(32)
+# Results are content-addressed, so the TTL only bounds how long unused entries linger.
+DEFAULT_TTL = float(os.environ.get("NDT_CACHE_TTL", 7 * 24 * 3600))
+# Longest a computation may hold its single-flight lock; waiters give up and compute after this.
+LOCK_TTL = 60.0
+POLL_SECONDS = 0.05
+# How long to stop asking a backend that just failed.
+RETRY_SECONDS = 30.0
+OUTCOMES = ("hit", "miss", "wait", "compute", "error", "rejected")
+
+# Process-wide counters, per (kind, outcome), and seconds spent computing per kind.
+STATS: Counter = Counter()
+COMPUTE_SECONDS: Counter = Counter()
+_stats_lock = threading.Lock()
+_inflight: dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+
+def _count(kind: str, outcome: str, seconds: float = 0.0) -> None:
+    with _stats_lock:
+        STATS[kind, outcome] += 1
+        if seconds:
+            COMPUTE_SECONDS[kind] += seconds
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+class MemoryBackend:
+    """Payloads in this process, least recently used evicted past ``max_bytes``."""
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._locks: dict[str, float] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get_payload(self, key: str, max_age: float | None = None) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if max_age is not None and entry[1] < time.time() - max_age:
+                self._size -= len(self._entries.pop(key)[0])
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put_payload(self, key: str, kind: str, payload: bytes, ttl: float | None = None) -> None:
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = (payload, time.time())
+            self._size += len(payload)
+            while self._size > self.max_bytes:
+                self._size -= len(self._entries.popitem(last=False)[1][0])
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        with self._lock:
+            now = time.time()
+            if self._locks.get(name, 0) > now:
+                return False
+            self._locks[name] = now + ttl
+            return True
+
+    def release(self, name: str) -> None:
+        with self._lock:
+            self._locks.pop(name, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "memory", "entries": len(self._entries), "bytes": self._size}
+
+
+class RedisError(Exception):
+    """An error reply from a Redis-protocol server."""
+
+
+def _command(*args) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(stream):
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed by the cache server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise RedisError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        size = int(body)
+        if size < 0:
+            return None
+        data = stream.read(size + 2)
+        if len(data) != size + 2:
+            raise ConnectionError("connection closed by the cache server")
+        return data[:-2]
+    if kind == b"*":
+        count = int(body)
+        return None if count < 0 else [_read_reply(stream) for _ in range(count)]
+    raise ConnectionError(f"unexpected reply from the cache server: {line[:40]!r}")
+
+
+class RedisBackend:
+    """A Redis-protocol server, spoken to directly over one socket per thread."""
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, prefix: str = "ndt:",
+                 timeout: float = 2.0):
+        self.address = (host, port)
+        self.db = db
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _stream(self):
+        stream = getattr(self._local, "stream", None)
+        if stream is None:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+            stream = sock.makefile("rwb")
+            if self.db:
+                stream.write(_command("SELECT", self.db))
+                stream.flush()
+                _read_reply(stream)
+            self._local.stream = stream
+        return stream
+
+    def call(self, *args):
+        """Send one command and return its reply, reconnecting once if the connection dropped."""
+        for attempt in (1, 2):
+            stream = self._stream()
+            try:
+                stream.write(_command(*args))
+                stream.flush()
+                return _read_reply(stream)
+            except (ConnectionError, OSError):
+                self._local.stream = None
+                stream.close()
+                if attempt == 2:
+                    raise
+
+    def get_payload(self, key: str, max_age: float | None = None) -> bytes | None:
+        return self.call("GET", self.prefix + key)
+
+    def put_payload(self, key: str, kind: str, payload: bytes, ttl: float | None = None) -> None:
+        if ttl is None:
+            self.call("SET", self.prefix + key, payload)
+        else:
+            self.call("SET", self.prefix + key, payload, "PX", max(1, int(ttl * 1000)))
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        return self.call("SET", f"{self.prefix}lock:{name}", "1", "NX", "PX", max(1, int(ttl * 1000))) == "OK"
+
+    def release(self, name: str) -> None:
+        self.call("DEL", f"{self.prefix}lock:{name}")
+
+    def stats(self) -> dict:
+        host, port = self.address
+        return {"backend": "redis", "server": f"{host}:{port}/{self.db}", "keys": self.call("DBSIZE")}
+
+
+# Failures a backend may raise; SharedCache treats them as misses rather than failing the page.
+BACKEND_ERRORS = (OSError, RedisError, sqlite3.Error)
+
+
+def backend_from_url(url: str = CACHE_URL):
+    """The backend an ``NDT_CACHE_URL`` names (see the module docstring)."""
+    parts = urlsplit(url)
+    if parts.scheme in ("", "sqlite"):
+        return ScenarioStore(parts.path or DEFAULT_PATH)
+    if parts.scheme == "memory":
+        return MemoryBackend()
+    if parts.scheme == "redis":
+        db = int(parts.path.strip("/") or 0)
+        return RedisBackend(parts.hostname or "localhost", parts.port or 6379, db)
+    raise ValueError(f"unknown cache URL {url!r}; use sqlite:///path, memory:// or redis://host:port/db")
+
+
+def _key_file(path: Path) -> bytes:
+    """The secret in ``path``, created (owner-readable only) by whichever process gets there first."""
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    draft = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    fd = os.open(draft, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(secrets.token_hex(32).encode())
+    try:
+        # Linking fails if another process won the race; everyone then reads its key.
+        os.link(draft, path)
+    except FileExistsError:
+        pass
+    finally:
+        draft.unlink()
+    return path.read_bytes()
+
+
+def signing_key(backend) -> bytes:
+    """``NDT_CACHE_KEY``, else a secret only this machine's processes share; a network server needs the former."""
+    if CACHE_KEY:
+        return CACHE_KEY
+    if isinstance(backend, ScenarioStore):
+        return _key_file(backend.path.with_suffix(".key"))
+    if isinstance(backend, MemoryBackend):
+        return _PROCESS_KEY
+    raise ValueError("a shared cache on a network server needs NDT_CACHE_KEY, a secret every replica shares")
+
+
+# ============================================================
+# SHARED CACHE
+# ============================================================
+
+class SharedCache:
+    """Single-flight memoization of signed, pickled results on a shared backend."""
+
+    def __init__(self, backend, ttl: float = DEFAULT_TTL, lock_ttl: float = LOCK_TTL, key: bytes | None = None):
+        self.backend = backend
+        self.key = signing_key(backend) if key is None else key
+        if not self.key:
+            raise ValueError("the shared cache needs a non-empty signing key")
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self._down_until = 0.0
+
+    def _call(self, kind: str, method: str, *args):
+        """``backend.method(*args)``, or None while the backend is failing.
+
+        After an error the backend is left alone for ``RETRY_SECONDS``, so an
+        unreachable server costs one timeout, not one per lookup.
+        """
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return getattr(self.backend, method)(*args)
+        except BACKEND_ERRORS:
+            _count(kind, "error")
+            self._down_until = time.monotonic() + RETRY_SECONDS
+            return None
+
+    def _sign(self, body: bytes) -> bytes:
+        return hmac.new(self.key, body, hashlib.sha256).digest()
+
+    def _get(self, kind: str, key: str):
+        payload = self._call(kind, "get_payload", key, self.ttl)
+        if payload is None:
+            return None
+        tag, body = payload[:TAG_BYTES], payload[TAG_BYTES:]
+        if not hmac.compare_digest(tag, self._sign(body)):
+            # Written without our key: another deployment, or someone else. Never unpickle it.
+            _count(kind, "rejected")
+            return None
+        try:
+            return pickle.loads(body)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Truncated, or pickled by code that has since changed shape.
+            _count(kind, "error")
+            return None
+
+    def _lock(self, kind: str, key: str) -> bool | None:
+        """Take ``key``'s single-flight lock, waiting while another process holds it.
+
+        True once taken, False if that process's result arrived meanwhile, and
+        None if the backend failed or the holder overran ``lock_ttl``: compute
+        without the lock then.
+        """
+        deadline = time.monotonic() + self.lock_ttl
+        waited = False
+        while True:
+            taken = self._call(kind, "acquire", key, self.lock_ttl)
+            if taken is None or taken:
+                return taken
+            if not waited:
+                _count(kind, "wait")
+                waited = True
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(POLL_SECONDS)
+            if self._call(kind, "get_payload", key, self.ttl) is not None:
+                return False
+
+    def get_or_compute(self, kind: str, params, compute: Callable[[], object]):
+        """The ``kind`` result for ``params``, calling ``compute()`` only if no one has cached it yet."""
+        key = result_key(kind, params)
+        value = self._get(kind, key)
+        if value is not None:
+            _count(kind, "hit")
+            return value
+        _count(kind, "miss")
+
+        with _inflight_lock:
+            event = _inflight.get(key)
+            leader = event is None
+            if leader:
+                event = _inflight[key] = threading.Event()
+        if not leader:
+            # Another thread here is computing it; use its result unless it failed.
+            _count(kind, "wait")
+            event.wait(self.lock_ttl)
+            value = self._get(kind, key)
+            if value is not None:
+                return value
+        try:
+            locked = self._lock(kind, key)
+            if locked is False:
+                value = self._get(kind, key)
+                if value is not None:
+                    return value
+            try:
+                began = time.perf_counter()
+                value = compute()
+                _count(kind, "compute", time.perf_counter() - began)
+                body = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                self._call(kind, "put_payload", key, kind, self._sign(body) + body, self.ttl)
+            finally:
+                if locked:
+                    self._call(kind, "release", key)
+            return value
+        finally:
+            if leader:
+                with _inflight_lock:
+                    del _inflight[key]
+                event.set()
+
+    def memoize(self, kind: str, compute: Callable, *args):
+        """``compute(*args)``, computed once across every process sharing the backend."""
+        return self.get_or_compute(kind, args, lambda: compute(*args))
+
+    def stats(self) -> dict:
+        try:
+            backend = self.backend.stats()
+        except BACKEND_ERRORS as exc:
+            backend = {"error": str(exc)}
+        return {"backend": backend, "process": counters()}
+
+
+def counters() -> dict[str, dict[str, int]]:
+    """This process's counts per kind and outcome."""
+    with _stats_lock:
+        kinds = sorted({kind for kind, _ in STATS})
+        return {kind: {outcome: STATS[kind, outcome] for outcome in OUTCOMES} for kind in kinds}
+
+
+def prometheus_lines() -> list[str]:
+    """Cache counters in the Prometheus text format, for ``tracing.prometheus_text``."""
+    lines = ["# HELP ndt_cache_requests_total Shared cache lookups and what became of them.",
+             "# TYPE ndt_cache_requests_total counter"]
+    with _stats_lock:
+        lines += [f'ndt_cache_requests_total{{kind="{kind}",outcome="{outcome}"}} {count}'
+                  for (kind, outcome), count in sorted(STATS.items())]
+        lines += ["# HELP ndt_cache_compute_seconds_total Time spent computing results the cache missed.",
+                  "# TYPE ndt_cache_compute_seconds_total counter"]
+        lines += [f'ndt_cache_compute_seconds_total{{kind="{kind}"}} {seconds!r}'
+                  for kind, seconds in sorted(COMPUTE_SECONDS.items())]
+    return lines
+
+
+_shared: SharedCache | None = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache() -> SharedCache:
+    """This process's cache on the ``NDT_CACHE_URL`` backend."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SharedCache(backend_from_url(CACHE_URL))
+        return _shared
+
+
+# ============================================================
+# REDIS-PROTOCOL STAND-IN
+# ============================================================
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    """Just enough of Redis for the cache: strings with expiry, NX, and an LRU memory bound."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, max_bytes: int = 256 * 2**20):
+        super().__init__(address, _StandInHandler)
+        self.max_bytes = max_bytes
+        self.data: OrderedDict[bytes, tuple[bytes, float | None]] = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def _live(self, key: bytes):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            self._drop(key)
+            return None
+        return entry
+
+    def _drop(self, key: bytes) -> bool:
+        entry = self.data.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+        return entry is not None
+
+    def execute(self, args: list[bytes]):
+        name = args[0].upper()
+        with self.lock:
+            if name == b"PING":
+                return "PONG"
+            if name == b"SELECT":
+                return "OK"
+            if name == b"FLUSHDB":
+                self.data.clear()
+                self.size = 0
+                return "OK"
+            if name == b"DBSIZE":
+                return sum(self._live(key) is not None for key in list(self.data))
+            if name == b"GET":
+                entry = self._live(args[1])
+                if entry is None:
+                    return None
+                self.data.move_to_end(args[1])
+                return entry[0]
+            if name in (b"DEL", b"EXISTS"):
+                keys = args[1:]
+                if name == b"EXISTS":
+                    return sum(self._live(key) is not None for key in keys)
+                return sum(self._drop(key) for key in keys)
+            if name == b"SET":
+                return self._set(args[1], args[2], [arg.upper() for arg in args[3:]], args[3:])
+        raise RedisError(f"ERR unknown command '{name.decode(errors='replace')}'")
+
+    def _set(self, key: bytes, value: bytes, flags: list[bytes], raw: list[bytes]):
+        expires = None
+        for i, flag in enumerate(flags):
+            if flag in (b"PX", b"EX"):
+                expires = time.time() + int(raw[i + 1]) / (1000 if flag == b"PX" else 1)
+        if b"NX" in flags and self._live(key) is not None:
+            return None
+        self._drop(key)
+        self.data[key] = (value, expires)
+        self.size += len(value)
+        while self.size > self.max_bytes and self.data:
+            self._drop(next(iter(self.data)))
+        return "OK"
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                args = _read_reply(self.rfile)
+            except (ConnectionError, OSError, ValueError):
+                return
+            if not isinstance(args, list) or not args:
+                return
+            try:
+                self.wfile.write(_encode(self.server.execute(args)))
+            except RedisError as exc:
+                self.wfile.write(b"-%s\r\n" % str(exc).encode())
+            except (IndexError, ValueError):
+                self.wfile.write(b"-ERR syntax error\r\n")
+            self.wfile.flush()
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Redis-protocol stand-in, or show cache statistics.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run a local Redis-protocol stand-in")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=6380)
+    serve.add_argument("--max-mb", type=float, default=256)
+    stats = commands.add_parser("stats", help="show the backend's size")
+    stats.add_argument("--url", default=CACHE_URL, help="cache URL (default: NDT_CACHE_URL, else the scenario store)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        with StandInServer((args.host, args.port), int(args.max_mb * 2**20)) as server:
+            print(f"Redis-protocol stand-in on redis://{args.host}:{args.port}/0")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+    else:
+        try:
+            print(SharedCache(backend_from_url(args.url)).stats()["backend"])
+        except ValueError as exc:
+            parser.error(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""Calibrate the baseline assumptions from historical job and expense ledgers.
+
+Ledgers are CSV or Parquet files of any size, read a chunk at a time:
+
+* a job ledger has one row per job with ``date`` and ``revenue`` and,
+  optionally, the job's direct ``expense``;
+* an expense ledger has ``date`` and ``amount`` rows for costs not booked
+  against a job, spread over the jobs of their month.
+
+Each chunk is folded into per-month totals (:class:`LedgerStats`), which are
+all the fit needs, so one pass over the ledgers uses memory in proportion to
+the months they span, not their rows. Folding more rows later is the same
+operation, so appending a month of data refreshes the estimates without
+rereading the history.
+
+From the totals, :func:`fit` estimates over the latest twelve months:
+
+* ``baseline_jobs``, the trailing year's jobs;
+* ``baseline_rev`` and ``baseline_exp``, revenue and total expense per job;
+* ``baseline_shrink``, from a log-linear trend in monthly jobs over the whole
+  history, once it spans a year.
+
+Each estimate also gets a standard deviation, which :meth:`Calibration.distribution`
+turns into a Monte Carlo distribution. Fits are saved as numbered versions in the
+scenario store, and the Financial Model page loads the latest one as its defaults.
+Usage from the repository root::
+
+    python -m model.calibrate jobs_2019_2025.parquet expenses_2019_2025.csv
+    python -m model.calibrate --append jobs_2026_01.csv
+    python -m model.calibrate --list
+"""
+
+import argparse
+import csv
+import math
+import os
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from model.engine import Assumptions
+from model.montecarlo import Distribution
+from model.store import DEFAULT_PATH, ScenarioStore
+
+LEDGER_FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+DATE_COLUMN = "date"
+JOB_COLUMNS = ("revenue", "expense")
+EXPENSE_COLUMN = "amount"
+DEFAULT_CHUNK_ROWS = 250_000
+TOTALS = ("jobs", "revenue", "job_expense", "other_expense")
+CALIBRATED_FIELDS = ("baseline_jobs", "baseline_rev", "baseline_exp", "baseline_shrink")
+# Months of history needed before a trend in job counts means more than seasonality.
+MIN_TREND_MONTHS = 12
+
+
+# ============================================================
+# STREAMING LEDGERS
+# ============================================================
+
+def _months(values: np.ndarray) -> np.ndarray:
+    """Months since 1970-01 of ISO dates or datetimes."""
+    values = np.asarray(values)
+    if values.dtype.kind != "M":
+        # "2024-03-15", "2024-03-15T10:22" and "2024-03" all start with the month.
+        values = values.astype(str).astype("U7")
+    try:
+        return values.astype("datetime64[M]").astype(np.int64)
+    except ValueError as exc:
+        raise ValueError(f"cannot read {DATE_COLUMN!r}: {exc}") from None
+
+
+def ledger_kind(columns) -> str:
+    """``"jobs"`` or ``"expenses"``, from a ledger's column names."""
+    if DATE_COLUMN not in columns:
+        raise ValueError(f"a ledger needs a {DATE_COLUMN!r} column")
+    if "revenue" in columns:
+        return "jobs"
+    if EXPENSE_COLUMN in columns:
+        return "expenses"
+    raise ValueError(f"a ledger needs a 'revenue' column (jobs) or an {EXPENSE_COLUMN!r} column (expenses)")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def read_ledger(path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> tuple[str, Iterator[dict[str, np.ndarray]]]:
+    """The ledger's kind and an iterator over its needed columns, about ``chunk_rows`` rows at a time.
+
+    Parquet needs pyarrow. CSV is streamed by pyarrow when it is installed,
+    and by the much slower standard library reader otherwise.
+    """
+    fmt = LEDGER_FORMATS.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"cannot tell the format of {path}; use .csv or .parquet")
+    pa = _pyarrow()
+    if fmt == "parquet":
+        if pa is None:
+            raise ValueError("Parquet ledgers need pyarrow: pip install pyarrow")
+        import pyarrow.parquet as pq
+
+        source = pq.ParquetFile(path)
+        names = source.schema_arrow.names
+        batches = lambda wanted: source.iter_batches(batch_size=chunk_rows, columns=wanted)
+    else:
+        with open(path, newline="") as f:
+            names = next(csv.reader(f), [])
+    kind = ledger_kind(names)
+    wanted = [name for name in (DATE_COLUMN, *JOB_COLUMNS, EXPENSE_COLUMN) if name in names]
+    if fmt == "csv" and pa is None:
+        return kind, _csv_chunks(path, [names.index(name) for name in wanted], wanted, chunk_rows)
+    if fmt == "csv":
+        from pyarrow import csv as pa_csv
+
+        # Blocks of about 32 bytes a row. ISO dates arrive as dates; anything else as strings.
+        reader = pa_csv.open_csv(path, read_options=pa_csv.ReadOptions(block_size=max(1 << 20, chunk_rows * 32)),
+                                 convert_options=pa_csv.ConvertOptions(include_columns=wanted))
+        batches = lambda wanted: reader
+    chunks = ({name: batch.column(name).to_numpy(zero_copy_only=False) for name in wanted}
+              for batch in batches(wanted))
+    return kind, chunks
+
+
+def _csv_chunks(path: str, positions: list[int], names: list[str], chunk_rows: int) -> Iterator[dict[str, np.ndarray]]:
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        while True:
+            rows = [[row[i] for i in positions] for _, row in zip(range(chunk_rows), reader)]
+            if not rows:
+                return
+            columns = np.array(rows).T
+            chunk = {DATE_COLUMN: columns[0]}
+            for name, values in zip(names[1:], columns[1:]):
+                try:
+                    chunk[name] = np.where(values == "", "nan", values).astype(float)
+                except ValueError as exc:
+                    raise ValueError(f"column {name!r} of {path}: {exc}") from None
+            yield chunk
+
+
+# ============================================================
+# ONLINE STATISTICS
+# ============================================================
+
+@dataclass
+class LedgerStats:
+    """Per-month totals of everything folded in so far: memory grows with months, not rows."""
+
+    first_month: int = 0
+    totals: np.ndarray = field(default_factory=lambda: np.zeros((0, len(TOTALS))))
+    rows: int = 0
+    sources: list[str] = field(default_factory=list)
+
+    def _add(self, months: np.ndarray, columns: dict[int, np.ndarray]) -> None:
+        if not len(months):
+            return
+        lo, hi = int(months.min()), int(months.max())
+        if not len(self.totals):
+            self.first_month = lo
+        start = min(lo, self.first_month)
+        stop = max(hi + 1, self.first_month + len(self.totals))
+        if start != self.first_month or stop != self.first_month + len(self.totals):
+            grown = np.zeros((stop - start, len(TOTALS)))
+            offset = self.first_month - start
+            grown[offset:offset + len(self.totals)] = self.totals
+            self.first_month, self.totals = start, grown
+        index = months - self.first_month
+        for column, values in columns.items():
+            self.totals[:, column] += np.bincount(index, weights=values, minlength=len(self.totals))
+        self.rows += len(months)
+
+    def fold(self, kind: str, chunk: dict[str, np.ndarray]) -> None:
+        """Add one chunk of a ``kind`` ledger (see :func:`read_ledger`)."""
+        months = _months(chunk[DATE_COLUMN])
+        # Blank or null amounts (say, no direct expense booked) count as zero.
+        amount = lambda name: np.nan_to_num(np.asarray(chunk[name], dtype=float))
+        if kind == "jobs":
+            columns = {0: np.ones(len(months)), 1: amount("revenue")}
+            if "expense" in chunk:
+                columns[2] = amount("expense")
+        else:
+            columns = {3: amount(EXPENSE_COLUMN)}
+        self._add(months, columns)
+
+    def fold_file(self, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> int:
+        """Stream a whole ledger in; returns the rows read."""
+        source = f"{Path(path).name}:{os.path.getsize(path)}"
+        if source in self.sources:
+            raise ValueError(f"{path} has already been folded in")
+        before = self.rows
+        kind, chunks = read_ledger(path, chunk_rows)
+        for chunk in chunks:
+            self.fold(kind, chunk)
+        self.sources.append(source)
+        return self.rows - before
+
+    @property
+    def months(self) -> np.ndarray:
+        return np.arange(self.first_month, self.first_month + len(self.totals))
+
+    def to_json(self) -> dict:
+        return {"first_month": self.first_month, "totals": self.totals.tolist(), "rows": self.rows,
+                "sources": list(self.sources)}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "LedgerStats":
+        return cls(
+            first_month=data["first_month"],
+            totals=np.array(data["totals"], dtype=float).reshape(-1, len(TOTALS)),
+            rows=data["rows"],
+            sources=list(data["sources"]),
+        )
+
+
+def _month_label(month: int) -> str:
+    return str(np.datetime64(month, "M"))
+
+
+def _trend(years: np.ndarray, values: np.ndarray) -> tuple[float, float]:
+    """Least-squares slope of ``log(values)`` on ``years`` and its standard error."""
+    x = years - years.mean()
+    y = np.log(values)
+    slope = float(x @ y / (x @ x))
+    residual = y - y.mean() - slope * x
+    return slope, float(np.sqrt(residual @ residual / (len(x) - 2) / (x @ x)))
+
+
+# ============================================================
+# FIT
+# ============================================================
+
+@dataclass(frozen=True)
+class Calibration:
+    """Fitted baseline assumptions, their standard deviations and what they were fitted from."""
+
+    assumptions: Assumptions
+    fitted: tuple[str, ...]
+    std_devs: dict[str, float]
+    jobs: int
+    first_month: str
+    last_month: str
+    stats: LedgerStats = field(compare=False, repr=False)
+
+    def spread(self, name: str, kind: str) -> float:
+        """Relative ``spread`` for :meth:`Distribution.around` matching the fitted standard deviation."""
+        value = abs(getattr(self.assumptions, name))
+        if not value:
+            return 0.0
+        cv = self.std_devs[name] / value
+        if kind == "lognormal":
+            return math.sqrt(math.log1p(cv * cv))
+        # Uniform on ±s has standard deviation s/√3; symmetric triangular, s/√6.
+        return cv * (math.sqrt(3) if kind == "uniform" else math.sqrt(6))
+
+    def distribution(self, name: str, kind: str = "triangular", value: float | None = None) -> Distribution:
+        """``kind`` distribution with the fitted spread of ``name``, centred on ``value`` or the fit."""
+        if value is None:
+            value = getattr(self.assumptions, name)
+        return Distribution.around(kind, value, self.spread(name, kind))
+
+    def to_json(self) -> dict:
+        """Everything but ``assumptions``, which the store keeps in a column of its own."""
+        return {"fitted": list(self.fitted), "std_devs": self.std_devs, "jobs": self.jobs,
+                "first_month": self.first_month, "last_month": self.last_month, "stats": self.stats.to_json()}
+
+    @classmethod
+    def from_json(cls, data: dict, assumptions: Assumptions) -> "Calibration":
+        return cls(
+            assumptions=assumptions,
+            fitted=tuple(data["fitted"]),
+            std_devs=dict(data["std_devs"]),
+            jobs=data["jobs"],
+            first_month=data["first_month"],
+            last_month=data["last_month"],
+            stats=LedgerStats.from_json(data["stats"]),
+        )
+
+
+def fit(stats: LedgerStats, base: Assumptions = Assumptions()) -> Calibration:
+    """Baseline assumptions from ``stats``; fields the ledgers can't support keep ``base``'s values."""
+    jobs, revenue, job_expense, other_expense = stats.totals.T
+    if not jobs.sum():
+        raise ValueError("the ledgers hold no jobs")
+    last = int(np.flatnonzero(jobs)[-1])
+    window = slice(max(0, last - 11), last + 1)
+    months_in_window = last + 1 - window.start
+    per_year = 12 / months_in_window
+    w_jobs = jobs[window]
+    active = w_jobs > 0
+
+    values = {
+        "baseline_jobs": w_jobs.sum() * per_year,
+        "baseline_rev": revenue[window].sum() / w_jobs.sum(),
+        "baseline_exp": (job_expense[window].sum() + other_expense[window].sum()) / w_jobs.sum(),
+    }
+    std_devs = {}
+    if months_in_window >= 2:
+        # A year of independent months: the year's total varies by √12 monthly
+        # standard deviations, its per-job averages by 1/√12 of theirs.
+        std_devs["baseline_jobs"] = float(np.std(w_jobs, ddof=1) * np.sqrt(12))
+    if active.sum() >= 2:
+        monthly_rev = revenue[window][active] / w_jobs[active]
+        monthly_exp = (job_expense[window][active] + other_expense[window][active]) / w_jobs[active]
+        std_devs["baseline_rev"] = float(np.std(monthly_rev, ddof=1) / np.sqrt(12))
+        std_devs["baseline_exp"] = float(np.std(monthly_exp, ddof=1) / np.sqrt(12))
+
+    history = jobs[:last + 1] > 0
+    if last + 1 >= MIN_TREND_MONTHS and history.sum() >= 3:
+        slope, se = _trend(np.flatnonzero(history) / 12, jobs[:last + 1][history])
+        values["baseline_shrink"] = math.expm1(slope)
+        std_devs["baseline_shrink"] = math.exp(slope) * se
+
+    return Calibration(
+        assumptions=base.replace(**{name: float(value) for name, value in values.items()}),
+        fitted=tuple(name for name in CALIBRATED_FIELDS if name in values),
+        std_devs={name: std_devs[name] for name in CALIBRATED_FIELDS if name in std_devs},
+        jobs=int(jobs.sum()),
+        first_month=_month_label(stats.first_month),
+        last_month=_month_label(stats.first_month + last),
+        stats=stats,
+    )
+
+
+# ============================================================
+# VERSIONS
+# ============================================================
+
+def save(store: ScenarioStore, calibration: Calibration, note: str = "") -> int:
+    """Store ``calibration`` as the next version; returns its number."""
+    return store.save_calibration(calibration.assumptions, calibration.to_json(), note)
+
+
+def latest_calibration(store: ScenarioStore) -> tuple[int, Calibration] | None:
+    """The newest stored version and its calibration, or None before the first fit."""
+    record = store.load_calibration()
+    return None if record is None else (record.version, Calibration.from_json(record.state, record.assumptions))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Fit baseline assumptions from job and expense ledgers.")
+    parser.add_argument("ledgers", nargs="*", help="CSV or Parquet ledgers (kind detected from their columns)")
+    parser.add_argument("--append", action="store_true",
+                        help="fold the ledgers into the latest stored calibration instead of starting afresh")
+    parser.add_argument("--list", action="store_true", help="list stored calibrations")
+    parser.add_argument("--dry-run", action="store_true", help="fit and print without storing a new version")
+    parser.add_argument("--note", default="")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--store", default=DEFAULT_PATH, help=f"store file (default: {DEFAULT_PATH})")
+    args = parser.parse_args(argv)
+
+    store = ScenarioStore(args.store)
+    if args.list:
+        for record in store.calibrations():
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(record.created))
+            c = Calibration.from_json(record.state, record.assumptions)
+            print(f"v{record.version:<4} {stamp}  {c.first_month}..{c.last_month}  {c.jobs:>9,} jobs  {record.note}")
+        return
+    if not args.ledgers:
+        parser.error("give at least one ledger, or --list")
+
+    stats = LedgerStats()
+    if args.append:
+        previous = latest_calibration(store)
+        if previous is None:
+            parser.error("nothing to append to: no calibration stored yet")
+        stats = previous[1].stats
+    began = time.perf_counter()
+    try:
+        for path in args.ledgers:
+            rows = stats.fold_file(path, args.chunk_rows)
+            print(f"{path}: {rows:,} rows")
+        calibration = fit(stats)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    print(f"{stats.rows:,} rows over {calibration.first_month}..{calibration.last_month} "
+          f"in {time.perf_counter() - began:.1f}s")
+    for name in CALIBRATED_FIELDS:
+        value = getattr(calibration.assumptions, name)
+        if name not in calibration.fitted:
+            spread = "(default: too little history)"
+        else:
+            spread = f"± {calibration.std_devs[name]:,.4g}" if name in calibration.std_devs else ""
+        print(f"  {name:<16} {value:>14,.4g} {spread}")
+    if not args.dry_run:
+        print(f"stored as version {save(store, calibration, args.note)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Headless entry point: evaluate assumption files without the dashboard.
+
+Reads one or many scenarios per file from YAML, JSON or CSV (or stdin) and
+prints or writes NPV, IRR, payback and breakeven for each. Only NumPy and
+the engine load up front; YAML and Parquet support are imported on first
+use, so a cold start costs a fraction of a Streamlit boot.
+
+A JSON or YAML file holds one mapping of assumptions or a list of them; a
+CSV file has one scenario per row with assumption names as headers. Fields
+use the :class:`~model.engine.Assumptions` names and units (percentages as
+fractions); missing fields take the model defaults, and an optional
+``name`` labels each scenario. Usage from the repository root::
+
+    python -m model scenarios.csv
+    python -m model cases/*.yaml --output results.csv
+    cat case.json | python -m model - --format json
+"""
+
+import argparse
+import csv
+import io
+import json
+import math
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+from model.batch import DEFAULT_CHUNK_SIZE, AssumptionBatch, run_batch
+from model.engine import ASSUMPTION_FIELDS, Assumptions
+
+INPUT_FORMATS = {".json": "json", ".yaml": "yaml", ".yml": "yaml", ".csv": "csv"}
+OUTPUT_FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".parquet": "parquet"}
+METRICS = ("baseline_npv", "robotics_npv", "robotics_irr", "robotics_payback", "breakeven_year",
+           "cumulative_advantage")
+LABEL_FIELD = "name"
+COLUMNS = ("source", "row", LABEL_FIELD) + METRICS
+
+
+# ============================================================
+# INPUT
+# ============================================================
+
+def _records(text: str, fmt: str) -> list[dict]:
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+    if fmt == "yaml":
+        try:
+            import yaml
+        except ImportError as exc:
+            raise ValueError("YAML input needs PyYAML: pip install pyyaml") from exc
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list) or not all(isinstance(record, dict) for record in data):
+        raise ValueError("expected a mapping of assumptions or a list of them")
+    return data
+
+
+def load_scenarios(path: str, fmt: str | None = None) -> tuple[list[str], AssumptionBatch]:
+    """Scenario labels and assumptions from ``path`` (``-`` reads stdin)."""
+    if fmt is None:
+        fmt = INPUT_FORMATS.get(Path(path).suffix.lower())
+        if fmt is None:
+            raise ValueError(f"cannot tell the format of {path}; pass --input-format")
+    text = sys.stdin.read() if path == "-" else Path(path).read_text()
+    records = _records(text, fmt)
+    if not records:
+        raise ValueError("no scenarios found")
+
+    unknown = set().union(*records) - set(ASSUMPTION_FIELDS) - {LABEL_FIELD}
+    if unknown:
+        raise ValueError(f"unknown assumption fields: {', '.join(sorted(unknown))}")
+    defaults = Assumptions()
+    columns = {}
+    for name in ASSUMPTION_FIELDS:
+        values = [record.get(name) for record in records]
+        if any(value not in (None, "") for value in values):
+            fallback = getattr(defaults, name)
+            columns[name] = np.array([fallback if value in (None, "") else float(value) for value in values])
+    labels = [str(record.get(LABEL_FIELD) or "") for record in records]
+    return labels, AssumptionBatch(columns) if columns else AssumptionBatch.from_data(defaults)
+
+
+def _evaluate_files(loaded: list[tuple[str, list[str], AssumptionBatch]], overrides: dict) -> Iterator[dict]:
+    columns = {name: np.concatenate([getattr(batch, name) for _, _, batch in loaded]) for name in ASSUMPTION_FIELDS}
+    result = run_batch({**columns, **overrides})
+    metrics = {name: getattr(result, name).tolist() for name in METRICS}
+    i = 0
+    for path, labels, _ in loaded:
+        for row, label in enumerate(labels):
+            yield {"source": path, "row": row, LABEL_FIELD: label, **{name: metrics[name][i] for name in METRICS}}
+            i += 1
+
+
+def evaluate(paths: list[str], fmt: str | None = None, overrides: dict | None = None,
+             errors: list[str] | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """One result record per scenario across ``paths``, in input order.
+
+    Small files are pooled into one engine call of up to ``chunk_size`` rows,
+    so thousands of one-scenario files cost about as much as one big file.
+    Unreadable files raise ``ValueError``, unless an ``errors`` list is
+    given: then they are reported on stderr, appended to it and skipped.
+    """
+    loaded, rows = [], 0
+    for path in paths:
+        try:
+            labels, batch = load_scenarios(path, fmt)
+        except (OSError, ValueError) as exc:
+            if errors is None:
+                raise ValueError(f"{path}: {exc}") from exc
+            print(f"skipping {path}: {exc}", file=sys.stderr)
+            errors.append(path)
+            continue
+        loaded.append((path, labels, batch))
+        rows += len(batch)
+        if rows >= chunk_size:
+            yield from _evaluate_files(loaded, overrides or {})
+            loaded, rows = [], 0
+    if loaded:
+        yield from _evaluate_files(loaded, overrides or {})
+
+
+# ============================================================
+# OUTPUT
+# ============================================================
+
+def _finite(value):
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _table_line(record: dict) -> str:
+    def money(value):
+        return "—" if math.isnan(value) else f"${value:,.0f}"
+
+    def years(value):
+        return "never" if math.isnan(value) else f"{value:.2f}"
+
+    irr = "N/A" if math.isnan(record["robotics_irr"]) else f"{record['robotics_irr']:.1%}"
+    label = record[LABEL_FIELD] or f"{record['source']}#{record['row']}"
+    return (f"{label[:32]:<32} {money(record['baseline_npv']):>15} {money(record['robotics_npv']):>15} "
+            f"{irr:>9} {years(record['robotics_payback']):>8} {years(record['breakeven_year']):>9}")
+
+
+def write_records(records: Iterator[dict], fmt: str, stream) -> int:
+    """Write ``records`` to a text ``stream`` as they arrive; returns how many were written."""
+    count = 0
+    if fmt == "table":
+        print(f"{'scenario':<32} {'baseline NPV':>15} {'robotics NPV':>15} {'IRR':>9} {'payback':>8} "
+              f"{'breakeven':>9}", file=stream)
+    elif fmt == "csv":
+        writer = csv.DictWriter(stream, COLUMNS)
+        writer.writeheader()
+    elif fmt == "json":
+        stream.write("[")
+    for record in records:
+        if fmt == "table":
+            print(_table_line(record), file=stream)
+        elif fmt == "csv":
+            writer.writerow({k: "" if _finite(v) is None else v for k, v in record.items()})
+        elif fmt == "json":
+            stream.write(("," if count else "") + "\n  " + json.dumps({k: _finite(v) for k, v in record.items()}))
+        else:
+            stream.write(json.dumps({k: _finite(v) for k, v in record.items()}) + "\n")
+        count += 1
+    if fmt == "json":
+        stream.write("\n]\n")
+    return count
+
+
+def _parquet_chunks(records: Iterator[dict], chunk_size: int = 65_536) -> Iterator[dict]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield {name: np.array([r[name] for r in chunk]) for name in COLUMNS}
+            chunk = []
+    if chunk:
+        yield {name: np.array([r[name] for r in chunk]) for name in COLUMNS}
+
+
+def _parse_setting(text: str) -> tuple[str, float]:
+    """One ``NAME=VALUE`` input override, as the command-line tools' ``--set`` and ``--change`` take it."""
+    name, _, value = text.partition("=")
+    if name not in ASSUMPTION_FIELDS or not value:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE with NAME one of {', '.join(ASSUMPTION_FIELDS)}")
+    return name, float(value)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m model", description="Evaluate assumption files headlessly.")
+    parser.add_argument("inputs", nargs="+", help="YAML, JSON or CSV files; - reads stdin")
+    parser.add_argument("--input-format", choices=sorted(set(INPUT_FORMATS.values())),
+                        help="format of every input (default: from the file suffix)")
+    parser.add_argument("--set", action="append", type=_parse_setting, default=[], metavar="NAME=VALUE",
+                        help="override one input for every scenario; repeatable")
+    parser.add_argument("--output", help="write here instead of stdout (.csv, .json, .jsonl or .parquet)")
+    parser.add_argument("--format", choices=("table", "csv", "json", "jsonl"),
+                        help="stdout format (default: table)")
+    parser.add_argument("--keep-going", action="store_true", help="skip unreadable files instead of stopping")
+    args = parser.parse_args(argv)
+
+    if args.input_format is None and "-" in args.inputs:
+        parser.error("reading stdin needs --input-format")
+    fmt = args.format or "table"
+    if args.output:
+        fmt = args.format or OUTPUT_FORMATS.get(Path(args.output).suffix.lower())
+        if fmt is None:
+            parser.error(f"cannot tell the format of {args.output}; pass --format")
+    skipped = [] if args.keep_going else None
+    records = evaluate(args.inputs, args.input_format, dict(args.set), skipped)
+
+    try:
+        if fmt == "parquet":
+            from model.export import write_table
+
+            count = write_table(_parquet_chunks(records), args.output, fmt="parquet")
+        elif args.output:
+            with open(args.output, "w", newline="") as stream:
+                count = write_records(records, fmt, stream)
+        else:
+            count = write_records(records, fmt, sys.stdout)
+    except ValueError as exc:
+        parser.error(str(exc))
+    if args.output:
+        print(f"wrote {count:,} scenarios to {args.output}", file=sys.stderr)
+    return 1 if skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Pure, vectorized cash-flow engine for the AU-E financial model.
+
+Nothing in here imports Streamlit, so the model can be run, tested and
+benchmarked outside the dashboard. Every helper operates along the last axis
+of its input, which lets the batched paths reuse the same code.
+"""
+
+import threading
+from dataclasses import dataclass, fields, replace
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from model.graph import ModelGraph
+    from model.periods import PeriodGrid
+
+HORIZON_YEARS = 5
+YEARS = np.arange(0, HORIZON_YEARS + 1)
+
+
+@dataclass(frozen=True)
+class Assumptions:
+    """One full set of model inputs (percentages stored as fractions)."""
+
+    baseline_jobs: float = 40
+    baseline_rev: float = 150_000
+    baseline_exp: float = 20_000
+    baseline_shrink: float = -0.05
+    stage1_cost: float = 150_000
+    stage1_duration: float = 0.5
+    stage2_cost: float = 400_000
+    stage2_duration: float = 1.5
+    uplift1: float = 0.05
+    uplift2: float = 0.20
+    rev_growth: float = 0.02
+    exp_reduction: float = 0.10
+    discount_rate: float = 0.08
+
+    def replace(self, **changes) -> "Assumptions":
+        """Return a copy with the given fields changed."""
+        return replace(self, **changes)
+
+    @property
+    def total_investment(self) -> float:
+        return self.stage1_cost + self.stage2_cost
+
+
+ASSUMPTION_FIELDS = tuple(f.name for f in fields(Assumptions))
+
+
+@dataclass(frozen=True)
+class ModelResult:
+    """Cash flows and headline metrics for one assumption set."""
+
+    assumptions: Assumptions
+    years: np.ndarray
+    baseline_cf: np.ndarray
+    robotics_cf: np.ndarray
+    robotics_cf_for_irr: np.ndarray
+    baseline_npv: float
+    robotics_npv: float
+    robotics_irr: float | None
+    robotics_payback: float | None
+    breakeven_year: float | None
+    cumulative_advantage: float
+    grid: "PeriodGrid | None" = None
+
+    def annual_cash_flows(self) -> tuple[np.ndarray, np.ndarray]:
+        """``(baseline, robotics)`` flow totals per model year, whatever the grid."""
+        if self.grid is None:
+            return self.baseline_cf, self.robotics_cf
+        from model.periods import annual_totals
+
+        return annual_totals(self.baseline_cf, self.grid), annual_totals(self.robotics_cf, self.grid)
+
+
+# ============================================================
+# CASH FLOWS
+# ============================================================
+
+def _col(value):
+    """Lift a scalar or 1-D input so it broadcasts against the year axis."""
+    return np.asarray(value, dtype=float)[..., np.newaxis]
+
+
+def baseline_cash_flow(a: Assumptions, years: np.ndarray = YEARS) -> np.ndarray:
+    """Baseline flows: a shrinking book of jobs at a constant margin."""
+    jobs = _col(a.baseline_jobs) * (1 + _col(a.baseline_shrink)) ** years
+    return jobs * (_col(a.baseline_rev) - _col(a.baseline_exp))
+
+
+def robotics_jobs(a: Assumptions, years: np.ndarray = YEARS) -> np.ndarray:
+    """Jobs per year once Stage 1 and Stage 2 uplifts kick in."""
+    uplift = np.where(
+        years < _col(a.stage1_duration),
+        0.0,
+        np.where(years < _col(a.stage2_duration), _col(a.uplift1), _col(a.uplift1) + _col(a.uplift2)),
+    )
+    return _col(a.baseline_jobs) * (1 + uplift)
+
+
+def development_cost(a: Assumptions, years: np.ndarray = YEARS) -> np.ndarray:
+    """Stage costs spread evenly over each stage's duration."""
+    stage1 = np.where(years < _col(a.stage1_duration), _col(a.stage1_cost) / _col(a.stage1_duration), 0.0)
+    stage2 = np.where(years < _col(a.stage2_duration), _col(a.stage2_cost) / _col(a.stage2_duration), 0.0)
+    return stage1 + stage2
+
+
+def robotics_revenue(a: Assumptions, jobs: np.ndarray, years: np.ndarray = YEARS) -> np.ndarray:
+    """Revenue from ``jobs`` per year at the growing robotics price."""
+    return jobs * _col(a.baseline_rev) * (1 + _col(a.rev_growth)) ** years
+
+
+def robotics_expenses(a: Assumptions, jobs: np.ndarray) -> np.ndarray:
+    """Job expenses for ``jobs`` per year after the robotics reduction."""
+    return jobs * _col(a.baseline_exp) * (1 - _col(a.exp_reduction))
+
+
+def robotics_cash_flow(a: Assumptions, years: np.ndarray = YEARS, jobs: np.ndarray | None = None) -> np.ndarray:
+    """Robotics flows net of development spend.
+
+    ``jobs`` overrides the uplift-driven job counts per year, e.g. with the
+    capacity-limited counts from :mod:`model.fleet`.
+    """
+    if jobs is None:
+        jobs = robotics_jobs(a, years)
+    return robotics_revenue(a, jobs, years) - robotics_expenses(a, jobs) - development_cost(a, years)
+
+
+def with_investment(robotics_cf: np.ndarray, a: Assumptions) -> np.ndarray:
+    """Prepend the upfront investment as a year -1 outflow for IRR."""
+    investment = -(_col(a.stage1_cost) + _col(a.stage2_cost))
+    investment = np.broadcast_to(investment, robotics_cf.shape[:-1] + (1,))
+    return np.concatenate([investment, robotics_cf], axis=-1)
+
+
+def robotics_cash_flow_with_investment(a: Assumptions, years: np.ndarray = YEARS) -> np.ndarray:
+    """Cash flow for robotics including upfront investment impact."""
+    return with_investment(robotics_cash_flow(a, years), a)
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+def npv(cashflows: np.ndarray, rate, years: np.ndarray = YEARS) -> np.ndarray:
+    """Discounted sum of flows along the last axis."""
+    return np.sum(cashflows / (1 + _col(rate)) ** years, axis=-1)
+
+
+def first_crossing(diff: np.ndarray, strict: bool = False) -> np.ndarray:
+    """Interpolated index where ``diff`` first turns non-negative, NaN if never.
+
+    With ``strict`` the crossing requires ``diff > 0`` instead.
+    """
+    diff = np.asarray(diff, dtype=float)
+    hit = diff > 0 if strict else diff >= 0
+    found = hit.any(axis=-1)
+    i = np.argmax(hit, axis=-1)
+    prev_i = np.maximum(i - 1, 0)
+    cur = np.take_along_axis(diff, i[..., np.newaxis], axis=-1)[..., 0]
+    prev = np.take_along_axis(diff, prev_i[..., np.newaxis], axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing = np.where(i == 0, 0.0, i - 1 + (-prev) / (cur - prev))
+    return np.where(found, crossing, np.nan)
+
+
+def payback_period(cashflows: np.ndarray) -> np.ndarray:
+    """Years until cumulative flows are recovered, NaN if never."""
+    return first_crossing(np.cumsum(cashflows, axis=-1))
+
+
+def breakeven_year(baseline_cf: np.ndarray, robotics_cf: np.ndarray) -> np.ndarray:
+    """First (interpolated) year robotics cumulative CF exceeds baseline, NaN if never."""
+    gap = np.cumsum(robotics_cf, axis=-1) - np.cumsum(baseline_cf, axis=-1)
+    return first_crossing(gap, strict=True)
+
+
+def cumulative_advantage(baseline_cf: np.ndarray, robotics_cf: np.ndarray) -> np.ndarray:
+    """Total cumulative advantage by end of period."""
+    return np.sum(robotics_cf, axis=-1) - np.sum(baseline_cf, axis=-1)
+
+
+def calculate_irr(cashflows: np.ndarray) -> float | None:
+    """IRR of a single cash-flow vector, or None when it is undefined."""
+    from model.irr import irr_batch
+
+    return _optional(irr_batch(cashflows).rate[0])
+
+
+def _optional(value) -> float | None:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+_graphs = threading.local()
+
+
+def thread_graph() -> "ModelGraph":
+    """This thread's model graph, which ``run_model`` reuses between calls."""
+    graph = getattr(_graphs, "graph", None)
+    if graph is None:
+        from model.graph import ModelGraph
+
+        graph = _graphs.graph = ModelGraph()
+    return graph
+
+
+def run_model(a: Assumptions, grid: "PeriodGrid | None" = None, graph: "ModelGraph | None" = None) -> ModelResult:
+    """Compute flows and every headline metric for ``a`` in one pass.
+
+    Uses the classic annual points unless a finer ``grid`` is given (see
+    :mod:`model.periods`). Annual runs evaluate on ``graph``, by default this
+    thread's, so a call after a one-input change recomputes only the nodes
+    downstream of it. Pass a graph to carry values across threads that take
+    turns, such as one session's reruns.
+    """
+    if grid is not None:
+        from model.periods import run_period_model
+
+        return run_period_model(a, grid)
+    values = (graph or thread_graph()).evaluate(a)
+    return ModelResult(
+        assumptions=a,
+        years=YEARS,
+        baseline_cf=values["baseline_cf"],
+        robotics_cf=values["robotics_cf"],
+        robotics_cf_for_irr=values["robotics_cf_for_irr"],
+        baseline_npv=float(values["baseline_npv"]),
+        robotics_npv=float(values["robotics_npv"]),
+        robotics_irr=_optional(values["robotics_irr"]),
+        robotics_payback=_optional(values["robotics_payback"]),
+        breakeven_year=_optional(values["breakeven_year"]),
+        cumulative_advantage=float(values["cumulative_advantage"]),
+    )
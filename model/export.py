@@ -0,0 +1,401 @@
+"""Exports for finance tooling: streamed Parquet/Arrow tables and Excel workbooks.
+
+Tables are written one chunk at a time, each chunk its own Parquet row group
+or Arrow IPC record batch, so memory stays bounded by the chunk size however
+many scenarios are exported. Sweep grids are decoded per chunk rather than
+materialized, and finished sweeps are read straight from their memory-mapped
+outputs. pyarrow is only needed for tables.
+
+Workbooks hold one scenario with live formulas that mirror the annual
+engine, so finance can change an input cell and watch the flows, NPV, IRR,
+payback and breakeven follow. They are plain SpreadsheetML written with the
+standard library.
+
+Usage from the repository root::
+
+    python -m model.export table grid.parquet --axis uplift1=0:1:101 --axis uplift2=0:2:101
+    python -m model.export sweep sweeps/board board.parquet
+    python -m model.export workbook scenario.xlsx --scenario "Board case"
+"""
+
+import argparse
+import io
+import os
+import zipfile
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import asdict
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from model.batch import DEFAULT_CHUNK_SIZE, AssumptionBatch, run_batch
+from model.cli import _parse_setting
+from model.engine import (
+    ASSUMPTION_FIELDS,
+    YEARS,
+    Assumptions,
+    development_cost,
+    robotics_jobs,
+    run_model,
+)
+from model.montecarlo import MonteCarloResult
+from model.sweep import OUTPUTS, SweepSpec, _parse_axis, load_results
+
+TABLE_FORMATS = {".parquet": "parquet", ".pq": "parquet", ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow"}
+METRICS = ("baseline_npv", "robotics_npv", "robotics_irr", "robotics_payback", "breakeven_year",
+           "cumulative_advantage")
+
+
+# ============================================================
+# TABLES
+# ============================================================
+
+def _arrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError("Parquet/Arrow export needs pyarrow: pip install pyarrow") from exc
+    return pyarrow
+
+
+def _flatten(chunk: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Split (N, T) flow arrays into one ``<name>_y<t>`` column per year."""
+    columns = {}
+    for name, values in chunk.items():
+        values = np.asarray(values)
+        if values.ndim == 2:
+            columns.update({f"{name}_y{t}": values[:, t] for t in range(values.shape[1])})
+        else:
+            columns[name] = values
+    return columns
+
+
+def write_table(chunks: Iterable[Mapping[str, np.ndarray]], path, fmt: str | None = None,
+                compression: str = "zstd") -> int:
+    """Stream ``chunks`` of equal-length columns to Parquet or Arrow IPC; returns rows written.
+
+    ``path`` may be a file name (its suffix picks the format unless ``fmt``
+    is given) or a writable binary file. Only one chunk is held at a time.
+    """
+    pa = _arrow()
+    if fmt is None:
+        fmt = TABLE_FORMATS.get(Path(path).suffix.lower()) if isinstance(path, (str, os.PathLike)) else None
+    if fmt not in ("parquet", "arrow"):
+        raise ValueError(f"Unknown table format for {path!r}; use one of {sorted(TABLE_FORMATS)}")
+
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            batch = pa.RecordBatch.from_pydict(_flatten(chunk))
+            if writer is None:
+                if fmt == "parquet":
+                    import pyarrow.parquet as pq
+
+                    writer = pq.ParquetWriter(path, batch.schema, compression=compression)
+                else:
+                    writer = pa.ipc.new_file(path, batch.schema)
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=batch.num_rows)
+            else:
+                writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("Nothing to export")
+    return rows
+
+
+def scenario_chunks(source, chunk_size: int = DEFAULT_CHUNK_SIZE, flows: bool = True,
+                    years: np.ndarray = YEARS) -> Iterator[dict[str, np.ndarray]]:
+    """Inputs and engine outputs per chunk of ``source``: a SweepSpec or any batch data."""
+    if isinstance(source, SweepSpec):
+        size, rows = source.size, source.rows
+    else:
+        batch = AssumptionBatch.from_data(source)
+        size, rows = len(batch), lambda start, stop: batch[start:stop]
+    for start in range(0, size, chunk_size):
+        stop = min(start + chunk_size, size)
+        inputs = rows(start, stop)
+        result = run_batch(inputs, chunk_size, years)
+        chunk = {"scenario": np.arange(start, stop)}
+        chunk.update({name: getattr(inputs, name) for name in ASSUMPTION_FIELDS})
+        chunk.update({name: getattr(result, name) for name in METRICS})
+        if flows:
+            chunk["baseline_cf"] = result.baseline_cf
+            chunk["robotics_cf"] = result.robotics_cf
+        yield chunk
+
+
+def sweep_chunks(out_dir: str | os.PathLike, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict[str, np.ndarray]]:
+    """Inputs and stored outputs of a finished sweep, without recomputing it."""
+    spec, outputs = load_results(out_dir)
+    for start in range(0, spec.size, chunk_size):
+        stop = min(start + chunk_size, spec.size)
+        inputs = spec.rows(start, stop)
+        chunk = {"scenario": np.arange(start, stop)}
+        chunk.update({name: getattr(inputs, name) for name in ASSUMPTION_FIELDS})
+        chunk.update({name: np.asarray(outputs[name][start:stop]) for name in OUTPUTS})
+        yield chunk
+
+
+def draw_chunks(result: MonteCarloResult, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict[str, np.ndarray]]:
+    """Per-draw metrics and robotics flows of a Monte Carlo run."""
+    n = len(result.robotics_npv)
+    for start in range(0, n, chunk_size):
+        rows = slice(start, min(start + chunk_size, n))
+        yield {
+            "draw": np.arange(rows.start, rows.stop),
+            "baseline_npv": result.baseline_npv[rows],
+            "robotics_npv": result.robotics_npv[rows],
+            "robotics_irr": result.robotics_irr[rows],
+            "robotics_cf": result.robotics_cf[rows],
+        }
+
+
+def export_scenarios(source, path, chunk_size: int = DEFAULT_CHUNK_SIZE, flows: bool = True) -> int:
+    """Evaluate ``source`` chunk by chunk and stream inputs, metrics and flows to ``path``."""
+    return write_table(scenario_chunks(source, chunk_size, flows), path)
+
+
+def export_sweep(out_dir: str | os.PathLike, path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Stream a finished sweep's inputs and outputs to ``path``."""
+    return write_table(sweep_chunks(out_dir, chunk_size), path)
+
+
+# ============================================================
+# WORKBOOKS
+# ============================================================
+
+# Style indices into _STYLES below.
+_TEXT, _BOLD, _MONEY, _PERCENT, _DECIMAL, _YEARS = range(6)
+_STYLES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">
+<numFmts count="2"><numFmt numFmtId="164" formatCode="&quot;$&quot;#,##0"/>\
+<numFmt numFmtId="165" formatCode="0.00 &quot;yrs&quot;"/></numFmts>
+<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font><font><b/><sz val="11"/><name val="Calibri"/></font></fonts>
+<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>
+<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>
+<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>
+<cellXfs count="6"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>\
+<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>\
+<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="10" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>\
+<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>
+</styleSheet>"""
+
+_INPUT_STYLES = {
+    "baseline_jobs": _DECIMAL,
+    "stage1_duration": _YEARS,
+    "stage2_duration": _YEARS,
+    **dict.fromkeys(("baseline_rev", "baseline_exp", "stage1_cost", "stage2_cost"), _MONEY),
+    **dict.fromkeys(("baseline_shrink", "uplift1", "uplift2", "rev_growth", "exp_reduction", "discount_rate"),
+                    _PERCENT),
+}
+
+# Flow table columns: header, style and formula for year row ``r``. Inputs
+# are referenced by their defined names, which match the Assumptions fields.
+_FLOW_COLUMNS = (
+    ("Year", _TEXT, None),
+    ("Baseline jobs", _DECIMAL, "baseline_jobs*(1+baseline_shrink)^A{r}"),
+    ("Baseline CF", _MONEY, "B{r}*(baseline_rev-baseline_exp)"),
+    ("Uplift", _PERCENT, "IF(A{r}<stage1_duration,0,IF(A{r}<stage2_duration,uplift1,uplift1+uplift2))"),
+    ("Robotics jobs", _DECIMAL, "baseline_jobs*(1+D{r})"),
+    ("Development cost", _MONEY,
+     "IF(A{r}<stage1_duration,stage1_cost/stage1_duration,0)+IF(A{r}<stage2_duration,stage2_cost/stage2_duration,0)"),
+    ("Robotics CF", _MONEY, "E{r}*baseline_rev*(1+rev_growth)^A{r}-E{r}*baseline_exp*(1-exp_reduction)-F{r}"),
+    ("Cumulative robotics CF", _MONEY, "SUM(G${first}:G{r})"),
+    ("Cumulative advantage", _MONEY, "SUM(G${first}:G{r})-SUM(C${first}:C{r})"),
+    ("IRR flows", _MONEY, "G{r}"),
+)
+
+
+def _col_letter(index: int) -> str:
+    return chr(ord("A") + index)
+
+
+def _cell(ref: str, value=None, formula: str | None = None, style: int = _TEXT) -> str:
+    """One ``<c>``; formulas carry ``value`` as their cached result."""
+    attrs = f' r="{ref}"' + (f' s="{style}"' if style else "")
+    if formula is None and isinstance(value, str):
+        return f'<c{attrs} t="inlineStr"><is><t>{escape(value)}</t></is></c>'
+    body = f"<f>{escape(formula)}</f>" if formula else ""
+    if isinstance(value, str):
+        return f'<c{attrs} t="str">{body}<v>{escape(value)}</v></c>'
+    if value is not None and np.isfinite(value):
+        body += f"<v>{float(value)!r}</v>"
+    return f"<c{attrs}>{body}</c>"
+
+
+def _sheet(rows: list[list[str]], widths: Iterable[float]) -> str:
+    cols = "".join(f'<col min="{i}" max="{i}" width="{w}" customWidth="1"/>' for i, w in enumerate(widths, 1))
+    data = "".join(f'<row r="{i}">{"".join(cells)}</row>' for i, cells in enumerate(rows, 1))
+    return ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+            f"<cols>{cols}</cols><sheetData>{data}</sheetData></worksheet>")
+
+
+def _crossing_formula(column: str, first: int, last: int, op: str) -> str:
+    """Interpolated year where ``column`` first satisfies ``op 0``, like ``first_crossing``."""
+    rng = f"${column}${first}:${column}${last}"
+    years = f"$A${first}:$A${last}"
+    k = f"MATCH(TRUE,INDEX({rng}{op}0,0),0)"
+    prev, cur = f"INDEX({rng},{k}-1)", f"INDEX({rng},{k})"
+    return f'IFERROR(IF({k}=1,INDEX({years},1),INDEX({years},{k}-1)+(-{prev})/({cur}-{prev})),"Never")'
+
+
+def _inputs_sheet(a: Assumptions) -> str:
+    rows = [[_cell("A1", "Input", style=_BOLD), _cell("B1", "Value", style=_BOLD)]]
+    for i, (name, value) in enumerate(asdict(a).items(), 2):
+        rows.append([_cell(f"A{i}", name), _cell(f"B{i}", value, style=_INPUT_STYLES[name])])
+    rows.append([])
+    rows.append([_cell(f"A{len(rows) + 1}", "Edit the values in column B; the Model sheet recalculates.")])
+    return _sheet(rows, (22, 16))
+
+
+def _model_sheet(a: Assumptions) -> str:
+    result = run_model(a)
+    years = result.years
+    first = 3  # row 2 holds the year -1 investment used by IRR
+    last = first + len(years) - 1
+    jobs = robotics_jobs(a, years)
+    cached = (years, a.baseline_jobs * (1 + a.baseline_shrink) ** years, result.baseline_cf,
+              jobs / a.baseline_jobs - 1, jobs, development_cost(a, years), result.robotics_cf, np.cumsum(result.robotics_cf),
+              np.cumsum(result.robotics_cf) - np.cumsum(result.baseline_cf), result.robotics_cf)
+
+    rows = [[_cell(f"{_col_letter(j)}1", header, style=_BOLD) for j, (header, _, _) in enumerate(_FLOW_COLUMNS)]]
+    rows.append([_cell("A2", -1), _cell("J2", -a.total_investment, "-(stage1_cost+stage2_cost)", _MONEY)])
+    for t in range(len(years)):
+        r = first + t
+        rows.append([
+            _cell(f"{_col_letter(j)}{r}", values[t], formula and formula.format(r=r, first=first), style)
+            for j, ((_, style, formula), values) in enumerate(zip(_FLOW_COLUMNS, cached))
+        ])
+
+    # Excel's NPV discounts its first value by one period; year 0 is undiscounted.
+    later = first + 1
+    metrics = (
+        ("Baseline NPV", result.baseline_npv, f"$C${first}+NPV(discount_rate,$C${later}:$C${last})", _MONEY),
+        ("Robotics NPV", result.robotics_npv, f"$G${first}+NPV(discount_rate,$G${later}:$G${last})", _MONEY),
+        ("Robotics IRR", "N/A" if result.robotics_irr is None else result.robotics_irr,
+         f'IFERROR(IRR($J$2:$J${last}),"N/A")', _PERCENT),
+        ("Robotics payback", "Never" if result.robotics_payback is None else result.robotics_payback,
+         _crossing_formula("H", first, last, ">="), _YEARS),
+        ("Breakeven vs baseline", "Never" if result.breakeven_year is None else result.breakeven_year,
+         _crossing_formula("I", first, last, ">"), _YEARS),
+        ("Cumulative advantage", result.cumulative_advantage,
+         f"SUM($G${first}:$G${last})-SUM($C${first}:$C${last})", _MONEY),
+    )
+    rows.append([])
+    rows.append([_cell(f"A{len(rows) + 1}", "Metric", style=_BOLD), _cell(f"B{len(rows) + 1}", "Value", style=_BOLD)])
+    for label, value, formula, style in metrics:
+        r = len(rows) + 1
+        rows.append([_cell(f"A{r}", label), _cell(f"B{r}", value, formula, style)])
+    return _sheet(rows, (22, 16, 16, 10, 14, 18, 16, 22, 22, 14))
+
+
+def write_workbook(a: Assumptions, path) -> None:
+    """Excel workbook of the annual model for ``a``, with live formulas.
+
+    ``path`` may be a file name or a writable binary file.
+    """
+    names = "".join(
+        f'<definedName name="{name}">Inputs!$B${i}</definedName>' for i, name in enumerate(ASSUMPTION_FIELDS, 2)
+    )
+    workbook = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Model" sheetId="1" r:id="rId1"/><sheet name="Inputs" sheetId="2" r:id="rId2"/></sheets>'
+        f'<definedNames>{names}</definedNames><calcPr calcId="191029" fullCalcOnLoad="1"/></workbook>'
+    )
+    rel = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    workbook_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{rel}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{rel}/worksheet" Target="worksheets/sheet2.xml"/>'
+        f'<Relationship Id="rId3" Type="{rel}/styles" Target="styles.xml"/></Relationships>'
+    )
+    sheet_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        f'<Override PartName="/xl/worksheets/sheet1.xml" ContentType="{sheet_type}"/>'
+        f'<Override PartName="/xl/worksheets/sheet2.xml" ContentType="{sheet_type}"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/></Types>'
+    )
+    root_rels = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{rel}/officeDocument" Target="xl/workbook.xml"/></Relationships>'
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as xlsx:
+        xlsx.writestr("[Content_Types].xml", content_types)
+        xlsx.writestr("_rels/.rels", root_rels)
+        xlsx.writestr("xl/workbook.xml", workbook)
+        xlsx.writestr("xl/_rels/workbook.xml.rels", workbook_rels)
+        xlsx.writestr("xl/styles.xml", _STYLES)
+        xlsx.writestr("xl/worksheets/sheet1.xml", _model_sheet(a))
+        xlsx.writestr("xl/worksheets/sheet2.xml", _inputs_sheet(a))
+
+
+def workbook_bytes(a: Assumptions) -> bytes:
+    buffer = io.BytesIO()
+    write_workbook(a, buffer)
+    return buffer.getvalue()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Export model results for spreadsheets and data tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    table = commands.add_parser("table", help="evaluate a scenario grid and stream it to Parquet/Arrow")
+    table.add_argument("path", help="output file (.parquet or .arrow)")
+    table.add_argument("--axis", action="append", type=_parse_axis, default=[], metavar="NAME=VALUES",
+                       help="grid axis as name=start:stop:num or name=v1,v2,...; repeatable")
+    table.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    table.add_argument("--no-flows", action="store_true", help="leave out the per-year cash flows")
+    sweep = commands.add_parser("sweep", help="stream a finished sweep directory to Parquet/Arrow")
+    sweep.add_argument("out_dir")
+    sweep.add_argument("path", help="output file (.parquet or .arrow)")
+    sweep.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    workbook = commands.add_parser("workbook", help="Excel workbook of one scenario with live formulas")
+    workbook.add_argument("path", help="output .xlsx file")
+    workbook.add_argument("--scenario", help="saved scenario to export (default: model defaults)")
+    workbook.add_argument("--set", action="append", type=_parse_setting, default=[], metavar="NAME=VALUE",
+                          help="override one input; repeatable")
+    args = parser.parse_args(argv)
+
+    if args.command == "workbook":
+        a = Assumptions()
+        if args.scenario:
+            from model.store import ScenarioStore
+
+            a = ScenarioStore().load_scenario(args.scenario)
+            if a is None:
+                parser.error(f"no scenario named {args.scenario!r}")
+        write_workbook(a.replace(**dict(args.set)), args.path)
+        print(f"wrote {args.path}")
+        return
+    try:
+        if args.command == "table":
+            source = SweepSpec.from_axes(**dict(args.axis))
+            rows = export_scenarios(source, args.path, args.chunk_size, flows=not args.no_flows)
+        else:
+            rows = export_sweep(args.out_dir, args.path, args.chunk_size)
+    except (ValueError, FileNotFoundError) as exc:
+        parser.error(str(exc))
+    print(f"wrote {rows:,} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
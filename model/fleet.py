@@ -0,0 +1,269 @@
+"""Discrete-event fleet simulator: how many jobs the crews can actually take.
+
+The cash-flow model assumes every job the uplift sliders promise gets done.
+Here furnace outages arrive as a Poisson process at that same rate, each
+open for a random window, and a finite pool of crews (joined by robotic
+units once Stage 1 completes) works through them in deadline order. A job
+whose outage closes before a crew can get there is lost. Realized jobs per
+year then go through the ordinary cash-flow functions, so the
+capacity-limited NPV sits directly beside the naive one.
+
+Replications are independent, so they are seeded per chunk and spread over
+processes. Usage from the repository root::
+
+    python -m model.fleet --replications 10000 --crews 3 --robots 2 --workers 8
+
+With ``--store`` the result is also saved to the scenario store, where the
+dashboard picks it up for the same scenario, spec and replication count. It
+is stored under :func:`simulation_inputs`, as the dashboard looks it up, so
+any discount rate is served from the one run.
+"""
+
+import argparse
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
+
+import numpy as np
+
+from model.cache import SharedCache
+from model.engine import ASSUMPTION_FIELDS, YEARS, Assumptions, npv, robotics_cash_flow, robotics_jobs, run_model
+from model.graph import assumptions_read
+from model.store import ScenarioStore
+
+DAYS_PER_YEAR = 365.0
+CHUNK_SIZE = 250
+# Jobs come from the cash-flow inputs; the discount rate only values the flows afterwards.
+SIMULATION_INPUTS = assumptions_read("baseline_cf", "robotics_cf")
+
+# Event kinds, ordered so a crew freed at the same instant as an arrival is
+# available to take it.
+_CREW_FREE, _ROBOTS_READY, _ARRIVAL = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class FleetSpec:
+    """Crew capacity and job logistics; durations are in days."""
+
+    crews: int = 3
+    robots: int = 2
+    job_days: float = 5.0
+    travel_days: float = 2.0
+    window_days: float = 14.0
+    stage1_speedup: float = 1.5
+    stage2_speedup: float = 2.5
+    travel_cost_per_day: float = 0.0
+
+    def __post_init__(self):
+        if self.crews < 1:
+            raise ValueError(f"crews must be at least 1, got {self.crews}")
+        if self.robots < 0:
+            raise ValueError(f"robots must be non-negative, got {self.robots}")
+
+
+@dataclass(frozen=True)
+class FleetResult:
+    """Per-replication, per-year job counts and the flows they produce."""
+
+    assumptions: Assumptions
+    spec: FleetSpec
+    years: np.ndarray
+    demand: np.ndarray
+    jobs: np.ndarray
+    robotic_jobs: np.ndarray
+    travel_cost: np.ndarray
+    utilization: np.ndarray
+    robotics_cf: np.ndarray
+    robotics_npv: np.ndarray
+    naive_jobs: np.ndarray
+    naive_npv: float
+
+    @property
+    def lost(self) -> np.ndarray:
+        return self.demand - self.jobs
+
+    @property
+    def fill_rate(self) -> float:
+        """Share of all offered jobs that were done."""
+        return float(self.jobs.sum() / max(self.demand.sum(), 1))
+
+    def npv_percentiles(self, q=(10, 50, 90)) -> np.ndarray:
+        return np.percentile(self.robotics_npv, q)
+
+    def job_percentiles(self, q=(10, 50, 90)) -> np.ndarray:
+        """Per-year percentiles of realized jobs, shape (len(q), T)."""
+        return np.percentile(self.jobs, q, axis=0)
+
+    def at_discount_rate(self, rate: float) -> "FleetResult":
+        """The same replications valued at ``rate``; the simulation itself never discounts."""
+        a = self.assumptions.replace(discount_rate=rate)
+        return replace(self, assumptions=a, robotics_npv=npv(self.robotics_cf, rate, self.years),
+                       naive_npv=run_model(a).robotics_npv)
+
+
+def _arrivals(a: Assumptions, horizon: float, rng: np.random.Generator) -> np.ndarray:
+    """Outage start times (years) from a Poisson process at the naive job rate.
+
+    The rate steps up when each stage completes, so every constant-rate
+    stretch is drawn separately.
+    """
+    edges = sorted({0.0, horizon, *(d for d in (a.stage1_duration, a.stage2_duration) if 0 < d < horizon)})
+    times = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        rate = float(robotics_jobs(a, np.array([start]))[0])
+        count = rng.poisson(rate * (stop - start))
+        times.append(rng.uniform(start, stop, count))
+    return np.sort(np.concatenate(times))
+
+
+def _replicate(a: Assumptions, spec: FleetSpec, n_years: int, rng: np.random.Generator) -> np.ndarray:
+    """One replication; returns rows (demand, jobs, robotic jobs, travel days, busy days) per year."""
+    out = np.zeros((5, n_years))
+    arrivals = _arrivals(a, float(n_years), rng)
+    n = arrivals.size
+    deadlines = (arrivals + rng.exponential(spec.window_days, n) / DAYS_PER_YEAR).tolist()
+    travel = rng.exponential(spec.travel_days, n).tolist() if spec.travel_days > 0 else [0.0] * n
+    np.add.at(out[0], arrivals.astype(int), 1)
+
+    # Arrivals are sorted, which already makes them a valid heap.
+    events = [(t, _ARRIVAL, i) for i, t in enumerate(arrivals.tolist())]
+    if spec.robots and a.stage1_duration < n_years:
+        heapq.heappush(events, (float(a.stage1_duration), _ROBOTS_READY, spec.robots))
+    waiting = []
+    free_crews, free_robots = spec.crews, 0
+    stage2 = float(a.stage2_duration)
+    jobs, robotic, travel_days, busy_days = out[1], out[2], out[3], out[4]
+    pop, push = heapq.heappop, heapq.heappush
+
+    while events:
+        t, kind, payload = pop(events)
+        if kind == _ARRIVAL:
+            push(waiting, (deadlines[payload], payload))
+        elif kind == _CREW_FREE:
+            free_crews += 1
+            free_robots += payload
+        else:
+            free_robots += payload
+        # Earliest-deadline-first; outages that already closed are dropped.
+        while free_crews and waiting:
+            deadline, i = pop(waiting)
+            if deadline < t:
+                continue
+            robot = 1 if free_robots else 0
+            speedup = (spec.stage2_speedup if t >= stage2 else spec.stage1_speedup) if robot else 1.0
+            days = travel[i] + spec.job_days / speedup
+            free_crews -= 1
+            free_robots -= robot
+            push(events, (t + days / DAYS_PER_YEAR, _CREW_FREE, robot))
+            year = int(t)
+            if year < n_years:
+                jobs[year] += 1
+                robotic[year] += robot
+                travel_days[year] += travel[i]
+                busy_days[year] += days
+    return out
+
+
+def _run_chunk(a: Assumptions, spec: FleetSpec, n_years: int, seed: np.random.SeedSequence, count: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.stack([_replicate(a, spec, n_years, rng) for _ in range(count)])
+
+
+def simulation_inputs(a: Assumptions) -> Assumptions:
+    """``a`` with every input the simulation only values with reset to its default: what to key a run on.
+
+    Revalue the result with :meth:`FleetResult.at_discount_rate`.
+    """
+    defaults = Assumptions()
+    return a.replace(**{name: getattr(defaults, name) for name in ASSUMPTION_FIELDS if name not in SIMULATION_INPUTS})
+
+
+def simulate_fleet(
+    a: Assumptions,
+    spec: FleetSpec = FleetSpec(),
+    replications: int = 1_000,
+    seed: int = 0,
+    workers: int | None = 1,
+    years: np.ndarray = YEARS,
+) -> FleetResult:
+    """Run ``replications`` seeded replications of the fleet over ``years``.
+
+    Every ``CHUNK_SIZE`` replications get their own child of ``seed``, so
+    results do not depend on ``workers``; ``workers=None`` uses every CPU and
+    ``1`` stays in-process.
+    """
+    n_years = len(years)
+    sizes = [min(CHUNK_SIZE, replications - start) for start in range(0, replications, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    if workers == 1:
+        chunks = [_run_chunk(a, spec, n_years, s, size) for s, size in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_run_chunk, [a] * len(sizes), [spec] * len(sizes), [n_years] * len(sizes),
+                                   seeds, sizes))
+    demand, jobs, robotic, travel_days, busy_days = np.concatenate(chunks).transpose(1, 0, 2)
+
+    travel_cost = travel_days * spec.travel_cost_per_day
+    robotics_cf = robotics_cash_flow(a, years, jobs=jobs) - travel_cost
+    naive = run_model(a)
+    return FleetResult(
+        assumptions=a,
+        spec=spec,
+        years=years,
+        demand=demand,
+        jobs=jobs,
+        robotic_jobs=robotic,
+        travel_cost=travel_cost,
+        utilization=busy_days.sum(axis=1) / (spec.crews * n_years * DAYS_PER_YEAR),
+        robotics_cf=robotics_cf,
+        robotics_npv=npv(robotics_cf, a.discount_rate, years),
+        naive_jobs=robotics_jobs(a, years),
+        naive_npv=naive.robotics_npv,
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate crew and robot capacity against the naive uplift.")
+    parser.add_argument("--replications", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--scenario", help="saved scenario to simulate (default: model defaults)")
+    parser.add_argument("--store", action="store_true", help="reuse or save the result in the scenario store")
+    defaults = FleetSpec()
+    for name, value in vars(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args(argv)
+
+    spec = FleetSpec(**{name: getattr(args, name) for name in vars(defaults)})
+    store = ScenarioStore() if args.store or args.scenario else None
+    assumptions = Assumptions()
+    if args.scenario:
+        assumptions = store.load_scenario(args.scenario)
+        if assumptions is None:
+            parser.error(f"no scenario named {args.scenario!r}")
+
+    # Results do not depend on ``workers``, so it stays out of the store key.
+    run = partial(simulate_fleet, workers=args.workers)
+    began = time.perf_counter()
+    if args.store:
+        # Through the shared cache and keyed as the dashboard keys it, so the dashboard can serve it.
+        result = SharedCache(store).memoize("fleet", run, simulation_inputs(assumptions), spec, args.replications,
+                                            args.seed)
+        result = result.at_discount_rate(assumptions.discount_rate)
+    else:
+        result = run(assumptions, spec, args.replications, args.seed)
+    elapsed = time.perf_counter() - began
+
+    print(f"{args.replications:,} replications, {int(result.demand.sum()):,} jobs offered in {elapsed:.1f}s")
+    p10, p50, p90 = result.job_percentiles()
+    for year, naive, lo, mid, hi in zip(result.years, result.naive_jobs, p10, p50, p90):
+        print(f"year {year}: naive {naive:6.1f} jobs  simulated P10/P50/P90 {lo:.0f}/{mid:.0f}/{hi:.0f}")
+    lo, mid, hi = result.npv_percentiles()
+    print(f"fill rate {result.fill_rate:.1%}, crew utilization {np.mean(result.utilization):.1%}")
+    print(f"robotics NPV: naive ${result.naive_npv:,.0f}  simulated P10/P50/P90 ${lo:,.0f}/${mid:,.0f}/${hi:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Goal seek and breakeven surfaces: which input value hits a target.
+
+Questions such as "minimum uplift2 so robotics NPV beats baseline by $1M"
+become a :class:`Goal` on one metric plus the input to solve for. Each row
+of a batch is first bracketed on a coarse grid over the input's bounds (one
+batched evaluation), then all brackets are bisected together, so a whole
+breakeven curve costs a few dozen array passes rather than a scalar rerun
+per point.
+"""
+
+import operator
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from model.batch import AssumptionBatch
+from model.engine import ASSUMPTION_FIELDS, Assumptions
+from model.graph import ModelGraph
+
+METRICS = ("robotics_npv", "npv_advantage", "robotics_irr", "robotics_payback", "breakeven_year")
+_OPERATORS = {">=": operator.ge, ">": operator.gt, "<=": operator.le, "<": operator.lt}
+
+
+@dataclass(frozen=True)
+class Goal:
+    """``metric op target``, e.g. ``Goal("robotics_payback", "<", 2)``."""
+
+    metric: str
+    op: str
+    target: float
+
+    def __post_init__(self):
+        if self.metric not in METRICS:
+            raise ValueError(f"Unknown metric {self.metric!r}; expected one of {METRICS}")
+        if self.op not in _OPERATORS:
+            raise ValueError(f"Unknown operator {self.op!r}; expected one of {tuple(_OPERATORS)}")
+
+    def met(self, values: np.ndarray) -> np.ndarray:
+        """Boolean mask of values meeting the goal; NaN ('never') never does."""
+        with np.errstate(invalid="ignore"):
+            return _OPERATORS[self.op](values, self.target) & ~np.isnan(values)
+
+
+def metric_values(batch: AssumptionBatch, metric: str, graph: ModelGraph | None = None) -> np.ndarray:
+    """Compute only the nodes ``metric`` needs for every row of ``batch``.
+
+    Pass the same ``graph`` across calls to recompute only what depends on
+    the inputs that changed in between.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}")
+    return (graph or ModelGraph()).evaluate(batch, (metric,))[metric]
+
+
+def _with(batch: AssumptionBatch, name: str, values: np.ndarray) -> AssumptionBatch:
+    columns = {field: getattr(batch, field) for field in ASSUMPTION_FIELDS}
+    columns[name] = values
+    return AssumptionBatch(columns)
+
+
+def solve(
+    data,
+    name: str,
+    bounds: tuple[float, float],
+    goal: Goal,
+    find: str = "min",
+    grid_points: int = 33,
+    tol: float = 1e-6,
+    max_iter: int = 60,
+) -> np.ndarray:
+    """Smallest (``find="min"``) or largest (``"max"``) ``name`` in ``bounds`` meeting ``goal``.
+
+    Solved independently for every row of ``data``; NaN where no value in the
+    bounds meets the goal. The grid decides which transition is refined, so a
+    metric that crosses the target more than once between grid points can be
+    misread.
+    """
+    if find not in ("min", "max"):
+        raise ValueError(f"find must be 'min' or 'max', got {find!r}")
+    batch = AssumptionBatch.from_data(data)
+    n = len(batch)
+    low, high = bounds
+    grid = np.linspace(low, high, grid_points)
+
+    # Coarse pass: every row at every grid point in one evaluation.
+    tiled = batch[np.repeat(np.arange(n), grid_points)]
+    met = goal.met(metric_values(_with(tiled, name, np.tile(grid, n)), goal.metric)).reshape(n, grid_points)
+    found = met.any(axis=1)
+    if find == "min":
+        k = np.argmax(met, axis=1)
+        edge = k == 0
+        inside, outside = grid[k], grid[np.maximum(k - 1, 0)]
+    else:
+        k = grid_points - 1 - np.argmax(met[:, ::-1], axis=1)
+        edge = k == grid_points - 1
+        inside, outside = grid[k], grid[np.minimum(k + 1, grid_points - 1)]
+
+    # Bisect every open bracket together, keeping `inside` on the met side.
+    # Only `name` moves between passes, so the graph keeps everything upstream of it.
+    todo = np.flatnonzero(found & ~edge)
+    sub = batch[todo]
+    a, b = inside[todo], outside[todo]
+    graph = ModelGraph()
+    for _ in range(max_iter):
+        if np.all(np.abs(a - b) <= tol * max(abs(high - low), 1.0)):
+            break
+        mid = 0.5 * (a + b)
+        ok = goal.met(metric_values(_with(sub, name, mid), goal.metric, graph))
+        a = np.where(ok, mid, a)
+        b = np.where(ok, b, mid)
+    inside[todo] = a
+    return np.where(found, inside, np.nan)
+
+
+def goal_seek(
+    base: Assumptions, name: str, bounds: tuple[float, float], goal: Goal, find: str = "min"
+) -> float | None:
+    """Scalar convenience wrapper around :func:`solve` for one assumption set."""
+    value = float(solve(base, name, bounds, goal, find)[0])
+    return None if np.isnan(value) else value
+
+
+def breakeven_curve(
+    base: Assumptions,
+    x_name: str,
+    x_values: np.ndarray,
+    y_name: str,
+    y_bounds: tuple[float, float],
+    goal: Goal,
+    find: str = "min",
+) -> np.ndarray:
+    """For each ``x_values`` entry, the ``y_name`` value where ``goal`` starts (or stops) being met."""
+    columns = {field: np.full(len(x_values), value) for field, value in asdict(base).items()}
+    columns[x_name] = np.asarray(x_values, dtype=float)
+    return solve(AssumptionBatch(columns), y_name, y_bounds, goal, find)
+
+
+def metric_surface(
+    base: Assumptions, x_name: str, x_values: np.ndarray, y_name: str, y_values: np.ndarray, metric: str
+) -> np.ndarray:
+    """``metric`` over the ``len(y_values) x len(x_values)`` grid, ready for contour plots."""
+    grid = AssumptionBatch.grid(base, **{y_name: y_values, x_name: x_values})
+    return metric_values(grid, metric).reshape(len(y_values), len(x_values))
@@ -0,0 +1,224 @@
+"""The cash-flow model as a small DAG of memoized nodes.
+
+Each node names the assumptions and upstream nodes it reads, and computes
+one array: the jobs path, revenue, expenses, development cost, the flows and
+every headline metric. A :class:`ModelGraph` keeps the last value of every
+node. Evaluating it again recomputes only the nodes downstream of inputs
+that changed, and only the ancestors of the outputs asked for. So bisecting
+one input, as goal seek does, never touches the baseline path.
+
+Inputs can be a scalar :class:`~model.engine.Assumptions` or an
+:class:`~model.batch.AssumptionBatch`: nodes broadcast along the last (year)
+axis, so ``run_model`` and ``run_batch`` share this one engine. Per-node
+timings are kept on the graph and passed to any :data:`OBSERVERS`. Usage from the repository root::
+
+    python -m model.graph --rows 100000 --change discount_rate=0.1
+"""
+
+import argparse
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from model.engine import (
+    ASSUMPTION_FIELDS,
+    YEARS,
+    Assumptions,
+    baseline_cash_flow,
+    breakeven_year,
+    cumulative_advantage,
+    development_cost,
+    npv,
+    payback_period,
+    robotics_expenses,
+    robotics_jobs,
+    robotics_revenue,
+    with_investment,
+)
+from model.irr import irr_batch
+
+
+@dataclass(frozen=True)
+class Node:
+    """One model quantity: ``compute`` reads ``inputs`` (assumptions or nodes) off a view."""
+
+    name: str
+    inputs: tuple[str, ...]
+    compute: Callable
+
+
+def _irr(v) -> np.ndarray:
+    flows = v.robotics_cf_for_irr
+    return irr_batch(flows).rate.reshape(flows.shape[:-1])
+
+
+# In dependency order; every node's inputs are assumptions or nodes above it.
+NODES = (
+    Node("baseline_cf", ("baseline_jobs", "baseline_shrink", "baseline_rev", "baseline_exp"),
+         lambda v: baseline_cash_flow(v, v.years)),
+    Node("robotics_jobs", ("baseline_jobs", "stage1_duration", "stage2_duration", "uplift1", "uplift2"),
+         lambda v: robotics_jobs(v, v.years)),
+    Node("revenue", ("robotics_jobs", "baseline_rev", "rev_growth"),
+         lambda v: robotics_revenue(v, v.robotics_jobs, v.years)),
+    Node("expenses", ("robotics_jobs", "baseline_exp", "exp_reduction"),
+         lambda v: robotics_expenses(v, v.robotics_jobs)),
+    Node("development_cost", ("stage1_cost", "stage1_duration", "stage2_cost", "stage2_duration"),
+         lambda v: development_cost(v, v.years)),
+    Node("robotics_cf", ("revenue", "expenses", "development_cost"),
+         lambda v: v.revenue - v.expenses - v.development_cost),
+    Node("robotics_cf_for_irr", ("robotics_cf", "stage1_cost", "stage2_cost"),
+         lambda v: with_investment(v.robotics_cf, v)),
+    Node("baseline_npv", ("baseline_cf", "discount_rate"), lambda v: npv(v.baseline_cf, v.discount_rate, v.years)),
+    Node("robotics_npv", ("robotics_cf", "discount_rate"), lambda v: npv(v.robotics_cf, v.discount_rate, v.years)),
+    Node("npv_advantage", ("baseline_npv", "robotics_npv"), lambda v: v.robotics_npv - v.baseline_npv),
+    Node("robotics_irr", ("robotics_cf_for_irr",), _irr),
+    Node("robotics_payback", ("robotics_cf",), lambda v: payback_period(v.robotics_cf)),
+    Node("breakeven_year", ("baseline_cf", "robotics_cf"), lambda v: breakeven_year(v.baseline_cf, v.robotics_cf)),
+    Node("cumulative_advantage", ("baseline_cf", "robotics_cf"),
+         lambda v: cumulative_advantage(v.baseline_cf, v.robotics_cf)),
+)
+NODE_NAMES = tuple(node.name for node in NODES)
+OUTPUTS = ("baseline_cf", "robotics_cf", "robotics_cf_for_irr", "baseline_npv", "robotics_npv", "robotics_irr",
+           "robotics_payback", "breakeven_year", "cumulative_advantage")
+
+
+def _downstream() -> dict[str, frozenset[str]]:
+    below = {name: set() for name in ASSUMPTION_FIELDS + NODE_NAMES}
+    for node in reversed(NODES):
+        for source in node.inputs:
+            below[source] |= {node.name} | below[node.name]
+    return {name: frozenset(nodes) for name, nodes in below.items()}
+
+
+# Every node an assumption (or node) feeds, directly or not.
+DOWNSTREAM = _downstream()
+
+
+def assumptions_read(*nodes: str) -> frozenset[str]:
+    """The assumptions that feed any of ``nodes``, directly or not."""
+    unknown = set(nodes) - set(NODE_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown model nodes: {sorted(unknown)}")
+    return frozenset(name for name in ASSUMPTION_FIELDS if DOWNSTREAM[name] & set(nodes))
+
+# Called as ``observer(node_name, seconds)`` after every node computation,
+# e.g. by the dashboard's tracing; empty unless something registers.
+OBSERVERS: list[Callable[[str, float], None]] = []
+
+
+@lru_cache(maxsize=None)
+def plan(outputs: tuple[str, ...]) -> tuple[Node, ...]:
+    """The nodes needed for ``outputs``, in dependency order."""
+    unknown = set(outputs) - set(NODE_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown model outputs: {sorted(unknown)}")
+    needed = set(outputs)
+    for node in reversed(NODES):
+        if node.name in needed:
+            needed.update(node.inputs)
+    return tuple(node for node in NODES if node.name in needed)
+
+
+class _View(dict):
+    """Attribute access to a node's inputs, so the engine helpers accept it as ``a``."""
+
+    def __getattr__(self, name: str):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(f"{name!r} is not a declared input of this node") from None
+
+
+class ModelGraph:
+    """Memoized evaluator of :data:`NODES` for one stream of inputs.
+
+    Keeps the last inputs and node values, so each :meth:`evaluate` only
+    recomputes what changed. Inputs are compared by value and kept by
+    reference, so pass new arrays rather than mutating old ones in place.
+    Not thread-safe: give each thread or session its own graph.
+    """
+
+    def __init__(self, years: np.ndarray = YEARS):
+        self.years = years
+        self._inputs: dict[str, np.ndarray] = {}
+        self._values: dict[str, np.ndarray] = {}
+        # Seconds each node's most recent computation took, how many times it
+        # has been computed, and which nodes the last evaluate() computed.
+        self.timings: dict[str, float] = {}
+        self.computations: Counter[str] = Counter()
+        self.last_computed: tuple[str, ...] = ()
+
+    def invalidate(self) -> None:
+        """Forget every input and node value."""
+        self._inputs.clear()
+        self._values.clear()
+
+    def evaluate(self, a, outputs: Iterable[str] = OUTPUTS) -> dict[str, np.ndarray]:
+        """Values of ``outputs`` for ``a``, an :class:`Assumptions` or an ``AssumptionBatch``."""
+        for name in ASSUMPTION_FIELDS:
+            value = np.asarray(getattr(a, name), dtype=float)
+            old = self._inputs.get(name)
+            if old is value:
+                continue
+            if old is None or old.shape != value.shape or not np.array_equal(old, value):
+                self._inputs[name] = value
+                for node in DOWNSTREAM[name]:
+                    self._values.pop(node, None)
+
+        computed = []
+        for node in plan(tuple(outputs)):
+            if node.name in self._values:
+                continue
+            view = _View(years=self.years)
+            for source in node.inputs:
+                view[source] = self._values[source] if source in self._values else self._inputs[source]
+            began = time.perf_counter()
+            self._values[node.name] = node.compute(view)
+            self.timings[node.name] = elapsed = time.perf_counter() - began
+            for observer in OBSERVERS:
+                observer(node.name, elapsed)
+            computed.append(node.name)
+        self.computations.update(computed)
+        self.last_computed = tuple(computed)
+        return {name: self._values[name] for name in outputs}
+
+
+def main(argv: list[str] | None = None) -> None:
+    from model.batch import AssumptionBatch
+    from model.cli import _parse_setting
+
+    parser = argparse.ArgumentParser(description="Time each model node, then re-evaluate after changing inputs.")
+    parser.add_argument("--rows", type=int, default=1, help="scenarios per evaluation (1: the scalar model)")
+    parser.add_argument("--change", action="append", type=_parse_setting, default=[], metavar="NAME=VALUE",
+                        help="input to change before the second evaluation; repeatable")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    base = Assumptions()
+    if args.rows == 1:
+        first, second = base, base.replace(**dict(args.change))
+    else:
+        # Jitter every input by up to ±10% so rows differ.
+        rng = np.random.default_rng(args.seed)
+        columns = {name: getattr(base, name) * rng.uniform(0.9, 1.1, args.rows) for name in ASSUMPTION_FIELDS}
+        first = AssumptionBatch(columns)
+        second = AssumptionBatch({**columns, **{name: np.full(args.rows, v) for name, v in args.change}})
+
+    graph = ModelGraph()
+    graph.evaluate(first, NODE_NAMES)
+    full = dict(graph.timings)
+    graph.evaluate(second, NODE_NAMES)
+    print(f"{'node':<22} {'first (ms)':>11} {'after change (ms)':>18}")
+    for name in NODE_NAMES:
+        again = f"{graph.timings[name] * 1e3:18.3f}" if name in graph.last_computed else f"{'cached':>18}"
+        print(f"{name:<22} {full[name] * 1e3:11.3f} {again}")
+    print(f"{'total':<22} {sum(full.values()) * 1e3:11.3f} "
+          f"{sum(graph.timings[name] for name in graph.last_computed) * 1e3:18.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Monte Carlo risk simulation over uncertain model assumptions.
+
+Each uncertain assumption gets a :class:`Distribution`; optional pairwise
+correlations are imposed through a Gaussian copula. Draws are generated and
+evaluated chunk by chunk through the batch engine, so only the per-draw
+outputs (NPV, IRR, cumulative flows) grow with the number of draws.
+"""
+
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+from model.batch import AssumptionBatch, iter_batches
+from model.engine import ASSUMPTION_FIELDS, YEARS, Assumptions
+
+CHUNK_SIZE = 65_536
+DISTRIBUTION_KINDS = ("uniform", "triangular", "lognormal")
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """Sampling distribution for one assumption.
+
+    ``uniform`` uses ``low``/``high``, ``triangular`` adds ``mode`` and
+    ``lognormal`` is centred on ``mode`` (its median) with log-scale ``sigma``.
+    """
+
+    kind: str
+    low: float = 0.0
+    mode: float = 0.0
+    high: float = 0.0
+    sigma: float = 0.0
+
+    def __post_init__(self):
+        if self.kind not in DISTRIBUTION_KINDS:
+            raise ValueError(f"Unknown distribution {self.kind!r}; expected one of {DISTRIBUTION_KINDS}")
+
+    @classmethod
+    def around(cls, kind: str, value: float, spread: float) -> "Distribution":
+        """Distribution centred on ``value`` with a relative ``spread`` (0.2 = ±20%)."""
+        low, high = sorted((value * (1 - spread), value * (1 + spread)))
+        return cls(kind=kind, low=low, mode=value, high=high, sigma=spread)
+
+    def from_normal(self, z: np.ndarray) -> np.ndarray:
+        """Map standard-normal draws onto this distribution."""
+        if self.kind == "lognormal":
+            return self.mode * np.exp(self.sigma * z)
+        u = _norm_cdf(z)
+        if self.kind == "uniform":
+            return self.low + u * (self.high - self.low)
+        width = self.high - self.low
+        if width == 0:
+            return np.full_like(u, self.mode)
+        split = (self.mode - self.low) / width
+        return np.where(
+            u < split,
+            self.low + np.sqrt(u * width * (self.mode - self.low)),
+            self.high - np.sqrt((1 - u) * width * (self.high - self.mode)),
+        )
+
+
+@dataclass(frozen=True)
+class MonteCarloSpec:
+    """Everything that determines a simulation run; hashable for caching."""
+
+    base: Assumptions = field(default_factory=Assumptions)
+    distributions: tuple[tuple[str, Distribution], ...] = ()
+    correlations: tuple[tuple[str, str, float], ...] = ()
+    draws: int = 100_000
+    seed: int = 0
+    hurdle_rate: float = 0.15
+
+
+@dataclass(frozen=True)
+class MonteCarloResult:
+    """Per-draw outputs of a simulation run."""
+
+    spec: MonteCarloSpec
+    years: np.ndarray
+    baseline_npv: np.ndarray
+    robotics_npv: np.ndarray
+    robotics_irr: np.ndarray
+    robotics_cf: np.ndarray
+    cumulative_cf: np.ndarray
+
+    def npv_percentiles(self, q=(10, 50, 90)) -> np.ndarray:
+        return np.percentile(self.robotics_npv, q)
+
+    @property
+    def prob_irr_below_hurdle(self) -> float:
+        """Share of draws whose IRR is undefined or below the hurdle rate."""
+        return float(np.mean(~(self.robotics_irr >= self.spec.hurdle_rate)))
+
+    @property
+    def prob_beats_baseline(self) -> float:
+        return float(np.mean(self.robotics_npv > self.baseline_npv))
+
+    def fan(self, q=(10, 25, 50, 75, 90), cumulative: bool = True) -> np.ndarray:
+        """Per-year percentiles of robotics flows, shape (len(q), T)."""
+        flows = self.cumulative_cf if cumulative else self.robotics_cf
+        return np.percentile(flows, q, axis=0)
+
+
+def _norm_cdf(z: np.ndarray) -> np.ndarray:
+    """Standard normal CDF (Abramowitz & Stegun 7.1.26, |error| < 1.5e-7)."""
+    x = np.abs(z) / np.sqrt(2)
+    t = 1 / (1 + 0.3275911 * x)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-x * x)
+    return 0.5 * (1 + np.sign(z) * erf)
+
+
+def _cholesky(names: list[str], correlations) -> np.ndarray:
+    corr = np.eye(len(names))
+    for a, b, rho in correlations:
+        if a not in names or b not in names:
+            raise ValueError(f"Correlation {a}~{b} refers to an assumption without a distribution")
+        i, j = names.index(a), names.index(b)
+        corr[i, j] = corr[j, i] = rho
+    try:
+        return np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        raise ValueError("Correlation matrix is not positive definite") from None
+
+
+def sample(spec: MonteCarloSpec, rng: np.random.Generator, n: int) -> AssumptionBatch:
+    """Draw ``n`` assumption rows for ``spec`` from ``rng``."""
+    distributions = dict(spec.distributions)
+    unknown = set(distributions) - set(ASSUMPTION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown assumptions: {sorted(unknown)}")
+    names = list(distributions)
+    columns = asdict(spec.base)
+    if names:
+        z = rng.standard_normal((n, len(names))) @ _cholesky(names, spec.correlations).T
+        for k, name in enumerate(names):
+            columns[name] = distributions[name].from_normal(z[:, k])
+    else:
+        columns = {name: np.full(n, value) for name, value in columns.items()}
+    return AssumptionBatch(columns)
+
+
+def simulate(spec: MonteCarloSpec) -> MonteCarloResult:
+    """Run ``spec.draws`` seeded draws through the batch engine.
+
+    Every chunk gets its own child of ``spec.seed``, so a run is reproducible
+    and chunk intermediates never exceed ``CHUNK_SIZE`` rows.
+    """
+    n, t = spec.draws, len(YEARS)
+    out = {
+        "baseline_npv": np.empty(n),
+        "robotics_npv": np.empty(n),
+        "robotics_irr": np.empty(n),
+        "robotics_cf": np.empty((n, t)),
+    }
+    n_chunks = -(-n // CHUNK_SIZE)
+    children = np.random.SeedSequence(spec.seed).spawn(n_chunks)
+    for c, child in enumerate(children):
+        start = c * CHUNK_SIZE
+        stop = min(start + CHUNK_SIZE, n)
+        draws = sample(spec, np.random.default_rng(child), stop - start)
+        for _, chunk in iter_batches(draws, chunk_size=CHUNK_SIZE):
+            for name, array in out.items():
+                array[start:stop] = getattr(chunk, name)
+    return MonteCarloResult(
+        spec=spec,
+        years=YEARS,
+        cumulative_cf=np.cumsum(out["robotics_cf"], axis=1),
+        **out,
+    )
@@ -0,0 +1,160 @@
+"""Configurable period grids: monthly or weekly flows over long horizons.
+
+The classic model evaluates one point per year, so a half-year stage only
+switches at the next year boundary and its cost is charged for the whole
+year. On a :class:`PeriodGrid` every flow is the amount earned or spent in
+its period instead: stages phase in pro rata to how much of each period they
+cover, so stage spend always sums to the stage cost, and flows are discounted
+at their actual (by default mid-period) dates with XNPV/XIRR. Like the annual
+engine, everything broadcasts over :class:`~model.batch.AssumptionBatch`
+columns.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from model.engine import (
+    HORIZON_YEARS,
+    Assumptions,
+    ModelResult,
+    _col,
+    _optional,
+    cumulative_advantage,
+    first_crossing,
+    with_investment,
+)
+from model.irr import irr_batch
+
+RESOLUTIONS = {"annual": 1, "monthly": 12, "weekly": 52}
+TIMINGS = ("start", "mid", "end")
+_TIMING_OFFSETS = {"start": 0.0, "mid": 0.5, "end": 1.0}
+
+
+@dataclass(frozen=True)
+class PeriodGrid:
+    """Equal periods covering year 0 through ``horizon_years``, like the classic model.
+
+    ``timing`` places each period's flow at its start, middle or end for
+    discounting; growth is indexed to the start of each period.
+    """
+
+    periods_per_year: int = 12
+    horizon_years: int = HORIZON_YEARS
+    timing: str = "mid"
+
+    def __post_init__(self):
+        if self.periods_per_year < 1:
+            raise ValueError(f"periods_per_year must be at least 1, got {self.periods_per_year}")
+        if self.horizon_years < 0:
+            raise ValueError(f"horizon_years must be non-negative, got {self.horizon_years}")
+        if self.timing not in TIMINGS:
+            raise ValueError(f"Unknown timing {self.timing!r}; expected one of {TIMINGS}")
+
+    @classmethod
+    def from_resolution(cls, resolution: str, horizon_years: int = HORIZON_YEARS, timing: str = "mid") -> "PeriodGrid":
+        """Grid for ``"annual"``, ``"monthly"`` or ``"weekly"`` periods."""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution!r}; expected one of {tuple(RESOLUTIONS)}")
+        return cls(RESOLUTIONS[resolution], horizon_years, timing)
+
+    @property
+    def periods(self) -> int:
+        return (self.horizon_years + 1) * self.periods_per_year
+
+    @property
+    def dt(self) -> float:
+        """Period length in years."""
+        return 1.0 / self.periods_per_year
+
+    @property
+    def starts(self) -> np.ndarray:
+        """Start of every period, in years."""
+        return np.arange(self.periods) * self.dt
+
+    @property
+    def cash_times(self) -> np.ndarray:
+        """When each period's flow is paid, in years, according to ``timing``."""
+        return self.starts + _TIMING_OFFSETS[self.timing] * self.dt
+
+
+# ============================================================
+# CASH FLOWS
+# ============================================================
+
+def _coverage(starts: np.ndarray, dt: float, end) -> np.ndarray:
+    """Share of each period ``[start, start + dt)`` that falls before ``end``."""
+    return np.clip((_col(end) - starts) / dt, 0.0, 1.0)
+
+
+def baseline_period_flows(a: Assumptions, grid: PeriodGrid) -> np.ndarray:
+    """Baseline flow earned in each period of ``grid``."""
+    jobs = _col(a.baseline_jobs) * (1 + _col(a.baseline_shrink)) ** grid.starts
+    return jobs * (_col(a.baseline_rev) - _col(a.baseline_exp)) * grid.dt
+
+
+def period_development_cost(a: Assumptions, grid: PeriodGrid) -> np.ndarray:
+    """Stage spend per period; each stage's spend sums exactly to its cost."""
+    stage1 = _col(a.stage1_cost) / _col(a.stage1_duration) * _coverage(grid.starts, grid.dt, a.stage1_duration)
+    stage2 = _col(a.stage2_cost) / _col(a.stage2_duration) * _coverage(grid.starts, grid.dt, a.stage2_duration)
+    return (stage1 + stage2) * grid.dt
+
+
+def robotics_period_flows(a: Assumptions, grid: PeriodGrid) -> np.ndarray:
+    """Robotics flow per period, with uplifts ramping in as each stage completes."""
+    after1 = 1 - _coverage(grid.starts, grid.dt, a.stage1_duration)
+    after2 = np.minimum(after1, 1 - _coverage(grid.starts, grid.dt, a.stage2_duration))
+    jobs = _col(a.baseline_jobs) * (1 + _col(a.uplift1) * after1 + _col(a.uplift2) * after2)
+    revenue = jobs * _col(a.baseline_rev) * (1 + _col(a.rev_growth)) ** grid.starts
+    expenses = jobs * _col(a.baseline_exp) * (1 - _col(a.exp_reduction))
+    return (revenue - expenses) * grid.dt - period_development_cost(a, grid)
+
+
+def annual_totals(flows: np.ndarray, grid: PeriodGrid) -> np.ndarray:
+    """Sum per-period ``flows`` into one total per model year."""
+    flows = np.asarray(flows)
+    return flows.reshape(flows.shape[:-1] + (grid.horizon_years + 1, grid.periods_per_year)).sum(axis=-1)
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+def xnpv(cashflows: np.ndarray, rate, times: np.ndarray) -> np.ndarray:
+    """Discounted sum of flows paid at ``times`` years, along the last axis."""
+    return np.sum(cashflows * (1 + _col(rate)) ** -np.asarray(times, dtype=float), axis=-1)
+
+
+def xirr(cashflows: np.ndarray, times: np.ndarray) -> np.ndarray:
+    """Annual IRR of every row of flows paid at ``times`` years, NaN where undefined."""
+    return irr_batch(cashflows, times=times).rate
+
+
+def irr_times(grid: PeriodGrid) -> np.ndarray:
+    """Payment dates of ``with_investment`` flows: the investment at year -1, then each period."""
+    return np.concatenate([[-1.0], grid.cash_times])
+
+
+def run_period_model(a: Assumptions, grid: PeriodGrid) -> ModelResult:
+    """Flows per period of ``grid`` and every headline metric for ``a``.
+
+    Payback and breakeven are reported in years, like the classic model.
+    """
+    baseline_cf = baseline_period_flows(a, grid)
+    robotics_cf = robotics_period_flows(a, grid)
+    robotics_cf_for_irr = with_investment(robotics_cf, a)
+    gap = np.cumsum(robotics_cf, axis=-1) - np.cumsum(baseline_cf, axis=-1)
+    return ModelResult(
+        assumptions=a,
+        years=grid.starts,
+        baseline_cf=baseline_cf,
+        robotics_cf=robotics_cf,
+        robotics_cf_for_irr=robotics_cf_for_irr,
+        baseline_npv=float(xnpv(baseline_cf, a.discount_rate, grid.cash_times)),
+        robotics_npv=float(xnpv(robotics_cf, a.discount_rate, grid.cash_times)),
+        robotics_irr=_optional(xirr(robotics_cf_for_irr, irr_times(grid))[0]),
+        robotics_payback=_optional(first_crossing(np.cumsum(robotics_cf, axis=-1)) * grid.dt),
+        breakeven_year=_optional(first_crossing(gap, strict=True) * grid.dt),
+        cumulative_advantage=float(cumulative_advantage(baseline_cf, robotics_cf)),
+        grid=grid,
+    )
@@ -0,0 +1,372 @@
+"""Portfolio mode: many client sites, each with its own book of jobs, rolled up.
+
+A site table (CSV or Parquet, one row per smelter site) names each site's
+client, region and segment and may set any of :data:`SITE_FIELDS` per site,
+plus ``robot_share``: the fraction of the site's jobs the robots can serve,
+which scales every robotics effect there (uplifts, price growth, expense
+reduction). Missing columns take the company assumptions. Development is
+one company-wide programme, so the stage costs and timing and the discount
+rate are company level, and development is charged once, against the whole
+portfolio rather than per site.
+
+Site flows come from one vectorized pass through the engine functions and
+are summed per group. :class:`Portfolio` keeps per-site flows and per-group
+totals, so changing one site recomputes that site, then only the groups it
+belongs to, then the portfolio metrics. Usage from the repository root::
+
+    python -m model.portfolio sites.csv --by region
+    python -m model.portfolio --sample 10000 --by segment
+"""
+
+import argparse
+import csv
+import io
+import time
+from collections.abc import Mapping
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from model.batch import AssumptionBatch
+from model.engine import (
+    YEARS,
+    Assumptions,
+    baseline_cash_flow,
+    breakeven_year,
+    cumulative_advantage,
+    development_cost,
+    npv,
+    payback_period,
+    robotics_expenses,
+    robotics_jobs,
+    robotics_revenue,
+    with_investment,
+)
+from model.irr import irr_batch
+
+SITE_FIELDS = ("baseline_jobs", "baseline_rev", "baseline_exp", "baseline_shrink", "uplift1", "uplift2",
+               "rev_growth", "exp_reduction")
+# Robotics effects that only reach the share of a site's jobs robots can serve.
+SHARED_FIELDS = ("uplift1", "uplift2", "rev_growth", "exp_reduction")
+# Company fields that move when uplifts land, so every site's flows.
+TIMING_FIELDS = ("stage1_duration", "stage2_duration")
+SHARE_FIELD = "robot_share"
+ID_FIELD = "site"
+GROUPINGS = ("region", "client", "segment")
+LABEL_FIELDS = (ID_FIELD,) + GROUPINGS
+SITE_FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+
+@dataclass(frozen=True)
+class GroupRollup:
+    """Flows (G, T) and NPVs (G,) per group; gross of the company's development cost."""
+
+    grouping: str
+    labels: np.ndarray
+    sites: np.ndarray
+    baseline_cf: np.ndarray
+    robotics_cf: np.ndarray
+    baseline_npv: np.ndarray
+    robotics_npv: np.ndarray
+
+    @property
+    def npv_advantage(self) -> np.ndarray:
+        return self.robotics_npv - self.baseline_npv
+
+
+@dataclass(frozen=True)
+class PortfolioMetrics:
+    """Portfolio flows and headline metrics, net of development."""
+
+    baseline_cf: np.ndarray
+    robotics_cf: np.ndarray
+    baseline_npv: float
+    robotics_npv: float
+    robotics_irr: float
+    robotics_payback: float
+    breakeven_year: float
+    cumulative_advantage: float
+
+
+class _Groups:
+    """Group codes for one label column, with each group's members stored contiguously."""
+
+    def __init__(self, values: np.ndarray):
+        self.labels, self.codes = np.unique(values, return_inverse=True)
+        self.order = np.argsort(self.codes, kind="stable")
+        self.starts = np.searchsorted(self.codes[self.order], np.arange(len(self.labels) + 1))
+
+    def members(self, group: int) -> np.ndarray:
+        return self.order[self.starts[group]:self.starts[group + 1]]
+
+    def sums(self, flows: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(flows[self.order], self.starts[:-1], axis=0)
+
+
+# ============================================================
+# SITE TABLES
+# ============================================================
+
+def site_format(name: str) -> str:
+    """``"csv"`` or ``"parquet"``, from a file name's extension."""
+    fmt = SITE_FORMATS.get(Path(name).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"cannot tell the format of {name}; use .csv or .parquet")
+    return fmt
+
+
+def load_sites(source: str | BinaryIO, fmt: str | None = None) -> dict[str, np.ndarray]:
+    """Columns of a CSV or Parquet site table (a path, or a binary file with ``fmt``).
+
+    Labels come back as strings and fields as floats.
+    """
+    if fmt is None:
+        fmt = site_format(source)
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ValueError("Parquet site tables need pyarrow: pip install pyarrow") from exc
+        table = pq.read_table(source)
+        raw = {name: table.column(name).to_numpy(zero_copy_only=False) for name in table.column_names}
+    else:
+        with open(source, "rb") if isinstance(source, (str, Path)) else nullcontext(source) as f:
+            text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+            rows = list(csv.DictReader(text))
+            text.detach()  # leave the caller's file open
+        if not rows:
+            raise ValueError("the site table has no sites")
+        raw = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+    return site_columns(raw)
+
+
+def site_columns(raw: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Validate and normalize site table columns."""
+    unknown = set(raw) - set(LABEL_FIELDS) - set(SITE_FIELDS) - {SHARE_FIELD}
+    if unknown:
+        raise ValueError(f"unknown site columns: {', '.join(sorted(unknown))}")
+    if ID_FIELD not in raw:
+        raise ValueError(f"the site table needs a {ID_FIELD!r} column")
+    columns = {}
+    for name, values in raw.items():
+        values = np.asarray(values)
+        if name in LABEL_FIELDS:
+            columns[name] = values.astype(str)
+        else:
+            try:
+                columns[name] = values.astype(float)
+            except ValueError as exc:
+                raise ValueError(f"column {name!r}: {exc}") from None
+    if len(np.unique(columns[ID_FIELD])) != len(columns[ID_FIELD]):
+        raise ValueError(f"{ID_FIELD!r} values must be unique")
+    return columns
+
+
+def sample_sites(n: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """A synthetic table of ``n`` sites for demos and benchmarks."""
+    rng = np.random.default_rng(seed)
+    regions = np.array(["North America", "South America", "Europe", "Africa", "Asia", "Oceania"])
+    segments = np.array(["Copper", "Nickel", "Ferroalloy", "PGM", "Zinc"])
+    clients = np.array([f"Client {i:03d}" for i in range(max(1, n // 25))])
+    return {
+        ID_FIELD: np.array([f"S{i:05d}" for i in range(n)]),
+        "client": rng.choice(clients, n),
+        "region": rng.choice(regions, n),
+        "segment": rng.choice(segments, n),
+        "baseline_jobs": rng.gamma(4.0, 0.5, n),
+        "baseline_rev": rng.lognormal(np.log(150_000), 0.3, n),
+        "baseline_exp": rng.lognormal(np.log(20_000), 0.25, n),
+        "baseline_shrink": rng.normal(-0.05, 0.03, n),
+        SHARE_FIELD: rng.uniform(0.3, 1.0, n),
+    }
+
+
+# ============================================================
+# PORTFOLIO
+# ============================================================
+
+class Portfolio:
+    """Site flows, group rollups and portfolio metrics that update incrementally.
+
+    ``sites`` maps column names to equal-length arrays (see :func:`site_columns`).
+    Not thread-safe: give each session its own portfolio.
+    """
+
+    def __init__(self, sites: Mapping[str, np.ndarray], company: Assumptions = Assumptions(),
+                 years: np.ndarray = YEARS):
+        sites = site_columns(sites)
+        self.years = years
+        self.company = company
+        self.ids = sites[ID_FIELD]
+        self._index = {site: i for i, site in enumerate(self.ids)}
+        n = len(self.ids)
+        defaults = asdict(company)
+        self._given = frozenset(name for name in SITE_FIELDS if name in sites)
+        self.fields = {name: np.array(sites.get(name, np.full(n, defaults[name])), dtype=float)
+                       for name in SITE_FIELDS}
+        self.share = np.array(sites.get(SHARE_FIELD, np.ones(n)), dtype=float)
+        self.labels = {name: sites.get(name, np.full(n, "All")) for name in GROUPINGS}
+        self._groups = {name: _Groups(values) for name, values in self.labels.items()}
+        # Bumped on every change, and which sites and groups the last one recomputed.
+        self.revision = 0
+        self.recomputed: dict[str, int] = {}
+        self._compute_all()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def index(self, site: str) -> int | None:
+        """Row of ``site``, or None if the table has no such site."""
+        return self._index.get(site)
+
+    def _batch(self, rows) -> AssumptionBatch:
+        columns = {name: values[rows] for name, values in self.fields.items()}
+        for name in SHARED_FIELDS:
+            columns[name] = columns[name] * self.share[rows]
+        for name in TIMING_FIELDS:
+            columns[name] = getattr(self.company, name)
+        return AssumptionBatch(columns)
+
+    def _site_flows(self, rows) -> tuple[np.ndarray, np.ndarray]:
+        batch = self._batch(rows)
+        jobs = robotics_jobs(batch, self.years)
+        robotics = robotics_revenue(batch, jobs, self.years) - robotics_expenses(batch, jobs)
+        return baseline_cash_flow(batch, self.years), robotics
+
+    def _compute_all(self) -> None:
+        self.baseline_cf, self.robotics_cf = self._site_flows(slice(None))
+        self._totals = {name: (groups.sums(self.baseline_cf), groups.sums(self.robotics_cf))
+                        for name, groups in self._groups.items()}
+        self._rollups: dict[str, GroupRollup] = {}
+        self._metrics = None
+        self.revision += 1
+        self.recomputed = {"sites": len(self), **{name: len(g.labels) for name, g in self._groups.items()}}
+
+    def update_site(self, site: str, **changes) -> None:
+        """Change one site's fields (or ``robot_share``), recomputing only what depends on it."""
+        unknown = set(changes) - set(SITE_FIELDS) - {SHARE_FIELD}
+        if unknown:
+            raise ValueError(f"unknown site fields: {', '.join(sorted(unknown))}")
+        try:
+            i = self._index[site]
+        except KeyError:
+            raise ValueError(f"no site {site!r}") from None
+        for name, value in changes.items():
+            (self.share if name == SHARE_FIELD else self.fields[name])[i] = value
+        baseline, robotics = self._site_flows(slice(i, i + 1))
+        self.baseline_cf[i], self.robotics_cf[i] = baseline[0], robotics[0]
+        for name, groups in self._groups.items():
+            group = groups.codes[i]
+            members = groups.members(group)
+            totals = self._totals[name]
+            totals[0][group] = self.baseline_cf[members].sum(axis=0)
+            totals[1][group] = self.robotics_cf[members].sum(axis=0)
+            if name in self._rollups:
+                self._rollups[name] = self._refresh_rollup(self._rollups[name], [group])
+        self._metrics = None
+        self.revision += 1
+        self.recomputed = {"sites": 1, **{name: 1 for name in self._groups}}
+
+    def set_company(self, company: Assumptions) -> None:
+        """Switch company assumptions, recomputing only what the changed fields reach."""
+        changed = {name for name, value in asdict(company).items() if getattr(self.company, name) != value}
+        if not changed:
+            return
+        self.company = company
+        inherited = changed & (set(SITE_FIELDS) - self._given)
+        for name in inherited:
+            self.fields[name][:] = getattr(company, name)
+        if inherited or changed & set(TIMING_FIELDS):
+            self._compute_all()
+            return
+        # Only development costs or the discount rate: no site or group flows move.
+        if "discount_rate" in changed:
+            self._rollups = {}
+        self._metrics = None
+        self.revision += 1
+        self.recomputed = {"sites": 0, **{name: 0 for name in self._groups}}
+
+    def _refresh_rollup(self, rollup: GroupRollup, groups) -> GroupRollup:
+        baseline, robotics = self._totals[rollup.grouping]
+        rate = self.company.discount_rate
+        baseline_npv, robotics_npv = rollup.baseline_npv.copy(), rollup.robotics_npv.copy()
+        baseline_npv[groups] = npv(baseline[groups], rate, self.years)
+        robotics_npv[groups] = npv(robotics[groups], rate, self.years)
+        return GroupRollup(rollup.grouping, rollup.labels, rollup.sites, baseline.copy(), robotics.copy(),
+                           baseline_npv, robotics_npv)
+
+    def rollup(self, grouping: str) -> GroupRollup:
+        """Per-group flows and NPVs for ``grouping`` (one of :data:`GROUPINGS`)."""
+        if grouping not in self._groups:
+            raise ValueError(f"unknown grouping {grouping!r}; expected one of {GROUPINGS}")
+        if grouping not in self._rollups:
+            groups = self._groups[grouping]
+            baseline, robotics = self._totals[grouping]
+            rate = self.company.discount_rate
+            self._rollups[grouping] = GroupRollup(grouping, groups.labels, np.diff(groups.starts), baseline.copy(),
+                                                  robotics.copy(), npv(baseline, rate, self.years),
+                                                  npv(robotics, rate, self.years))
+        return self._rollups[grouping]
+
+    def metrics(self) -> PortfolioMetrics:
+        """Portfolio flows and metrics, with development charged once."""
+        if self._metrics is None:
+            # Any grouping's totals add up to the portfolio; regions are few.
+            baseline, robotics = (totals.sum(axis=0) for totals in self._totals[GROUPINGS[0]])
+            c = self.company
+            robotics = robotics - development_cost(c, self.years)
+            rate = c.discount_rate
+            self._metrics = PortfolioMetrics(
+                baseline_cf=baseline,
+                robotics_cf=robotics,
+                baseline_npv=float(npv(baseline, rate, self.years)),
+                robotics_npv=float(npv(robotics, rate, self.years)),
+                robotics_irr=float(irr_batch(with_investment(robotics, c)).rate[0]),
+                robotics_payback=float(payback_period(robotics)),
+                breakeven_year=float(breakeven_year(baseline, robotics)),
+                cumulative_advantage=float(cumulative_advantage(baseline, robotics)),
+            )
+        return self._metrics
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Roll a site table up into portfolio NPV and IRR.")
+    parser.add_argument("sites", nargs="?", help="CSV or Parquet site table")
+    parser.add_argument("--sample", type=int, metavar="N", help="use N synthetic sites instead of a table")
+    parser.add_argument("--by", choices=GROUPINGS, default="region")
+    parser.add_argument("--top", type=int, default=15, help="groups to list, largest NPV advantage first")
+    args = parser.parse_args(argv)
+    if (args.sites is None) == (args.sample is None):
+        parser.error("give a site table or --sample N")
+    try:
+        sites = sample_sites(args.sample) if args.sample else load_sites(args.sites)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+
+    began = time.perf_counter()
+    portfolio = Portfolio(sites)
+    metrics = portfolio.metrics()
+    rollup = portfolio.rollup(args.by)
+    full = time.perf_counter() - began
+    print(f"{'group':<24} {'sites':>6} {'baseline NPV':>15} {'robotics NPV':>15} {'advantage':>15}")
+    for g in np.argsort(-rollup.npv_advantage)[:args.top]:
+        print(f"{rollup.labels[g][:24]:<24} {rollup.sites[g]:6d} {rollup.baseline_npv[g]:15,.0f} "
+              f"{rollup.robotics_npv[g]:15,.0f} {rollup.npv_advantage[g]:15,.0f}")
+    irr = "N/A" if np.isnan(metrics.robotics_irr) else f"{metrics.robotics_irr:.1%}"
+    print(f"\nportfolio of {len(portfolio):,} sites: baseline NPV ${metrics.baseline_npv:,.0f}, "
+          f"robotics NPV ${metrics.robotics_npv:,.0f} net of development, IRR {irr}")
+
+    site = portfolio.ids[0]
+    began = time.perf_counter()
+    portfolio.update_site(site, baseline_jobs=portfolio.fields["baseline_jobs"][0] + 1)
+    portfolio.metrics()
+    portfolio.rollup(args.by)
+    update = time.perf_counter() - began
+    print(f"full evaluation {full * 1e3:.1f} ms; one-site update and refresh {update * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
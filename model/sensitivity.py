@@ -0,0 +1,172 @@
+"""One-shot sensitivity analysis: tornado swings and elasticities.
+
+Every ±Δ perturbation of every input is packed into a single batch call.
+Where the model is smooth in an input, elasticities come from analytic
+derivatives of the yearly flows (and, for IRR, the implicit function theorem
+on the NPV-at-IRR equation); only the stage durations, which move step
+boundaries, fall back to the central differences from the batch.
+"""
+
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from model.batch import AssumptionBatch, run_batch
+from model.engine import ASSUMPTION_FIELDS, YEARS, Assumptions, with_investment
+
+# Step used when an input sits at zero and a relative step would vanish.
+ABSOLUTE_STEPS = {
+    "baseline_jobs": 1.0,
+    "baseline_rev": 5_000.0,
+    "baseline_exp": 5_000.0,
+    "stage1_cost": 10_000.0,
+    "stage2_cost": 10_000.0,
+    "stage1_duration": 0.1,
+    "stage2_duration": 0.1,
+}
+DEFAULT_ABSOLUTE_STEP = 0.01
+
+
+@dataclass(frozen=True)
+class SensitivityResult:
+    """Per-input tornado values and elasticities, aligned with ``names``.
+
+    ``*_low``/``*_high`` are model outputs with the input moved to ``low``/
+    ``high``; elasticities are % change in output per % change in input.
+    """
+
+    base: Assumptions
+    names: tuple[str, ...]
+    low: np.ndarray
+    high: np.ndarray
+    npv_low: np.ndarray
+    npv_high: np.ndarray
+    advantage_low: np.ndarray
+    advantage_high: np.ndarray
+    irr_low: np.ndarray
+    irr_high: np.ndarray
+    npv_elasticity: np.ndarray
+    advantage_elasticity: np.ndarray
+    irr_elasticity: np.ndarray
+    analytic: np.ndarray
+
+    def order(self, metric: str = "npv") -> np.ndarray:
+        """Input indices sorted by swing in ``metric`` (largest first), for tornado plots."""
+        swing = np.abs(getattr(self, f"{metric}_high") - getattr(self, f"{metric}_low"))
+        return np.argsort(-np.nan_to_num(swing))
+
+
+def perturbation_steps(a: Assumptions, rel_step: float) -> np.ndarray:
+    """Absolute step per input: ``rel_step`` of its value, or a fallback at zero."""
+    values = np.array([getattr(a, name) for name in ASSUMPTION_FIELDS], dtype=float)
+    fallback = np.array([ABSOLUTE_STEPS.get(name, DEFAULT_ABSOLUTE_STEP) for name in ASSUMPTION_FIELDS])
+    return np.where(values != 0, np.abs(values) * rel_step, fallback)
+
+
+def flow_gradients(a: Assumptions, years: np.ndarray = YEARS) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Analytic d(flow)/d(input) per year as ``(baseline, robotics)`` for smooth inputs."""
+    t = years.astype(float)
+    zero = np.zeros_like(t)
+    after1 = (t >= a.stage1_duration).astype(float)
+    after2 = after1 * (t >= a.stage2_duration)
+    jobs = a.baseline_jobs * (1 + a.uplift1 * after1 + a.uplift2 * after2)
+    growth = (1 + a.rev_growth) ** t
+    margin = a.baseline_rev * growth - a.baseline_exp * (1 - a.exp_reduction)
+    shrink = (1 + a.baseline_shrink) ** t
+    base_margin = a.baseline_rev - a.baseline_exp
+    return {
+        "baseline_jobs": (shrink * base_margin, jobs / a.baseline_jobs * margin),
+        "baseline_rev": (a.baseline_jobs * shrink, jobs * growth),
+        "baseline_exp": (-a.baseline_jobs * shrink, -jobs * (1 - a.exp_reduction)),
+        "baseline_shrink": (a.baseline_jobs * t * (1 + a.baseline_shrink) ** (t - 1) * base_margin, zero),
+        "stage1_cost": (zero, -(t < a.stage1_duration).astype(float) / a.stage1_duration),
+        "stage2_cost": (zero, -(t < a.stage2_duration).astype(float) / a.stage2_duration),
+        "uplift1": (zero, a.baseline_jobs * after1 * margin),
+        "uplift2": (zero, a.baseline_jobs * after2 * margin),
+        "rev_growth": (zero, jobs * a.baseline_rev * t * (1 + a.rev_growth) ** (t - 1)),
+        "exp_reduction": (zero, jobs * a.baseline_exp),
+    }
+
+
+def _analytic_gradients(
+    a: Assumptions, baseline_cf: np.ndarray, robotics_cf: np.ndarray, irr: float, years: np.ndarray = YEARS
+) -> dict[str, tuple[float, float, float]]:
+    """``(d robotics NPV, d NPV advantage, d IRR)`` per smooth input at the base case."""
+    discount = (1 + a.discount_rate) ** -years
+    has_irr = np.isfinite(irr)
+    if has_irr:
+        # NPV of the IRR flows (investment at t=0, operations from t=1) at r = IRR.
+        cf_for_irr = with_investment(robotics_cf, a)
+        v = 1 / (1 + irr)
+        t_irr = np.arange(len(cf_for_irr))
+        dp_dr = -np.sum(t_irr * cf_for_irr * v ** (t_irr + 1))
+    grads = {}
+    for name, (d_base, d_robo) in flow_gradients(a, years).items():
+        d_npv = float(np.sum(d_robo * discount))
+        d_adv = d_npv - float(np.sum(d_base * discount))
+        d_irr = np.nan
+        if has_irr:
+            d_invest = -1.0 if name in ("stage1_cost", "stage2_cost") else 0.0
+            d_p = d_invest + np.sum(d_robo * v ** (years + 1))
+            d_irr = float(-d_p / dp_dr)
+        grads[name] = (d_npv, d_adv, d_irr)
+
+    # Discounting itself: IRR does not depend on the discount rate.
+    d_disc = -years * discount / (1 + a.discount_rate)
+    d_npv = float(np.sum(robotics_cf * d_disc))
+    grads["discount_rate"] = (d_npv, d_npv - float(np.sum(baseline_cf * d_disc)), 0.0)
+    return grads
+
+
+def _elasticity(gradient, value, level):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(level != 0, gradient * value / level, np.nan)
+
+
+def analyze(a: Assumptions, rel_step: float = 0.10) -> SensitivityResult:
+    """Tornado swings for ±``rel_step`` on every input, from one batched model call."""
+    names = ASSUMPTION_FIELDS
+    k = len(names)
+    values = np.array([getattr(a, name) for name in names], dtype=float)
+    steps = perturbation_steps(a, rel_step)
+
+    # Row 0 is the base case, rows 1..k move one input down, rows k+1..2k up.
+    # Float columns: integer inputs (jobs, revenue, costs) would truncate their steps.
+    columns = {name: np.full(2 * k + 1, value, dtype=float) for name, value in asdict(a).items()}
+    for i, name in enumerate(names):
+        columns[name][1 + i] = values[i] - steps[i]
+        columns[name][1 + k + i] = values[i] + steps[i]
+    moved = np.array([[columns[name][1 + i], columns[name][1 + k + i]] for i, name in enumerate(names)])
+    if not np.allclose(moved, np.column_stack([values - steps, values + steps]), rtol=1e-12, atol=0):
+        raise ValueError("perturbed inputs do not hold their ±step values")
+    out = run_batch(AssumptionBatch(columns))
+    advantage = out.robotics_npv - out.baseline_npv
+    down, up = slice(1, k + 1), slice(k + 1, 2 * k + 1)
+
+    # Central differences, replaced by analytic gradients where the model is smooth.
+    grad_npv = (out.robotics_npv[up] - out.robotics_npv[down]) / (2 * steps)
+    grad_adv = (advantage[up] - advantage[down]) / (2 * steps)
+    grad_irr = (out.robotics_irr[up] - out.robotics_irr[down]) / (2 * steps)
+    analytic = np.zeros(k, dtype=bool)
+    gradients = _analytic_gradients(a, out.baseline_cf[0], out.robotics_cf[0], out.robotics_irr[0])
+    for name, (d_npv, d_adv, d_irr) in gradients.items():
+        i = names.index(name)
+        grad_npv[i], grad_adv[i], grad_irr[i] = d_npv, d_adv, d_irr
+        analytic[i] = True
+
+    return SensitivityResult(
+        base=a,
+        names=names,
+        low=values - steps,
+        high=values + steps,
+        npv_low=out.robotics_npv[down],
+        npv_high=out.robotics_npv[up],
+        advantage_low=advantage[down],
+        advantage_high=advantage[up],
+        irr_low=out.robotics_irr[down],
+        irr_high=out.robotics_irr[up],
+        npv_elasticity=_elasticity(grad_npv, values, out.robotics_npv[0]),
+        advantage_elasticity=_elasticity(grad_adv, values, advantage[0]),
+        irr_elasticity=_elasticity(grad_irr, values, out.robotics_irr[0]),
+        analytic=analytic,
+    )
@@ -0,0 +1,390 @@
+"""Persistent scenario store and content-addressed result cache.
+
+One SQLite file (WAL mode, so sessions and processes can share it) holds:
+
+* named assumption sets, so a presenter can save and reload a scenario;
+* numbered versions of the assumptions calibrated from historical ledgers
+  (see :mod:`model.calibrate`), each with the state needed to extend it,
+  as JSON; and
+* computed results keyed by a hash of what produced them: the result kind,
+  its inputs (dataclasses are hashed field by field) and the model version,
+  which is a digest of this package's source. Editing the model therefore
+  retires every cached result instead of serving stale numbers.
+
+Results are evicted least-recently-used once the cache outgrows its size
+budget; results from other model versions are only dropped by an explicit
+``evict``, since processes running other code may share the file. Whole
+stores can be exported and merged into another, so expensive overnight runs
+can be shipped to every presenter's machine.
+
+Usage from the repository root::
+
+    python -m model.store list
+    python -m model.store export backup.sqlite3
+    python -m model.store import backup.sqlite3
+"""
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+from model.engine import ASSUMPTION_FIELDS, Assumptions
+
+PACKAGE_DIR = Path(__file__).resolve().parent
+DEFAULT_PATH = Path(os.environ.get("NDT_SCENARIO_STORE", PACKAGE_DIR.parent / "scenarios" / "store.sqlite3"))
+DEFAULT_MAX_BYTES = 512 * 2**20
+# Puts check the size budget once this share of it has been written, not on every put.
+BUDGET_CHECK_SHARE = 1 / 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    name TEXT PRIMARY KEY,
+    assumptions TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_lru ON results (last_access);
+CREATE TABLE IF NOT EXISTS locks (
+    name TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calibrations (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    assumptions TEXT NOT NULL,
+    state TEXT NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL
+);
+"""
+
+# Calibrations once stored their state as pickles. Those rows are skipped,
+# never unpickled: anyone able to write the file could have planted them.
+_JSON_STATE = "typeof(state) = 'text'"
+
+
+def _source_digest() -> str:
+    digest = hashlib.sha256()
+    for path in sorted(PACKAGE_DIR.glob("*.py")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+MODEL_VERSION = _source_digest()
+
+
+def _canonical(value):
+    """JSON-ready form of ``value`` in which equal inputs always serialize identically."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        fields = {f.name: _canonical(getattr(value, f.name)) for f in dataclasses.fields(value)}
+        return {"__type__": type(value).__qualname__, **fields}
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return {"__array__": value.dtype.str, "shape": value.shape, "data": value.ravel().tolist()}
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, float) and value.is_integer():
+        # 40 and 40.0 are the same model input.
+        return int(value)
+    return value
+
+
+def result_key(kind: str, params, model_version: str = MODEL_VERSION) -> str:
+    """Content address of the ``kind`` result computed from ``params``."""
+    blob = json.dumps([kind, model_version, _canonical(params)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class ScenarioRecord:
+    """A named assumption set as stored."""
+
+    name: str
+    assumptions: Assumptions
+    note: str
+    updated: float
+
+
+@dataclass(frozen=True)
+class CalibrationRecord:
+    """A stored calibration version; ``state`` is the JSON data the calibrator saved to resume from."""
+
+    version: int
+    assumptions: Assumptions
+    state: dict
+    note: str
+    created: float
+
+
+class ScenarioStore:
+    """Named scenarios plus an LRU result cache in one SQLite file."""
+
+    def __init__(self, path: str | os.PathLike = DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._unchecked_bytes = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the store safe to share
+        # between threads, sessions and processes.
+        with closing(sqlite3.connect(self.path, timeout=30)) as db:
+            with db:
+                yield db
+
+    # ------------------------------------------------------------
+    # Named scenarios
+    # ------------------------------------------------------------
+
+    def save_scenario(self, name: str, assumptions: Assumptions, note: str = "") -> None:
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO scenarios (name, assumptions, note, updated) VALUES (?, ?, ?, ?)",
+                (name, json.dumps(asdict(assumptions)), note, time.time()),
+            )
+
+    def load_scenario(self, name: str) -> Assumptions | None:
+        with self._connect() as db:
+            row = db.execute("SELECT assumptions FROM scenarios WHERE name = ?", (name,)).fetchone()
+        return None if row is None else _assumptions(row[0])
+
+    def scenarios(self) -> list[ScenarioRecord]:
+        """Every saved scenario, most recently updated first."""
+        with self._connect() as db:
+            rows = db.execute("SELECT name, assumptions, note, updated FROM scenarios ORDER BY updated DESC")
+            return [ScenarioRecord(name, _assumptions(data), note, updated) for name, data, note, updated in rows]
+
+    def delete_scenario(self, name: str) -> bool:
+        with self._connect() as db:
+            return db.execute("DELETE FROM scenarios WHERE name = ?", (name,)).rowcount > 0
+
+    # ------------------------------------------------------------
+    # Calibrations
+    # ------------------------------------------------------------
+
+    def save_calibration(self, assumptions: Assumptions, state: dict, note: str = "") -> int:
+        """Store a new calibration version with its JSON-serializable ``state``; returns its number."""
+        with self._connect() as db:
+            return db.execute(
+                "INSERT INTO calibrations (assumptions, state, note, created) VALUES (?, ?, ?, ?)",
+                (json.dumps(asdict(assumptions)), json.dumps(state), note, time.time()),
+            ).lastrowid
+
+    def load_calibration(self, version: int | None = None) -> CalibrationRecord | None:
+        """Calibration ``version``, or the newest one; None if there is none."""
+        query = f"SELECT version, assumptions, state, note, created FROM calibrations WHERE {_JSON_STATE}"
+        with self._connect() as db:
+            if version is None:
+                row = db.execute(f"{query} ORDER BY version DESC LIMIT 1").fetchone()
+            else:
+                row = db.execute(f"{query} AND version = ?", (version,)).fetchone()
+        return None if row is None else _calibration(row)
+
+    def calibrations(self) -> list[CalibrationRecord]:
+        """Every stored calibration, newest first."""
+        with self._connect() as db:
+            rows = db.execute("SELECT version, assumptions, state, note, created FROM calibrations"
+                              f" WHERE {_JSON_STATE} ORDER BY version DESC").fetchall()
+        return [_calibration(row) for row in rows]
+
+    # ------------------------------------------------------------
+    # Result cache
+    # ------------------------------------------------------------
+
+    # The byte-level interface model.cache.SharedCache uses, so the store can
+    # back a shared cache for every process on this machine. Results are read
+    # and written through SharedCache, which signs what it pickles.
+
+    def get_payload(self, key: str, max_age: float | None = None) -> bytes | None:
+        """Stored bytes for ``key``, unless missing or older than ``max_age`` seconds."""
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT payload, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if max_age is not None and row[1] < now - max_age:
+                db.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            db.execute("UPDATE results SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return row[0]
+
+    def put_payload(self, key: str, kind: str, payload: bytes, ttl: float | None = None) -> None:
+        """Store ``payload`` under ``key``; ``ttl`` is enforced on read, through ``get_payload``'s ``max_age``."""
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO results (key, kind, model_version, payload, size, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, MODEL_VERSION, payload, len(payload), now, now),
+            )
+        self._unchecked_bytes += len(payload)
+        if self._unchecked_bytes >= self.max_bytes * BUDGET_CHECK_SHARE:
+            self._unchecked_bytes = 0
+            self.evict(stale=False)
+
+    def acquire(self, name: str, ttl: float) -> bool:
+        """Take the lock ``name`` for up to ``ttl`` seconds; False if another holder has it."""
+        now = time.time()
+        with self._connect() as db:
+            db.execute("DELETE FROM locks WHERE name = ? AND expires < ?", (name, now))
+            return db.execute("INSERT OR IGNORE INTO locks (name, expires) VALUES (?, ?)",
+                              (name, now + ttl)).rowcount == 1
+
+    def release(self, name: str) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM locks WHERE name = ?", (name,))
+
+    def evict(self, max_bytes: int | None = None, stale: bool = True) -> int:
+        """Drop results from other model versions (if ``stale``), then least recently used ones, until under budget.
+
+        Keys include the model version, so other versions' results are never
+        served here; they are kept on puts because processes running that code
+        may still share this file.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        with self._connect() as db:
+            if stale:
+                removed = db.execute("DELETE FROM results WHERE model_version != ?", (MODEL_VERSION,)).rowcount
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= budget:
+                return removed
+            doomed = []
+            for key, size in db.execute("SELECT key, size FROM results ORDER BY last_access"):
+                if total <= budget:
+                    break
+                doomed.append((key,))
+                total -= size
+            db.executemany("DELETE FROM results WHERE key = ?", doomed)
+        return removed + len(doomed)
+
+    def stats(self) -> dict:
+        with self._connect() as db:
+            scenarios = db.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0]
+            calibrations = db.execute("SELECT COUNT(*) FROM calibrations").fetchone()[0]
+            kinds = {
+                kind: {"entries": entries, "bytes": size, "hits": hits}
+                for kind, entries, size, hits in db.execute(
+                    "SELECT kind, COUNT(*), SUM(size), SUM(hits) FROM results GROUP BY kind ORDER BY kind"
+                )
+            }
+        return {"path": str(self.path), "model_version": MODEL_VERSION, "scenarios": scenarios,
+                "calibrations": calibrations, "results": kinds}
+
+    # ------------------------------------------------------------
+    # Bulk import / export
+    # ------------------------------------------------------------
+
+    def export(self, path: str | os.PathLike) -> None:
+        """Write a consistent copy of the whole store to ``path``."""
+        with closing(sqlite3.connect(self.path, timeout=30)) as source, closing(sqlite3.connect(path)) as target:
+            source.backup(target)
+
+    def merge(self, path: str | os.PathLike) -> tuple[int, int, int]:
+        """Import scenarios, calibrations and current-version results from another store file.
+
+        Scenarios keep whichever copy was updated last; calibrations not
+        already here are added as new versions, in the order they were made.
+        Returns the number of ``(scenarios, calibrations, results)`` rows imported.
+        """
+        with self._connect() as db:
+            db.execute("ATTACH DATABASE ? AS other", (str(path),))
+            try:
+                scenarios = db.execute(
+                    "INSERT OR REPLACE INTO scenarios SELECT o.* FROM other.scenarios o"
+                    " LEFT JOIN scenarios s ON s.name = o.name WHERE s.name IS NULL OR o.updated > s.updated"
+                ).rowcount
+                results = db.execute(
+                    "INSERT OR IGNORE INTO results SELECT * FROM other.results WHERE model_version = ?",
+                    (MODEL_VERSION,),
+                ).rowcount
+                calibrations = 0
+                # Stores written before calibrations existed lack the table.
+                if db.execute("SELECT 1 FROM other.sqlite_master WHERE name = 'calibrations'").fetchone():
+                    calibrations = db.execute(
+                        "INSERT INTO calibrations (assumptions, state, note, created)"
+                        " SELECT assumptions, state, note, created FROM other.calibrations o"
+                        f" WHERE {_JSON_STATE} AND NOT EXISTS (SELECT 1 FROM calibrations c WHERE c.created = o.created"
+                        " AND c.assumptions = o.assumptions) ORDER BY o.created"
+                    ).rowcount
+            finally:
+                db.commit()
+                db.execute("DETACH DATABASE other")
+        self.evict(stale=False)
+        return scenarios, calibrations, results
+
+
+def _calibration(row) -> CalibrationRecord:
+    version, assumptions, state, note, created = row
+    return CalibrationRecord(version, _assumptions(assumptions), json.loads(state), note, created)
+
+
+def _assumptions(data: str) -> Assumptions:
+    values = json.loads(data)
+    # Stores written by older models may lack newer inputs, or carry retired ones.
+    return Assumptions(**{name: values[name] for name in ASSUMPTION_FIELDS if name in values})
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect and move the scenario store.")
+    parser.add_argument("--store", default=DEFAULT_PATH, help=f"store file (default: {DEFAULT_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="saved scenarios and cache usage")
+    commands.add_parser("export", help="copy the whole store to a file").add_argument("path")
+    commands.add_parser("import", help="merge another store file into this one").add_argument("path")
+    commands.add_parser("delete", help="delete a saved scenario").add_argument("name")
+    evict = commands.add_parser("evict", help="drop other model versions' results and shrink the result cache")
+    evict.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20)
+    args = parser.parse_args(argv)
+
+    store = ScenarioStore(args.store)
+    if args.command == "list":
+        for record in store.scenarios():
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(record.updated))
+            print(f"{record.name:<30} {stamp}  {record.note}")
+        print(json.dumps(store.stats(), indent=2))
+    elif args.command == "export":
+        store.export(args.path)
+        print(f"exported {store.path} -> {args.path}")
+    elif args.command == "import":
+        if not Path(args.path).exists():
+            parser.error(f"{args.path} does not exist")
+        scenarios, calibrations, results = store.merge(args.path)
+        print(f"imported {scenarios} scenarios, {calibrations} calibrations and {results} results")
+    elif args.command == "delete":
+        if not store.delete_scenario(args.name):
+            parser.error(f"no scenario named {args.name!r}")
+    else:
+        print(f"evicted {store.evict(int(args.max_mb * 2**20))} results")
+
+
+if __name__ == "__main__":
+    main()
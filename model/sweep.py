@@ -0,0 +1,252 @@
+"""Multi-process full-factorial sweep runner.
+
+The grid is never materialized: every scenario is addressed by its flat index
+and decoded on the fly, so shards are just index ranges. Workers write their
+results straight into memory-mapped ``.npy`` files in the output directory
+and drop a small JSON marker per finished shard, which is what makes an
+interrupted run resumable.
+
+Usage from the repository root::
+
+    python -m model.sweep --out sweeps/board --axis uplift1=0:1:21 \\
+        --axis uplift2=0,0.5,1,1.5,2 --axis stage2_duration=0.5:3:11 --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from model.batch import AssumptionBatch, iter_batches
+from model.engine import ASSUMPTION_FIELDS, Assumptions
+
+DEFAULT_SHARD_SIZE = 1_000_000
+OUTPUTS = ("baseline_npv", "robotics_npv", "robotics_irr", "robotics_payback", "breakeven_year")
+
+
+@dataclass(frozen=True)
+class SweepSpec:
+    """A full-factorial grid over ``axes``; other inputs come from ``base``."""
+
+    axes: tuple[tuple[str, tuple[float, ...]], ...]
+    base: Assumptions = field(default_factory=Assumptions)
+
+    def __post_init__(self):
+        unknown = {name for name, _ in self.axes} - set(ASSUMPTION_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown sweep axes: {sorted(unknown)}")
+        empty = [name for name, values in self.axes if not values]
+        if empty:
+            raise ValueError(f"Sweep axes with no values: {empty}")
+
+    @classmethod
+    def from_axes(cls, base: Assumptions | None = None, **axes) -> "SweepSpec":
+        return cls(
+            axes=tuple((name, tuple(float(v) for v in values)) for name, values in axes.items()),
+            base=base or Assumptions(),
+        )
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return tuple(len(values) for _, values in self.axes)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    def rows(self, start: int, stop: int) -> AssumptionBatch:
+        """Decode flat grid indices ``[start, stop)`` into assumption rows."""
+        index = np.unravel_index(np.arange(start, stop), self.shape)
+        columns = asdict(self.base)
+        for (name, values), idx in zip(self.axes, index):
+            columns[name] = np.asarray(values)[idx]
+        if not self.axes:
+            columns = {name: np.full(stop - start, value) for name, value in columns.items()}
+        return AssumptionBatch(columns)
+
+    def to_json(self) -> dict:
+        return {"axes": [[name, list(values)] for name, values in self.axes], "base": asdict(self.base)}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "SweepSpec":
+        return cls(
+            axes=tuple((name, tuple(values)) for name, values in data["axes"]),
+            base=Assumptions(**data["base"]),
+        )
+
+
+@dataclass(frozen=True)
+class ShardSummary:
+    """What a finished shard reports back to the driver."""
+
+    shard: int
+    start: int
+    stop: int
+    best_npv: float
+    best_index: int
+    irr_p10: float
+    irr_p50: float
+    irr_p90: float
+    seconds: float
+    resumed: bool = False
+
+
+def _marker(out_dir: Path, shard: int) -> Path:
+    return out_dir / "shards" / f"{shard:06d}.json"
+
+
+def _open_outputs(out_dir: Path, mode: str, size: int | None = None) -> dict[str, np.memmap]:
+    return {
+        name: np.lib.format.open_memmap(
+            out_dir / f"{name}.npy", mode=mode, dtype=np.float64, shape=None if size is None else (size,)
+        )
+        for name in OUTPUTS
+    }
+
+
+def _run_shard(out_dir: str, spec_json: dict, shard: int, start: int, stop: int) -> ShardSummary:
+    began = time.perf_counter()
+    out_dir = Path(out_dir)
+    spec = SweepSpec.from_json(spec_json)
+    outputs = _open_outputs(out_dir, "r+")
+    for rows, chunk in iter_batches(spec.rows(start, stop)):
+        for name, array in outputs.items():
+            array[start + rows.start:start + rows.stop] = getattr(chunk, name)
+    for array in outputs.values():
+        array.flush()
+
+    npv = np.asarray(outputs["robotics_npv"][start:stop])
+    irr = np.asarray(outputs["robotics_irr"][start:stop])
+    best = int(np.argmax(npv))
+    p10, p50, p90 = (
+        np.nanpercentile(irr, (10, 50, 90)) if np.isfinite(irr).any() else (np.nan, np.nan, np.nan)
+    )
+    summary = ShardSummary(
+        shard=shard,
+        start=start,
+        stop=stop,
+        best_npv=float(npv[best]),
+        best_index=start + best,
+        irr_p10=float(p10),
+        irr_p50=float(p50),
+        irr_p90=float(p90),
+        seconds=time.perf_counter() - began,
+    )
+    # Write-then-rename so a crash never leaves a half-written marker behind.
+    marker = _marker(out_dir, shard)
+    tmp = marker.with_suffix(".tmp")
+    tmp.write_text(json.dumps(asdict(summary)))
+    os.replace(tmp, marker)
+    return summary
+
+
+def _prepare(spec: SweepSpec, out_dir: Path, shard_size: int) -> None:
+    manifest = {"spec": spec.to_json(), "size": spec.size, "shard_size": shard_size}
+    path = out_dir / "manifest.json"
+    if path.exists():
+        if json.loads(path.read_text()) != manifest:
+            raise ValueError(f"{out_dir} holds a different sweep; pick a new output directory")
+        return
+    (out_dir / "shards").mkdir(parents=True, exist_ok=True)
+    _open_outputs(out_dir, "w+", spec.size)
+    path.write_text(json.dumps(manifest, indent=2))
+
+
+def run_sweep(
+    spec: SweepSpec,
+    out_dir: str | os.PathLike,
+    workers: int | None = None,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+) -> Iterator[ShardSummary]:
+    """Evaluate ``spec`` across a process pool, yielding shard summaries as they finish.
+
+    Shards already completed in ``out_dir`` are reported first (``resumed``)
+    and not recomputed. Raises ``ValueError`` straight away if ``out_dir``
+    belongs to a different sweep.
+    """
+    out_dir = Path(out_dir)
+    _prepare(spec, out_dir, shard_size)
+    return _iter_shards(spec, out_dir, workers, shard_size)
+
+
+def _iter_shards(spec: SweepSpec, out_dir: Path, workers: int | None, shard_size: int) -> Iterator[ShardSummary]:
+    pending = []
+    for shard, start in enumerate(range(0, spec.size, shard_size)):
+        marker = _marker(out_dir, shard)
+        if marker.exists():
+            yield ShardSummary(**{**json.loads(marker.read_text()), "resumed": True})
+        else:
+            pending.append((shard, start, min(start + shard_size, spec.size)))
+    if not pending:
+        return
+
+    spec_json = spec.to_json()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_shard, str(out_dir), spec_json, *job) for job in pending]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def load_results(out_dir: str | os.PathLike) -> tuple[SweepSpec, dict[str, np.memmap]]:
+    """Open a finished sweep read-only: its spec and the per-scenario output arrays."""
+    out_dir = Path(out_dir)
+    manifest = json.loads((out_dir / "manifest.json").read_text())
+    return SweepSpec.from_json(manifest["spec"]), _open_outputs(out_dir, "r")
+
+
+def _parse_axis(text: str) -> tuple[str, list[float]]:
+    """``name=start:stop:num`` (inclusive linspace) or ``name=v1,v2,...``."""
+    name, _, values = text.partition("=")
+    if not values:
+        raise argparse.ArgumentTypeError(f"expected name=values, got {text!r}")
+    if ":" in values:
+        start, stop, num = values.split(":")
+        return name, np.linspace(float(start), float(stop), int(num)).tolist()
+    return name, [float(v) for v in values.split(",")]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a full-factorial sensitivity sweep across processes.")
+    parser.add_argument("--out", required=True, help="output directory (reused to resume)")
+    parser.add_argument("--axis", action="append", type=_parse_axis, default=[], metavar="NAME=VALUES",
+                        help="sweep axis as name=start:stop:num or name=v1,v2,...; repeatable")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        spec = SweepSpec.from_axes(**dict(args.axis))
+        summaries = run_sweep(spec, args.out, args.workers, args.shard_size)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"{spec.size:,} scenarios over {len(spec.axes)} axes -> {args.out}")
+    began = time.perf_counter()
+    best = None
+    done = computed = 0
+    for summary in summaries:
+        done += summary.stop - summary.start
+        computed += 0 if summary.resumed else summary.stop - summary.start
+        if best is None or summary.best_npv > best.best_npv:
+            best = summary
+        status = "resumed" if summary.resumed else f"{summary.seconds:.1f}s"
+        print(
+            f"shard {summary.shard:>5} [{status}] best NPV ${summary.best_npv:,.0f}  "
+            f"IRR P10/P50/P90 {summary.irr_p10:.1%}/{summary.irr_p50:.1%}/{summary.irr_p90:.1%}  "
+            f"({done:,}/{spec.size:,})",
+            flush=True,
+        )
+    elapsed = time.perf_counter() - began
+    print(f"done in {elapsed:.1f}s ({computed / elapsed:,.0f} scenarios/s computed)")
+    if best is not None:
+        winner = spec.rows(best.best_index, best.best_index + 1).row(0)
+        print(f"best NPV ${best.best_npv:,.0f} at " + ", ".join(f"{n}={getattr(winner, n):g}" for n, _ in spec.axes))
+
+
+if __name__ == "__main__":
+    main()
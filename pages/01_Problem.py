@@ -1,6 +1,7 @@
 """Problem Statement: The limitations of manual AU-E."""
 
 import streamlit as st
+from assets import show_image
 from utils import set_page, add_footer
 
 set_page()
@@ -44,6 +45,6 @@ with col1:
 
 
 with col2:
-    st.image("images/hammering.JPG")
+    show_image("hammering.JPG", alt="Manual AU-E inspection")
 
 add_footer()
@@ -1,6 +1,7 @@
 """Opportunity Statement: How robotics transforms AU-E."""
 
 import streamlit as st
+from assets import show_image
 from utils import set_page, add_footer
 
 set_page()
@@ -46,7 +47,7 @@ with col1:
     )
 
 with col2:
-    st.image("images/floaty_boaty.gif", width=800)
+    show_image("floaty_boaty.gif", width=800)
 
 
 add_footer()
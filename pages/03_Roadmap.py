@@ -1,6 +1,7 @@
 """Development Roadmap: Two-stage, de-risked execution plan."""
 
 import streamlit as st
+from assets import show_image
 from utils import set_page, add_footer
 
 set_page()
@@ -38,10 +39,11 @@ with col1:
         2. Early uplift and improved client perception create cash flow that partially funds Stage 2.
         3. Stage 1 field experience reduces integration challenges in Stage 2.
         4. Stage 2 then delivers the full value: coverage, speed, safety, and premium positioning.
+        5. Stage 2 is a decision, not a commitment: after Stage 1 we can proceed, resize, wait, or stop. The Financial Model's *Stage 2 Real Options* section puts a value on that flexibility.
         """
     )
 
 with col2:
-    st.image("images/Designer (4).png")
+    show_image("Designer (4).png")
 
 add_footer()
@@ -1,13 +1,53 @@
+import hashlib
+import io
+from dataclasses import replace
+from pathlib import Path
+
 import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.ticker import FuncFormatter
-import numpy_financial as npf
-import pandas as pd
 
+from charts import (
+    COLOR_BASELINE,
+    COLOR_ROBOTICS,
+    COLOR_STAGE1,
+    COLOR_STAGE2,
+    cash_flow_chart,
+    cash_flow_spec,
+    figure_png,
+    format_cad,
+    style_axes,
+)
+from model import Assumptions, ModelResult, baseline_cash_flow, run_model
+from model.cache import shared_cache
+from model.calibrate import CALIBRATED_FIELDS, Calibration, latest_calibration
+from model.export import draw_chunks, workbook_bytes, write_table
+from model.fleet import FleetResult, FleetSpec, simulate_fleet, simulation_inputs
+from model.engine import HORIZON_YEARS
+from model.goalseek import Goal, breakeven_curve, goal_seek, metric_surface
+from model.graph import OUTPUTS as GRAPH_OUTPUTS, ModelGraph, assumptions_read
+from model.periods import PeriodGrid
+from model.sensitivity import SensitivityResult, analyze
+from model.montecarlo import DISTRIBUTION_KINDS, Distribution, MonteCarloResult, MonteCarloSpec, simulate
+from model.options import OptionResult, OptionSpec, value_options
+from model.portfolio import GROUPINGS, Portfolio, load_sites, sample_sites, site_format
+from model.store import ScenarioStore
+from inputs import (
+    INPUT_BOUNDS,
+    PERCENT_INPUTS,
+    SLIDER_BOUNDS,
+    SLIDER_STEPS,
+    clipped_inputs,
+    starting_assumptions,
+    widget_assumptions,
+    widget_values,
+)
+import prefetch
+from tracing import span, traced
 from utils import set_page, add_footer
 
-set_page()
+set_page(warm=False)
 
 # ============================================================
 # STREAMLIT CONFIGURATION
@@ -16,21 +56,105 @@ set_page()
 st.title("💰 AU-E 5-Year Cash Flow Model")
 st.write("Baseline vs Robotics Development Scenarios")
 
+# ============================================================
+# INPUT METADATA
+# ============================================================
+
+INPUT_LABELS = {
+    "baseline_jobs": "Jobs per year",
+    "baseline_rev": "Revenue per job",
+    "baseline_exp": "Expense per job",
+    "baseline_shrink": "Annual shrink rate",
+    "stage1_cost": "Stage 1 cost",
+    "stage1_duration": "Stage 1 duration",
+    "stage2_cost": "Stage 2 cost",
+    "stage2_duration": "Stage 2 duration",
+    "uplift1": "Uplift after Stage 1",
+    "uplift2": "Uplift after Stage 2",
+    "rev_growth": "Revenue growth",
+    "exp_reduction": "Expense reduction",
+    "discount_rate": "Discount rate",
+}
+
+def format_input(name, value):
+    """Display an assumption value in the units its slider uses."""
+    if name in PERCENT_INPUTS:
+        return f"{value:.1%}"
+    if name.endswith("_duration"):
+        return f"{value:.2f} years"
+    if name == "baseline_jobs":
+        return f"{value:.1f} jobs"
+    return f"${value:,.0f}"
+
+# ============================================================
+# LEDGER CALIBRATION
+# ============================================================
+
+@st.cache_resource
+def scenario_store() -> ScenarioStore:
+    """Saved scenarios and heavy results, shared on disk by every session and server process."""
+    return ScenarioStore()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_calibration() -> tuple[int, Calibration] | None:
+    """The newest ledger calibration, rechecked every minute so a new version reaches running servers."""
+    return latest_calibration(scenario_store())
+
+calibration = cached_calibration()
+calibrated = calibration[1] if calibration else None
+# Baseline sliders start from the latest calibration; the rest keep the model defaults.
+defaults = widget_values(starting_assumptions(calibrated))
+if calibrated:
+    st.sidebar.caption(f"📐 Baseline defaults calibrated from ledgers {calibrated.first_month} to "
+                       f"{calibrated.last_month} ({calibrated.jobs:,} jobs, version {calibration[0]}), "
+                       "rounded to the slider steps.")
+    fitted = calibrated.assumptions
+    clipped = [name for name in clipped_inputs(fitted) if name in CALIBRATED_FIELDS]
+    if clipped:
+        st.warning("The latest calibration is outside the slider range for " + "; ".join(
+            f"{INPUT_LABELS[name].lower()} (fitted {format_input(name, getattr(fitted, name))}, starting at "
+            f"{format_input(name, min(max(getattr(fitted, name), INPUT_BOUNDS[name][0]), INPUT_BOUNDS[name][1]))})"
+            for name in clipped
+        ) + ", so the page runs on the nearest values its sliders can show.")
+
 # ============================================================
 # INPUTS IN EXPANDER (COLLAPSED BY DEFAULT)
 # ============================================================
 
-with st.expander("📊 Adjust Assumptions", expanded=False):
+RESOLUTION_GRIDS = {
+    "Annual (classic)": None,
+    "Monthly": PeriodGrid.from_resolution("monthly"),
+    "Weekly": PeriodGrid.from_resolution("weekly"),
+}
+
+# "On Apply" batches every input into one form submit, so dragging a slider
+# costs nothing until the investor presses Apply; "Live" reruns per change.
+input_mode = st.sidebar.radio(
+    "Assumption updates", ["On Apply", "Live"], key="input_mode",
+    help="On Apply recalculates once you press Apply; Live recalculates on every slider move.",
+)
+prefetch_enabled = st.sidebar.toggle(
+    "Prefetch next slider steps", key="prefetch_enabled", disabled=input_mode != "Live" or not prefetch.WORKERS,
+    help="With Live updates, compute the states one slider step away in the background so the next step "
+         "shows at once. Uses spare CPU only.",
+) and input_mode == "Live"
+
+with st.expander("📊 Adjust Assumptions", expanded=False), (
+    st.form("assumptions_form", border=False) if input_mode == "On Apply" else st.container()
+):
     tab_baseline, tab_robotics = st.tabs(["📋 Baseline AU-E", "🤖 Robotics Development"])
     
     with tab_baseline:
         col_base1, col_base2 = st.columns(2)
         with col_base1:
-            baseline_jobs = st.slider("Jobs per year", 20, 60, 40, key="baseline_jobs")
-            baseline_rev = st.slider("Revenue per job (CAD)", 50_000, 200_000, 150_000, step=5_000, key="baseline_rev")
+            baseline_jobs = st.slider("Jobs per year", 20, 60, defaults["baseline_jobs"], key="baseline_jobs")
+            baseline_rev = st.slider("Revenue per job (CAD)", 50_000, 200_000, defaults["baseline_rev"], step=5_000,
+                                     key="baseline_rev")
         with col_base2:
-            baseline_exp = st.slider("Expense per job (CAD)", 10_000, 100_000, 20_000, step=5_000, key="baseline_exp")
-            baseline_shrink = st.slider("Annual shrink rate (%)", -20, 20, -5, key="baseline_shrink") / 100
+            baseline_exp = st.slider("Expense per job (CAD)", 10_000, 100_000, defaults["baseline_exp"], step=5_000,
+                                     key="baseline_exp")
+            baseline_shrink = st.slider("Annual shrink rate (%)", -20, 20, defaults["baseline_shrink"],
+                                        key="baseline_shrink") / 100
 
     with tab_robotics:
         col_robotics1, col_robotics2 = st.columns(2)
@@ -46,234 +170,797 @@ with st.expander("📊 Adjust Assumptions", expanded=False):
             exp_reduction = st.slider("Expense reduction (%)", 0, 50, 10, key="exp_reduction") / 100
     
     discount_rate = st.slider("Discount rate for NPV (%)", 0, 20, 8, key="discount_rate") / 100
+    resolution = st.selectbox(
+        "Time resolution", list(RESOLUTION_GRIDS), key="resolution",
+        help="Monthly and weekly periods phase stage costs and uplifts in pro rata and discount each "
+             "flow at mid-period. Risk, sensitivity and goal-seek sections always use the annual model.",
+    )
+    if input_mode == "On Apply":
+        st.form_submit_button("Apply", type="primary")
+
+grid = RESOLUTION_GRIDS[resolution]
+
+assumptions = Assumptions(
+    baseline_jobs=baseline_jobs,
+    baseline_rev=baseline_rev,
+    baseline_exp=baseline_exp,
+    baseline_shrink=baseline_shrink,
+    stage1_cost=stage1_cost,
+    stage1_duration=stage1_duration,
+    stage2_cost=stage2_cost,
+    stage2_duration=stage2_duration,
+    uplift1=uplift1,
+    uplift2=uplift2,
+    rev_growth=rev_growth,
+    exp_reduction=exp_reduction,
+    discount_rate=discount_rate,
+)
 
-years = np.arange(0, 6)
+# ============================================================
+# OUTPUT DEPENDENCIES
+# ============================================================
+
+# The assumptions each output reads, from the model graph's node inputs.
+# Outputs are cached and redrawn on just these, so an input change only
+# recomputes what sits downstream of it: the discount rate moves the NPV
+# metrics and insights but leaves the cash-flow charts, the Monte Carlo fan
+# and the fleet simulation alone. The fleet simulation is keyed by
+# model.fleet.simulation_inputs, which its command line stores runs under too.
+ALL_INPUTS = assumptions_read(*GRAPH_OUTPUTS)
+CASH_FLOW_INPUTS = assumptions_read("baseline_cf", "robotics_cf")
+OUTPUT_INPUTS = {
+    "cash_flow_charts": CASH_FLOW_INPUTS,
+    "mc_fan": CASH_FLOW_INPUTS,
+    "tornado": ALL_INPUTS,
+    "surface": ALL_INPUTS,
+    "fleet_jobs": assumptions_read("robotics_jobs"),
+    # Valuing Stage 2 on its own, the option also ignores Stage 1's cost and uplift.
+    "real_options": assumptions_read("robotics_npv") - {"stage1_cost", "uplift1"},
+}
+DEFAULT_ASSUMPTIONS = Assumptions()
+
+def output_inputs(output: str, a: Assumptions) -> Assumptions:
+    """``a`` with every input ``output`` doesn't read reset to its default: what to key ``output`` on."""
+    unused = ALL_INPUTS - OUTPUT_INPUTS[output]
+    return a.replace(**{name: getattr(DEFAULT_ASSUMPTIONS, name) for name in unused})
+
+# Charts drawn here are shared across processes only while this page is unchanged.
+PAGE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+def render_png(output: str, draw) -> bytes:
+    with span("chart.draw", output=output):
+        fig = draw()
+    with span("chart.tight_layout", output=output):
+        fig.tight_layout()
+    return figure_png(fig)
+
+def draw_once(output: str, key, draw, shared: bool = True) -> bytes:
+    """PNG of the figure ``draw()`` builds, redrawn only when ``key`` changed since this session last drew it.
+
+    With ``shared``, ``key`` must determine the figure completely: the PNG is
+    then reused from, and offered to, every other session and replica.
+    """
+    drawn = st.session_state.setdefault("drawn_outputs", {})
+    if output not in drawn or drawn[output][0] != key:
+        if shared:
+            png = shared_cache().get_or_compute(f"chart.{output}", (PAGE_VERSION, key),
+                                                lambda: render_png(output, draw))
+        else:
+            png = render_png(output, draw)
+        drawn[output] = (key, png)
+    return drawn[output][1]
+
+def show_png(output: str, png: bytes):
+    """Send a rendered chart to the browser."""
+    with span("st.image", output=output, bytes=len(png)):
+        st.image(png, width="stretch")
 
 # ============================================================
-# MODEL FUNCTIONS
+# SPECULATIVE PREFETCH
 # ============================================================
 
-def baseline_cash_flow():
-    jobs = baseline_jobs
-    flows = []
-    for y in years:
-        if y > 0:
-            jobs *= (1 + baseline_shrink)
-        revenue = jobs * baseline_rev
-        expenses = jobs * baseline_exp
-        flows.append(revenue - expenses)
-    return np.array(flows)
+# States prefetched per rerun, most likely first; the rest are rarely reached before the next move.
+PREFETCH_STATES = 10
+
+def prefetch_compute(key, check):
+    """Model result or cash-flow chart for a prefetch key; runs on a pool thread."""
+    kind, a, grid, *rest = key
+    if kind == "model":
+        return shared_cache().get_or_compute("model", (a, grid), lambda: run_model(a, grid))
+    check()
+    return cash_flow_chart(a, rest[0], grid=grid, cache=False)
+
+def chart_key(a: Assumptions, cumulative: bool, grid: PeriodGrid | None):
+    return ("chart", output_inputs("cash_flow_charts", a), grid, cumulative)
+
+def schedule_prefetch(prefetcher: prefetch.Prefetcher, a: Assumptions, grid: PeriodGrid | None, charts: bool):
+    """Queue the likeliest next states of this session, after its rerun has drawn everything."""
+    values = widget_values(a)
+    states = prefetch.adjacent(values, SLIDER_STEPS, SLIDER_BOUNDS, st.session_state.get("prefetch_previous"))
+    st.session_state.prefetch_previous = values
+    keys = []
+    for state in states[:PREFETCH_STATES]:
+        nearby = widget_assumptions(state)
+        keys.append(("model", nearby, grid))
+        if charts:
+            keys += [chart_key(nearby, cumulative, grid) for cumulative in (False, True)]
+    prefetcher.schedule(keys)
+
+prefetcher = None
+if prefetch_enabled:
+    prefetcher = st.session_state.get("prefetcher")
+    if prefetcher is None:
+        prefetcher = st.session_state.prefetcher = prefetch.Prefetcher(prefetch_compute)
+    # Whatever was queued for the last state is stale now.
+    prefetcher.cancel()
 
-def robotics_cash_flow():
-    flows = []
-    for y in years:
-        # job uplift logic
-        if y < stage1_duration:
-            jobs = baseline_jobs
-        elif y < stage2_duration:
-            jobs = baseline_jobs * (1 + uplift1)
-        else:
-            jobs = baseline_jobs * (1 + uplift1 + uplift2)
+# ============================================================
+# RUN MODEL
+# ============================================================
 
-        revenue = jobs * baseline_rev * (1 + rev_growth)**y
-        expenses = jobs * baseline_exp * (1 - exp_reduction)
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_model(assumptions: Assumptions, grid: PeriodGrid | None, _graph: ModelGraph) -> ModelResult:
+    """Memoize the engine per assumption set so revisited slider states are free.
+
+    Results are read through the shared cache, so a state any session or
+    earlier server run has computed comes from disk. New states evaluate on
+    the session's model graph, which each rerun's fresh script thread could
+    not keep, so a slider move recomputes only the nodes downstream of that
+    input.
+    """
+    return shared_cache().get_or_compute("model", (assumptions, grid),
+                                         lambda: run_model(assumptions, grid, graph=_graph))
+
+model_graph = st.session_state.get("model_graph")
+if model_graph is None:
+    model_graph = st.session_state.model_graph = ModelGraph()
+prefetched = prefetcher.get(("model", assumptions, grid)) if prefetcher else None
+with span("model.cached_model", prefetched=prefetched is not None):
+    result = prefetched or cached_model(assumptions, grid, model_graph)
+
+years = result.years
+baseline_cf = result.baseline_cf
+robotics_cf = result.robotics_cf
+
+baseline_npv = result.baseline_npv
+robotics_npv = result.robotics_npv
 
-        dev_cost = 0
-        if y < stage1_duration:
-            dev_cost += stage1_cost / stage1_duration
-        if y < stage2_duration:
-            dev_cost += stage2_cost / stage2_duration
+# Baseline IRR doesn't apply (no investment), Robotics IRR shows return on investment
+baseline_irr = None
+robotics_irr = result.robotics_irr
+
+robotics_payback = result.robotics_payback
+breakeven_year = result.breakeven_year
+cumulative_advantage = result.cumulative_advantage
+
+# ============================================================
+# DISPLAY RESULTS - METRICS & GRAPHS
+# ============================================================
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Baseline NPV (CAD)", f"{round(baseline_npv/1000)*1000:,.0f}")
+col2.metric("Baseline IRR", "N/A (No Investment)")
+col3.metric("Robotics NPV (CAD)", f"{round(robotics_npv/1000)*1000:,.0f}")
+col4.metric("Robotics IRR", f"{robotics_irr*100:.1f}%" if robotics_irr else "N/A")
+
+# --- Cash flow charts: cached server renders or client-side Vega-Lite ---
+chart_mode = st.sidebar.radio(
+    "Chart rendering", ["Image", "Interactive"], key="chart_mode",
+    help="Interactive charts are drawn by your browser instead of being rendered on the server.",
+)
+for cumulative in (False, True):
+    if chart_mode == "Interactive":
+        st.vega_lite_chart(cash_flow_spec(result, cumulative), width="stretch")
+    else:
+        png = prefetcher.get(chart_key(assumptions, cumulative, grid)) if prefetcher else None
+        show_png("cash_flow_charts", png or cash_flow_chart(output_inputs("cash_flow_charts", assumptions),
+                                                            cumulative, grid=grid))
 
-        flows.append(revenue - expenses - dev_cost)
-    return np.array(flows)
+st.download_button(
+    "📥 Download Excel workbook", lambda: workbook_bytes(assumptions), file_name="au-e_cash_flow_model.xlsx",
+    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", on_click="ignore",
+    help="The annual model for the current inputs, with live formulas: edit the Inputs sheet to recalculate.",
+)
+
+st.info("💡 Tip: Expand the 'Adjust Assumptions' section above to modify model parameters, then press Apply "
+        "(or switch assumption updates to Live in the sidebar).")
+
+# ============================================================
+# SAVED SCENARIOS
+# ============================================================
 
-def npv(cashflows, rate):
-    return np.sum(cashflows / (1 + rate)**years)
+def load_scenario():
+    # Runs as a callback, before the widgets are created on the next rerun.
+    name = st.session_state.scenario_pick
+    loaded = scenario_store().load_scenario(name) if name else None
+    if loaded is not None:
+        st.session_state.update(widget_values(loaded))
+        st.toast(f"Loaded scenario '{name}'")
+
+def save_scenario(assumptions: Assumptions):
+    name = st.session_state.scenario_name.strip()
+    if not name:
+        st.toast("Enter a name to save this scenario")
+        return
+    scenario_store().save_scenario(name, assumptions)
+    st.session_state.scenario_pick = name
+    st.toast(f"Saved scenario '{name}'")
+
+def delete_scenario():
+    name = st.session_state.scenario_pick
+    if name and scenario_store().delete_scenario(name):
+        st.session_state.scenario_pick = None
+        st.toast(f"Deleted scenario '{name}'")
+
+with st.sidebar.expander("💾 Scenarios"):
+    saved = [record.name for record in scenario_store().scenarios()]
+    st.selectbox("Saved scenario", saved, index=None, placeholder="Choose a scenario", key="scenario_pick")
+    col_load, col_delete = st.columns(2)
+    col_load.button("Load", on_click=load_scenario, disabled=not saved, width="stretch")
+    col_delete.button("Delete", on_click=delete_scenario, disabled=not saved, width="stretch")
+    st.text_input("Save current inputs as", key="scenario_name")
+    st.button("Save", on_click=save_scenario, args=(assumptions,), width="stretch")
+
+# ============================================================
+# RISK SIMULATION
+# ============================================================
+
+MC_FIELDS = [name for name in INPUT_LABELS if name != "discount_rate"]
+MC_DEFAULTS = ["baseline_jobs", "uplift1", "uplift2", "rev_growth", "exp_reduction"]
+
+def draws_parquet(mc: MonteCarloResult) -> bytes:
+    buffer = io.BytesIO()
+    write_table(draw_chunks(mc), buffer, fmt="parquet")
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=16, show_spinner="Running simulation...")
+def cached_simulation(spec: MonteCarloSpec) -> MonteCarloResult:
+    """Memoize simulation runs per spec; draws are seeded, so results are stable."""
+    return shared_cache().memoize("montecarlo", simulate, spec)
+
+@st.fragment
+@traced("section.risk_simulation")
+def risk_simulation(assumptions: Assumptions):
+    """Monte Carlo section; its settings rerun only this fragment, not the page."""
+    if not st.toggle("Run Monte Carlo simulation", key="mc_enabled"):
+        return
+    with st.expander("⚙️ Simulation Settings", expanded=True):
+        uncertain = st.multiselect("Uncertain assumptions", MC_FIELDS, default=MC_DEFAULTS,
+                                   format_func=INPUT_LABELS.get, key="mc_fields")
+        distributions = []
+        for name in uncertain:
+            col_kind, col_spread = st.columns(2)
+            kind = col_kind.selectbox(f"{INPUT_LABELS[name]} distribution", DISTRIBUTION_KINDS,
+                                      index=1, key=f"mc_kind_{name}")
+            spread = 25
+            if calibrated and name in calibrated.std_devs:
+                # The ledgers' own variability, in this distribution's terms.
+                spread = min(max(round(calibrated.spread(name, kind) * 20) * 5, 5), 100)
+            spread = col_spread.slider(f"{INPUT_LABELS[name]} spread (±%)", 5, 100, spread, step=5,
+                                       key=f"mc_spread_{name}") / 100
+            distributions.append((name, Distribution.around(kind, getattr(assumptions, name), spread)))
+
+        col_mc1, col_mc2 = st.columns(2)
+        with col_mc1:
+            correlation = st.slider("Uplift ↔ revenue growth correlation", -0.7, 0.7, 0.5, step=0.1,
+                                    key="mc_correlation")
+            hurdle_rate = st.slider("Hurdle IRR (%)", 0, 100, 15, key="mc_hurdle") / 100
+        with col_mc2:
+            draws = st.number_input("Draws", 1_000, 1_000_000, 100_000, step=10_000, key="mc_draws")
+            seed = st.number_input("Random seed", 0, 2**31 - 1, 42, key="mc_seed")
+
+    correlations = tuple(
+        (uplift, "rev_growth", correlation)
+        for uplift in ("uplift1", "uplift2")
+        if correlation and uplift in uncertain and "rev_growth" in uncertain
+    )
+    spec = MonteCarloSpec(base=assumptions, distributions=tuple(distributions), correlations=correlations,
+                          draws=int(draws), seed=int(seed), hurdle_rate=hurdle_rate)
 
-def calculate_irr(cashflows):
     try:
-        irr_value = npf.irr(cashflows)
-        # Return None if IRR is NaN or inf
-        if irr_value is None or np.isnan(irr_value) or np.isinf(irr_value):
-            return None
-        return irr_value
-    except:
-        return None
-
-def calculate_payback_period(cashflows):
-    """Calculate payback period for robotics investment"""
-    cumsum = np.cumsum(cashflows)
-    # Find where cumsum crosses zero (investment is recovered)
-    for i, val in enumerate(cumsum):
-        if val >= 0:
-            if i == 0:
-                return 0
-            # Linear interpolation between points
-            prev_val = cumsum[i-1]
-            payback = i - 1 + (-prev_val) / (val - prev_val)
-            return payback
-    return None  # Never breaks even
-
-def calculate_breakeven_year(baseline_cf, robotics_cf):
-    """Calculate first year where robotics cumulative CF exceeds baseline"""
-    cumsum_baseline = np.cumsum(baseline_cf)
-    cumsum_robotics = np.cumsum(robotics_cf)
-
-    for i, (base, robo) in enumerate(zip(cumsum_baseline, cumsum_robotics)):
-        if robo > base:
-            if i == 0:
-                return 0
-            # Linear interpolation
-            base_prev = cumsum_baseline[i-1]
-            robo_prev = cumsum_robotics[i-1]
-            breakeven = i - 1 + (base_prev - robo_prev) / ((robo - base) - (robo_prev - base_prev))
-            return breakeven
-    return None  # Never breaks even
-
-def calculate_cumulative_advantage(baseline_cf, robotics_cf):
-    """Calculate total cumulative advantage by end of period"""
-    return np.sum(robotics_cf) - np.sum(baseline_cf)
-
-def robotics_cash_flow_with_investment():
-    """Cash flow for robotics including upfront investment impact"""
-    flows = [0]  # Year -1 placeholder (we'll modify year 0)
-    for y in years:
-        # job uplift logic
-        if y < stage1_duration:
-            jobs = baseline_jobs
-        elif y < stage2_duration:
-            jobs = baseline_jobs * (1 + uplift1)
+        with span("model.simulate", draws=spec.draws):
+            mc = cached_simulation(spec)
+    except ValueError as exc:
+        st.error(f"Cannot run simulation: {exc}")
+    else:
+        p10, p50, p90 = mc.npv_percentiles()
+        col_p10, col_p50, col_p90, col_risk = st.columns(4)
+        col_p10.metric("P10 Robotics NPV", f"${round(p10/1000)*1000:,.0f}")
+        col_p50.metric("P50 Robotics NPV", f"${round(p50/1000)*1000:,.0f}")
+        col_p90.metric("P90 Robotics NPV", f"${round(p90/1000)*1000:,.0f}")
+        col_risk.metric(f"P(IRR < {hurdle_rate:.0%})", f"{mc.prob_irr_below_hurdle:.1%}",
+                        f"{mc.prob_beats_baseline:.0%} of draws beat baseline NPV", delta_color="off")
+
+        def draw_fan() -> Figure:
+            # Simulations run on the annual model whatever the page's time resolution.
+            mc_baseline = baseline_cash_flow(assumptions)
+            fig3 = Figure(figsize=(13.5, 6))
+            ax3, ax4 = fig3.subplots(1, 2)
+            for axis, cumulative, title, baseline in (
+                (ax3, False, "Annual Cash Flow Fan", mc_baseline),
+                (ax4, True, "Cumulative Cash Flow Fan", np.cumsum(mc_baseline)),
+            ):
+                q10, q25, q50, q75, q90 = mc.fan(cumulative=cumulative)
+                years = mc.years
+                axis.fill_between(years, q10, q90, alpha=0.15, color=COLOR_ROBOTICS, label="Robotics P10–P90")
+                axis.fill_between(years, q25, q75, alpha=0.3, color=COLOR_ROBOTICS, label="Robotics P25–P75")
+                axis.plot(years, q50, linewidth=3, color=COLOR_ROBOTICS, label="Robotics P50")
+                axis.plot(years, baseline, linewidth=3, linestyle="--", color=COLOR_BASELINE, label="Baseline")
+                axis.set_title(title, fontsize=16, fontweight='bold', pad=15)
+                axis.set_xlabel("Year", fontsize=13, fontweight='bold')
+                axis.grid(True, linestyle="--", alpha=0.25, linewidth=0.8)
+                axis.legend(fontsize=10, loc='upper left', framealpha=0.98)
+                axis.yaxis.set_major_formatter(FuncFormatter(format_cad))
+                style_axes(fig3, axis)
+            return fig3
+
+        # The fan shows undiscounted flows, so neither the discount rate nor the hurdle redraws it.
+        fan_key = replace(spec, base=output_inputs("mc_fan", spec.base), hurdle_rate=0.0)
+        show_png("mc_fan", draw_once("mc_fan", fan_key, draw_fan))
+
+        st.download_button(
+            "📥 Download draws (Parquet)", lambda: draws_parquet(mc), file_name="monte_carlo_draws.parquet",
+            mime="application/vnd.apache.parquet", on_click="ignore",
+            help="Per-draw NPVs, IRR and robotics cash flows, for pandas, Power BI or DuckDB.",
+        )
+
+st.markdown("---")
+st.header("🎲 Risk Simulation")
+risk_simulation(assumptions)
+
+# ============================================================
+# SENSITIVITY
+# ============================================================
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_sensitivity(assumptions: Assumptions, rel_step: float) -> SensitivityResult:
+    """Memoize the tornado per assumption set so toggling the view is free."""
+    return analyze(assumptions, rel_step)
+
+@st.fragment
+@traced("section.sensitivity_analysis")
+def sensitivity_analysis(assumptions: Assumptions):
+    """Tornado section; its settings rerun only this fragment, not the page."""
+    if not st.toggle("Show tornado chart", key="tornado_enabled"):
+        return
+    col_metric, col_step = st.columns(2)
+    tornado_metric = col_metric.radio("Output", ["Robotics NPV", "NPV advantage", "Robotics IRR"],
+                                      horizontal=True, key="tornado_metric")
+    rel_step = col_step.slider("Input swing (±%)", 1, 50, 10, key="tornado_step") / 100
+    with span("model.sensitivity"):
+        sens = cached_sensitivity(assumptions, rel_step)
+
+    metric_key = {"Robotics NPV": "npv", "NPV advantage": "advantage", "Robotics IRR": "irr"}[tornado_metric]
+    lows, highs = getattr(sens, f"{metric_key}_low"), getattr(sens, f"{metric_key}_high")
+    # The tornado runs on the annual model, so centre it on the annual base case.
+    annual = cached_model(assumptions, None, model_graph)
+    centre = {"npv": annual.robotics_npv, "advantage": annual.robotics_npv - annual.baseline_npv,
+              "irr": annual.robotics_irr if annual.robotics_irr is not None else np.nan}[metric_key]
+    order = sens.order(metric_key)[::-1]
+
+    def draw_tornado() -> Figure:
+        fig_tornado = Figure(figsize=(13.5, 6))
+        ax_tornado = fig_tornado.subplots()
+        rows = np.arange(len(order))
+        ax_tornado.barh(rows, lows[order] - centre, left=centre, color=COLOR_BASELINE, alpha=0.85,
+                        label="Input −Δ")
+        ax_tornado.barh(rows, highs[order] - centre, left=centre, color=COLOR_ROBOTICS, alpha=0.85,
+                        label="Input +Δ")
+        ax_tornado.axvline(centre, color='#333333', linewidth=1)
+        ax_tornado.set_yticks(rows)
+        ax_tornado.set_yticklabels([INPUT_LABELS[sens.names[i]] for i in order], fontsize=11)
+        ax_tornado.set_title(f"{tornado_metric} Sensitivity (±{rel_step:.0%} per input)", fontsize=18,
+                             fontweight='bold', pad=20)
+        if metric_key == "irr":
+            ax_tornado.xaxis.set_major_formatter(FuncFormatter(lambda x, pos: f"{x:.0%}"))
         else:
-            jobs = baseline_jobs * (1 + uplift1 + uplift2)
+            ax_tornado.xaxis.set_major_formatter(FuncFormatter(format_cad))
+        ax_tornado.grid(True, axis='x', linestyle="--", alpha=0.25, linewidth=0.8)
+        ax_tornado.legend(fontsize=12, loc='lower right', framealpha=0.98)
+        style_axes(fig_tornado, ax_tornado)
+        return fig_tornado
+
+    tornado_key = (output_inputs("tornado", assumptions), rel_step, metric_key)
+    show_png("tornado", draw_once("tornado", tornado_key, draw_tornado))
+
+    elasticity = getattr(sens, f"{metric_key}_elasticity")
+    st.dataframe(
+        {
+            "Input": [INPUT_LABELS[name] for name in sens.names],
+            "Elasticity": np.round(elasticity, 3),
+            "Method": ["analytic" if flag else "finite difference" for flag in sens.analytic],
+        },
+        hide_index=True,
+        width="stretch",
+    )
+    st.caption("Elasticity: % change in the output for a 1% change in the input, at the current assumptions.")
 
-        revenue = jobs * baseline_rev * (1 + rev_growth)**y
-        expenses = jobs * baseline_exp * (1 - exp_reduction)
+st.markdown("---")
+st.header("🌪️ Sensitivity Analysis")
+sensitivity_analysis(assumptions)
 
-        dev_cost = 0
-        if y < stage1_duration:
-            dev_cost += stage1_cost / stage1_duration
-        if y < stage2_duration:
-            dev_cost += stage2_cost / stage2_duration
+# ============================================================
+# GOAL SEEK
+# ============================================================
 
-        flows.append(revenue - expenses - dev_cost)
+GOAL_METRICS = {
+    "npv_advantage": "NPV advantage over baseline (CAD)",
+    "robotics_npv": "Robotics NPV (CAD)",
+    "robotics_irr": "Robotics IRR (%)",
+    "robotics_payback": "Robotics payback (years)",
+    "breakeven_year": "Breakeven vs baseline (year)",
+}
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_goal_seek(assumptions: Assumptions, name: str, goal: Goal, find: str):
+    return goal_seek(assumptions, name, INPUT_BOUNDS[name], goal, find)
+
+@st.cache_data(max_entries=16, show_spinner="Computing breakeven surface...")
+def cached_surface(assumptions: Assumptions, x_name: str, y_name: str, goal: Goal, find: str, resolution: int):
+    """Metric surface plus the solved goal boundary over an x-by-y grid."""
+    x_values = np.linspace(*INPUT_BOUNDS[x_name], resolution)
+    y_values = np.linspace(*INPUT_BOUNDS[y_name], resolution)
+    surface = metric_surface(assumptions, x_name, x_values, y_name, y_values, goal.metric)
+    boundary = breakeven_curve(assumptions, x_name, x_values, y_name, INPUT_BOUNDS[y_name], goal, find)
+    return x_values, y_values, surface, boundary
+
+@st.fragment
+@traced("section.goal_seek_section")
+def goal_seek_section(assumptions: Assumptions):
+    """Goal seek and breakeven surface; their settings rerun only this fragment."""
+    if not st.toggle("Solve for a target", key="goal_enabled"):
+        return
+    col_goal1, col_goal2, col_goal3 = st.columns(3)
+    with col_goal1:
+        goal_metric = st.selectbox("Target metric", list(GOAL_METRICS), format_func=GOAL_METRICS.get,
+                                   key="goal_metric")
+        goal_op = st.selectbox("Condition", [">=", ">", "<=", "<"], key="goal_op")
+    with col_goal2:
+        goal_target = st.number_input("Target value", value=1_000_000.0, key="goal_target")
+        if goal_metric == "robotics_irr":
+            goal_target /= 100
+    with col_goal3:
+        goal_input = st.selectbox("Solve for", list(INPUT_LABELS), index=9, format_func=INPUT_LABELS.get,
+                                  key="goal_input")
+        goal_find = st.radio("Find", ["min", "max"], horizontal=True,
+                             format_func={"min": "Minimum", "max": "Maximum"}.get, key="goal_find")
+    goal = Goal(goal_metric, goal_op, goal_target)
+
+    with span("model.goal_seek"):
+        solution = cached_goal_seek(assumptions, goal_input, goal, goal_find)
+    low, high = INPUT_BOUNDS[goal_input]
+    label = f"{'Minimum' if goal_find == 'min' else 'Maximum'} {INPUT_LABELS[goal_input].lower()}"
+    if solution is None:
+        st.warning(f"⚠️ No {INPUT_LABELS[goal_input].lower()} between {format_input(goal_input, low)} and "
+                   f"{format_input(goal_input, high)} meets the target.")
+    else:
+        st.metric(label, format_input(goal_input, solution),
+                  f"Current: {format_input(goal_input, getattr(assumptions, goal_input))}", delta_color="off")
+
+    st.subheader("Breakeven Surface")
+    col_surf1, col_surf2, col_surf3 = st.columns(3)
+    surface_x = col_surf1.selectbox("X axis", list(INPUT_LABELS), index=8, format_func=INPUT_LABELS.get,
+                                    key="surface_x")
+    surface_y = col_surf2.selectbox("Y axis", [n for n in INPUT_LABELS if n != surface_x], index=6,
+                                    format_func=INPUT_LABELS.get, key="surface_y")
+    resolution = col_surf3.slider("Grid resolution", 50, 500, 200, step=50, key="surface_resolution")
+
+    with span("model.surface", resolution=resolution):
+        x_values, y_values, surface, boundary = cached_surface(assumptions, surface_x, surface_y, goal, goal_find,
+                                                               resolution)
+    def draw_surface() -> Figure:
+        fig_surface = Figure(figsize=(13.5, 6))
+        ax_surface = fig_surface.subplots()
+        filled = ax_surface.contourf(x_values, y_values, np.nan_to_num(surface, nan=np.nanmin(surface)),
+                                     levels=20, cmap="RdYlGn" if goal_op.startswith(">") else "RdYlGn_r")
+        cbar = fig_surface.colorbar(filled, ax=ax_surface)
+        cbar.set_label(GOAL_METRICS[goal_metric], fontsize=11)
+        boundary_label = f"{'Min' if goal_find == 'min' else 'Max'} {INPUT_LABELS[surface_y].lower()} meeting target"
+        ax_surface.plot(x_values, boundary, color='#1a1a1a', linewidth=3, label=boundary_label)
+        ax_surface.scatter([getattr(assumptions, surface_x)], [getattr(assumptions, surface_y)], s=120,
+                           color='white', edgecolor='black', zorder=5, label="Current assumptions")
+        ax_surface.set_title(f"{GOAL_METRICS[goal_metric]} {goal_op} {goal_target:,.4g}", fontsize=18,
+                             fontweight='bold', pad=20)
+        ax_surface.set_xlabel(INPUT_LABELS[surface_x], fontsize=13, fontweight='bold')
+        ax_surface.set_ylabel(INPUT_LABELS[surface_y], fontsize=13, fontweight='bold')
+        ax_surface.legend(fontsize=11, loc='best', framealpha=0.98)
+        style_axes(fig_surface, ax_surface)
+        return fig_surface
+
+    surface_key = (output_inputs("surface", assumptions), surface_x, surface_y, goal, goal_find, resolution)
+    show_png("surface", draw_once("surface", surface_key, draw_surface))
 
-    # Replace first element with negative initial investment for IRR calculation
-    flows[0] = -(stage1_cost + stage2_cost)
-    return np.array(flows)
+st.markdown("---")
+st.header("🎯 Goal Seek")
+goal_seek_section(assumptions)
 
 # ============================================================
-# RUN MODEL
+# FLEET CAPACITY
 # ============================================================
 
-baseline_cf = baseline_cash_flow()
-robotics_cf = robotics_cash_flow()
+@st.cache_data(max_entries=16, show_spinner="Simulating fleet...")
+def cached_fleet(assumptions: Assumptions, spec: FleetSpec, replications: int, seed: int) -> FleetResult:
+    """Memoize fleet runs; replications are seeded, so results are stable."""
+    return shared_cache().memoize("fleet", simulate_fleet, assumptions, spec, replications, seed)
+
+@st.fragment
+@traced("section.fleet_capacity")
+def fleet_capacity(assumptions: Assumptions):
+    """Fleet simulation; its settings rerun only this fragment, not the page."""
+    if not st.toggle("Simulate crew and robot capacity", key="fleet_enabled"):
+        return
+    with st.expander("⚙️ Fleet Settings", expanded=True):
+        col_fleet1, col_fleet2, col_fleet3 = st.columns(3)
+        with col_fleet1:
+            crews = st.slider("Inspection crews", 1, 10, 3, key="fleet_crews")
+            robots = st.slider("Robotic units (from Stage 1)", 0, 10, 2, key="fleet_robots")
+        with col_fleet2:
+            job_days = st.slider("Manual job length (days)", 1.0, 20.0, 5.0, step=0.5, key="fleet_job_days")
+            window_days = st.slider("Mean outage window (days)", 1, 60, 14, key="fleet_window_days")
+            travel_days = st.slider("Mean travel time (days)", 0.0, 10.0, 2.0, step=0.5, key="fleet_travel_days")
+        with col_fleet3:
+            stage1_speedup = st.slider("Robot speed-up after Stage 1 (x)", 1.0, 5.0, 1.5, step=0.1,
+                                       key="fleet_stage1_speedup")
+            stage2_speedup = st.slider("Robot speed-up after Stage 2 (x)", 1.0, 5.0, 2.5, step=0.1,
+                                       key="fleet_stage2_speedup")
+            replications = st.number_input("Replications", 100, 10_000, 500, step=100, key="fleet_replications")
+    spec = FleetSpec(crews=crews, robots=robots, job_days=job_days, travel_days=travel_days,
+                     window_days=window_days, stage1_speedup=stage1_speedup, stage2_speedup=stage2_speedup)
+    # The simulation never discounts, so a new discount rate only revalues its flows.
+    with span("model.fleet", replications=int(replications)):
+        fleet = cached_fleet(simulation_inputs(assumptions), spec, int(replications), 0)
+    fleet = fleet.at_discount_rate(assumptions.discount_rate)
+
+    fleet_p10, fleet_p50, fleet_p90 = fleet.npv_percentiles()
+    col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+    col_f1.metric("Jobs completed", f"{fleet.fill_rate:.1%}", "of outages offered", delta_color="off")
+    col_f2.metric("Crew utilization", f"{np.mean(fleet.utilization):.0%}")
+    col_f3.metric("P50 Robotics NPV", f"${round(fleet_p50/1000)*1000:,.0f}",
+                  f"{fleet_p50 - fleet.naive_npv:+,.0f} vs sliders")
+    col_f4.metric("P10 / P90 NPV", f"${fleet_p10/1e6:.1f}M / ${fleet_p90/1e6:.1f}M")
+
+    def draw_jobs() -> Figure:
+        jobs_p10, jobs_p50, jobs_p90 = fleet.job_percentiles()
+        fig_fleet = Figure(figsize=(13.5, 6))
+        ax_fleet = fig_fleet.subplots()
+        ax_fleet.fill_between(fleet.years, jobs_p10, jobs_p90, alpha=0.2, color=COLOR_ROBOTICS,
+                              label="Simulated P10–P90")
+        ax_fleet.plot(fleet.years, jobs_p50, linewidth=4, marker='s', markersize=10, color=COLOR_ROBOTICS,
+                      label="Simulated P50")
+        ax_fleet.plot(fleet.years, fleet.naive_jobs, linewidth=3, linestyle="--", marker='o', markersize=8,
+                      color=COLOR_BASELINE, label="Uplift sliders")
+        ax_fleet.set_title("Jobs per Year: Capacity-Limited vs Sliders", fontsize=18, fontweight='bold', pad=20)
+        ax_fleet.set_xlabel("Year", fontsize=13, fontweight='bold')
+        ax_fleet.set_ylabel("Jobs", fontsize=13, fontweight='bold')
+        ax_fleet.grid(True, linestyle="--", alpha=0.25, linewidth=0.8)
+        ax_fleet.legend(fontsize=12, loc='best', framealpha=0.98)
+        style_axes(fig_fleet, ax_fleet)
+        return fig_fleet
+
+    jobs_key = (output_inputs("fleet_jobs", assumptions), spec, int(replications))
+    show_png("fleet_jobs", draw_once("fleet_jobs", jobs_key, draw_jobs))
 
-baseline_npv = npv(baseline_cf, discount_rate)
-robotics_npv = npv(robotics_cf, discount_rate)
+st.markdown("---")
+st.header("🚚 Fleet Capacity")
+fleet_capacity(assumptions)
 
-# For IRR calculation, use investment-based cash flows
-robotics_cf_for_irr = robotics_cash_flow_with_investment()
+# ============================================================
+# STAGE 2 REAL OPTIONS
+# ============================================================
 
-# Baseline IRR doesn't apply (no investment), Robotics IRR shows return on investment
-baseline_irr = None
-robotics_irr = calculate_irr(robotics_cf_for_irr)
+OPTION_SCALES = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0]
+SCALE_COLORS = [COLOR_STAGE1, COLOR_STAGE2, COLOR_ROBOTICS, COLOR_BASELINE, '#6F42C1', '#333333']
+
+@st.cache_data(max_entries=16, show_spinner="Valuing Stage 2 options...")
+def cached_options(spec: OptionSpec) -> OptionResult:
+    """Memoize valuations per spec; paths are seeded, so results are stable."""
+    return shared_cache().memoize("options", value_options, spec)
+
+@st.fragment
+@traced("section.real_options")
+def real_options(assumptions: Assumptions):
+    """Stage 2 option valuation; its settings rerun only this fragment, not the page."""
+    if not st.toggle("Value Stage 2 as an option", key="options_enabled"):
+        return
+    with st.expander("⚙️ Option Settings", expanded=True):
+        col_opt1, col_opt2, col_opt3 = st.columns(3)
+        with col_opt1:
+            uplift_vol = st.slider("Uplift volatility (%/year)", 0, 100, 40, step=5, key="options_uplift_vol") / 100
+            growth_vol = st.slider("Revenue per job volatility (%/year)", 0, 50, 10, key="options_growth_vol") / 100
+        with col_opt2:
+            correlation = st.slider("Uplift ↔ revenue correlation", -0.9, 0.9, 0.5, step=0.1,
+                                    key="options_correlation")
+            scales = st.multiselect("Stage 2 scales", OPTION_SCALES, default=[0.5, 1.0, 1.5],
+                                    format_func=lambda scale: f"{scale:g}x", key="options_scales")
+            scale_returns = st.slider("Uplift returns to scale", 0.5, 1.0, 0.8, step=0.05,
+                                      key="options_scale_returns",
+                                      help="Stage 2 at scale s costs s times as much for s^returns times the uplift.")
+        with col_opt3:
+            paths = st.number_input("Paths", 1_000, 200_000, 50_000, step=5_000, key="options_paths")
+            steps = st.number_input("Time steps", 50, 1_000, 500, step=50, key="options_steps")
 
-# Calculate payback period
-robotics_payback = calculate_payback_period(np.cumsum(robotics_cf))
+    try:
+        spec = OptionSpec(base=output_inputs("real_options", assumptions), uplift_vol=uplift_vol,
+                          growth_vol=growth_vol, correlation=correlation, scales=tuple(sorted(scales)),
+                          scale_returns=scale_returns, steps=int(steps), paths=int(paths))
+        with span("model.options", paths=spec.paths, steps=spec.steps):
+            options = cached_options(spec)
+    except ValueError as exc:
+        st.error(f"Cannot value Stage 2: {exc}")
+        return
+
+    col_o1, col_o2, col_o3, col_o4 = st.columns(4)
+    col_o1.metric("Stage 2 NPV, committed", f"${round(options.committed_value/1000)*1000:,.0f}",
+                  f"{options.committed_scale:g}x as soon as Stage 1 ends: {options.resize_value:+,.0f} vs plan",
+                  delta_color="off",
+                  help="The best single scale, chosen up front. The plan builds Stage 2 at 1x, worth "
+                       f"${options.planned_value:,.0f}.")
+    col_o2.metric("Stage 2 NPV, flexible", f"${round(options.flexible_value/1000)*1000:,.0f}",
+                  f"± ${options.std_error:,.0f} standard error", delta_color="off")
+    col_o3.metric("Value of flexibility", f"${round(options.option_value/1000)*1000:,.0f}",
+                  help="What deciding when, how big and whether to build adds to the best up-front commitment.")
+    col_o4.metric("P(abandon Stage 2)", f"{options.prob_abandon:.1%}")
+
+    def draw_starts() -> Figure:
+        fig_starts = Figure(figsize=(13.5, 6))
+        ax_starts = fig_starts.subplots()
+        bins = np.arange(0, HORIZON_YEARS + 0.25, 0.25)
+        chosen = list(options.scale_shares())
+        started = [options.exercise_time[options.exercise_scale == scale] for scale in chosen]
+        if chosen:
+            ax_starts.hist(started, bins=bins, stacked=True, weights=[np.full(len(t), 1 / spec.paths) for t in started],
+                           color=[SCALE_COLORS[OPTION_SCALES.index(scale)] for scale in chosen],
+                           label=[f"Start at {scale:g}x" for scale in chosen])
+            ax_starts.legend(fontsize=12, loc='best', framealpha=0.98)
+        ax_starts.set_title(f"When Stage 2 Starts (abandoned on {options.prob_abandon:.1%} of paths)", fontsize=18,
+                            fontweight='bold', pad=20)
+        ax_starts.set_xlabel("Year", fontsize=13, fontweight='bold')
+        ax_starts.set_ylabel("Share of paths", fontsize=13, fontweight='bold')
+        ax_starts.yaxis.set_major_formatter(FuncFormatter(lambda y, pos: f"{y:.0%}"))
+        ax_starts.set_xlim(0, HORIZON_YEARS)
+        ax_starts.grid(True, axis='y', linestyle="--", alpha=0.25, linewidth=0.8)
+        style_axes(fig_starts, ax_starts)
+        return fig_starts
+
+    show_png("option_starts", draw_once("option_starts", spec, draw_starts))
+    st.caption(
+        f"Stage 2 may start once Stage 1 ends (year {assumptions.stage1_duration:g}) and then takes "
+        f"{spec.build_years:.2g} years to build, as in the plan. Values cover Stage 2's own flows only, "
+        "discounted to today; paths move the realized uplift and revenue per job, and waiting is valued by "
+        "least-squares Monte Carlo."
+    )
 
-# Calculate break-even year and cumulative advantage
-breakeven_year = calculate_breakeven_year(baseline_cf, robotics_cf)
-cumulative_advantage = calculate_cumulative_advantage(baseline_cf, robotics_cf)
+st.markdown("---")
+st.header("🧭 Stage 2 Real Options")
+real_options(assumptions)
 
 # ============================================================
-# DISPLAY RESULTS - METRICS & GRAPHS
+# SITE PORTFOLIO
 # ============================================================
 
-# Professional color palette - vibrant and attractive for investors
-COLOR_BASELINE = '#0066CC'  # Professional Blue
-COLOR_ROBOTICS = '#00C851'  # Vibrant Green
+PORTFOLIO_TOP_GROUPS = 15
+
+@st.cache_data(max_entries=8, show_spinner="Reading site table...")
+def cached_sites(data: bytes, name: str) -> dict[str, np.ndarray]:
+    """Parse an uploaded site table once per file, not on every rerun."""
+    return load_sites(io.BytesIO(data), site_format(name))
+
+def session_portfolio(sites_key, load, assumptions: Assumptions) -> Portfolio:
+    """This session's portfolio, kept across reruns so site edits stick until the table changes."""
+    held = st.session_state.get("portfolio")
+    if held is None or held[0] != sites_key:
+        with span("model.portfolio_build"):
+            held = (sites_key, Portfolio(load(), assumptions))
+        st.session_state["portfolio"] = held
+    portfolio = held[1]
+    with span("model.portfolio_company"):
+        portfolio.set_company(assumptions)
+    return portfolio
+
+def format_millions(value: float) -> str:
+    return f"${value/1e6:,.1f}M"
+
+@st.fragment
+@traced("section.site_portfolio")
+def site_portfolio(assumptions: Assumptions):
+    """Portfolio rollups; uploads and site edits rerun only this fragment, and edits recompute one site."""
+    if not st.toggle("Roll up a portfolio of client sites", key="portfolio_enabled"):
+        return
+    with st.expander("⚙️ Portfolio Settings", expanded=True):
+        col_port1, col_port2 = st.columns(2)
+        with col_port1:
+            upload = st.file_uploader(
+                "Site table (CSV or Parquet)", type=["csv", "parquet"], key="portfolio_file",
+                help="One row per site: site, client, region, segment, and any of jobs per year, revenue and "
+                     "expense per job, shrink, uplifts, growth and expense reduction, plus robot_share (the "
+                     "fraction of jobs robots can serve). Missing columns take the sliders' values.",
+            )
+        with col_port2:
+            sample_size = st.number_input("Sample sites (without a table)", 100, 50_000, 10_000, step=1_000,
+                                          key="portfolio_sample", disabled=upload is not None)
+            grouping = st.radio("Roll up by", GROUPINGS, format_func=str.title, horizontal=True,
+                                key="portfolio_grouping")
 
-# Function to format y-axis as CAD currency
-def format_cad(x, pos):
-    if x >= 1_000_000:
-        return f"${x/1_000_000:.1f}M"
-    elif x >= 1_000:
-        return f"${x/1_000:.0f}K"
+    try:
+        if upload is None:
+            sites_key = ("sample", int(sample_size))
+            portfolio = session_portfolio(sites_key, lambda: sample_sites(int(sample_size)), assumptions)
+        else:
+            sites_key = ("upload", upload.file_id)
+            portfolio = session_portfolio(sites_key, lambda: cached_sites(upload.getvalue(), upload.name),
+                                          assumptions)
+    except ValueError as exc:
+        st.error(f"Cannot read the site table: {exc}")
+        return
+
+    site = st.text_input("Edit site", portfolio.ids[0], key="portfolio_site",
+                         help="Changing one site recomputes only that site and the groups it belongs to.")
+    i = portfolio.index(site)
+    if i is None:
+        st.warning(f"No site {site!r} in the table.")
     else:
-        return f"${x:.0f}"
-
-col1, col2, col3, col4 = st.columns(4)
-col1.metric("Baseline NPV (CAD)", f"{round(baseline_npv/1000)*1000:,.0f}")
-col2.metric("Baseline IRR", "N/A (No Investment)")
-col3.metric("Robotics NPV (CAD)", f"{round(robotics_npv/1000)*1000:,.0f}")
-col4.metric("Robotics IRR", f"{robotics_irr*100:.1f}%" if robotics_irr else "N/A")
-
-# --- Plot cash flows with enhanced styling ---
-fig, ax = plt.subplots(figsize=(13.5, 6))
-
-# Add stage indicators
-ax.axvspan(0, stage1_duration, alpha=0.1, color='#FF6B6B', label='Stage 1 Development')
-ax.axvspan(stage1_duration, stage2_duration, alpha=0.1, color='#FFA500', label='Stage 2 Development')
-
-ax.plot(years, baseline_cf, label="Baseline", linewidth=4, marker='o', markersize=10,
-        color=COLOR_BASELINE, markerfacecolor=COLOR_BASELINE, markeredgewidth=2, markeredgecolor='white')
-ax.plot(years, robotics_cf, label="Robotics", linewidth=4, marker='s', markersize=10,
-        color=COLOR_ROBOTICS, markerfacecolor=COLOR_ROBOTICS, markeredgewidth=2, markeredgecolor='white')
-ax.set_title("Annual Cash Flow Comparison", fontsize=18, fontweight='bold', pad=20)
-ax.set_xlabel("Year", fontsize=13, fontweight='bold')
-ax.set_ylabel("Cash Flow (CAD)", fontsize=13, fontweight='bold')
-ax.grid(True, linestyle="--", alpha=0.25, linewidth=0.8)
-ax.legend(fontsize=12, loc='best', framealpha=0.98, shadow=True, edgecolor='black')
-ax.axhline(y=0, color='#333333', linestyle='-', linewidth=1, alpha=0.7)
-
-# Format axes
-ax.yaxis.set_major_formatter(FuncFormatter(format_cad))
-ax.set_xticks([0, 1, 2, 3, 4, 5])
-ax.set_xticklabels(['Year 0', 'Year 1', 'Year 2', 'Year 3', 'Year 4', 'Year 5'])
-
-fig.patch.set_facecolor('white')
-ax.set_facecolor('#f5f5f5')
-ax.spines['top'].set_visible(False)
-ax.spines['right'].set_visible(False)
-plt.tight_layout()
-st.pyplot(fig)
-
-# --- Cumulative cash flow with enhanced styling ---
-fig2, ax2 = plt.subplots(figsize=(13.5, 6))
-cumsum_baseline = np.cumsum(baseline_cf)
-cumsum_robotics = np.cumsum(robotics_cf)
-
-# Add stage indicators
-ax2.axvspan(0, stage1_duration, alpha=0.1, color='#FF6B6B', label='Stage 1 Development')
-ax2.axvspan(stage1_duration, stage2_duration, alpha=0.1, color='#FFA500', label='Stage 2 Development')
-
-ax2.plot(years, cumsum_baseline, label="Baseline", linewidth=4, marker='o', markersize=10,
-         color=COLOR_BASELINE, markerfacecolor=COLOR_BASELINE, markeredgewidth=2, markeredgecolor='white')
-ax2.plot(years, cumsum_robotics, label="Robotics", linewidth=4, marker='s', markersize=10,
-         color=COLOR_ROBOTICS, markerfacecolor=COLOR_ROBOTICS, markeredgewidth=2, markeredgecolor='white')
-ax2.fill_between(years, cumsum_baseline, alpha=0.15, color=COLOR_BASELINE)
-ax2.fill_between(years, cumsum_robotics, alpha=0.15, color=COLOR_ROBOTICS)
-ax2.set_title("Cumulative Cash Flow Comparison", fontsize=18, fontweight='bold', pad=20)
-ax2.set_xlabel("Year", fontsize=13, fontweight='bold')
-ax2.set_ylabel("Cumulative Cash Flow (CAD)", fontsize=13, fontweight='bold')
-ax2.grid(True, linestyle="--", alpha=0.25, linewidth=0.8)
-ax2.legend(fontsize=12, loc='best', framealpha=0.98, shadow=True, edgecolor='black')
-ax2.axhline(y=0, color='#333333', linestyle='-', linewidth=1, alpha=0.7)
-
-# Format axes
-ax2.yaxis.set_major_formatter(FuncFormatter(format_cad))
-ax2.set_xticks([0, 1, 2, 3, 4, 5])
-ax2.set_xticklabels(['Year 0', 'Year 1', 'Year 2', 'Year 3', 'Year 4', 'Year 5'])
-
-fig2.patch.set_facecolor('white')
-ax2.set_facecolor('#f5f5f5')
-ax2.spines['top'].set_visible(False)
-ax2.spines['right'].set_visible(False)
-plt.tight_layout()
-st.pyplot(fig2)
-
-st.info("💡 Tip: Expand the 'Adjust Assumptions' section above to modify model parameters.")
+        with st.form("portfolio_site_form", border=False):
+            col_site1, col_site2, col_site3 = st.columns(3)
+            jobs = col_site1.number_input("Jobs per year", 0.0, None, float(portfolio.fields["baseline_jobs"][i]),
+                                          key=f"portfolio_jobs_{site}")
+            rev = col_site2.number_input("Revenue per job", 0.0, None, float(portfolio.fields["baseline_rev"][i]),
+                                         step=5_000.0, key=f"portfolio_rev_{site}")
+            share = col_site3.slider("Robot share (%)", 0, 100, round(portfolio.share[i] * 100),
+                                     key=f"portfolio_share_{site}")
+            if st.form_submit_button("Update site"):
+                with span("model.portfolio_update"):
+                    portfolio.update_site(site, baseline_jobs=jobs, baseline_rev=rev, robot_share=share / 100)
+
+    with span("model.portfolio_rollup", sites=len(portfolio)):
+        metrics = portfolio.metrics()
+        rollup = portfolio.rollup(grouping)
+    col_p1, col_p2, col_p3, col_p4 = st.columns(4)
+    col_p1.metric("Sites", f"{len(portfolio):,}", f"{len(rollup.labels):,} {grouping} groups", delta_color="off")
+    col_p2.metric("Portfolio Baseline NPV", format_millions(metrics.baseline_npv))
+    col_p3.metric("Portfolio Robotics NPV", format_millions(metrics.robotics_npv),
+                  f"{format_millions(metrics.robotics_npv - metrics.baseline_npv)} vs baseline")
+    irr = metrics.robotics_irr
+    col_p4.metric("Portfolio Robotics IRR", "N/A" if np.isnan(irr) else "> 1,000%" if irr > 10 else f"{irr:.1%}")
+
+    top = np.argsort(-rollup.npv_advantage)[:PORTFOLIO_TOP_GROUPS]
+
+    def draw_groups() -> Figure:
+        fig_groups = Figure(figsize=(13.5, max(4, 0.45 * len(top) + 1.5)))
+        ax_groups = fig_groups.subplots()
+        rows = np.arange(len(top))[::-1]
+        ax_groups.barh(rows, rollup.npv_advantage[top], color=COLOR_ROBOTICS, alpha=0.85)
+        ax_groups.set_yticks(rows, rollup.labels[top], fontsize=12)
+        ax_groups.xaxis.set_major_formatter(FuncFormatter(lambda x, pos: format_millions(x)))
+        ax_groups.set_title(f"NPV Advantage by {grouping.title()} (before development)", fontsize=18,
+                            fontweight='bold', pad=20)
+        ax_groups.set_xlabel("Robotics NPV − Baseline NPV (CAD)", fontsize=13, fontweight='bold')
+        ax_groups.grid(True, axis='x', linestyle="--", alpha=0.25, linewidth=0.8)
+        style_axes(fig_groups, ax_groups)
+        return fig_groups
+
+    groups_key = (sites_key, portfolio.revision, grouping)
+    show_png("portfolio_groups", draw_once("portfolio_groups", groups_key, draw_groups, shared=False))
+    st.dataframe(
+        {
+            grouping.title(): rollup.labels[top],
+            "Sites": rollup.sites[top],
+            "Baseline NPV": np.round(rollup.baseline_npv[top], -3),
+            "Robotics NPV": np.round(rollup.robotics_npv[top], -3),
+            "NPV advantage": np.round(rollup.npv_advantage[top], -3),
+        },
+        hide_index=True,
+        width="stretch",
+    )
+    recomputed = ", ".join(f"{name} {count:,}" for name, count in portfolio.recomputed.items())
+    st.caption(
+        f"Development (stage costs and timing) is one company-wide programme from the sliders, charged once "
+        f"against the portfolio; group NPVs are before it. Rows the last change recomputed: {recomputed}. "
+        f"Showing the top {len(top)} of {len(rollup.labels):,} groups by NPV advantage."
+    )
 
+st.markdown("---")
+st.header("🏭 Site Portfolio")
+site_portfolio(assumptions)
 
 # ============================================================
 # KEY INSIGHTS
@@ -305,13 +992,17 @@ with col_insights2:
     if robotics_irr:
         st.metric("Robotics IRR", f"{robotics_irr*100:.1f}%", "Annualized return on investment")
 
-    total_investment = stage1_cost + stage2_cost
+    total_investment = assumptions.total_investment
     st.metric("Total Investment", f"${total_investment:,.0f}", f"Invested over {stage2_duration:.1f} years")
 
-    year5_robotics = robotics_cf[-1]
-    year5_baseline = baseline_cf[-1]
+    annual_baseline, annual_robotics = result.annual_cash_flows()
+    year5_robotics = annual_robotics[-1]
+    year5_baseline = annual_baseline[-1]
     year5_improvement = year5_robotics - year5_baseline
     st.metric("Year 5 Cash Flow Advantage", f"${year5_improvement:,.0f}", "Robotics vs Baseline")
 
+if prefetcher:
+    schedule_prefetch(prefetcher, assumptions, grid, charts=chart_mode == "Image")
+
 st.divider()
 add_footer()
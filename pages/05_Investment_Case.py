@@ -1,6 +1,7 @@
 """Investment Case: Why robotics transforms AU-E into an attractive opportunity."""
 
 import streamlit as st
+from assets import show_image
 from utils import set_page, add_footer
 
 set_page()
@@ -35,6 +36,6 @@ with col1:
     )
 
 with col2:
-    st.image("images/BRO.png")
+    show_image("BRO.png")
 
 add_footer()
@@ -0,0 +1,190 @@
+"""Speculative precompute of the slider states a session is likely to visit next.
+
+Sliders move in fixed steps, so after each rerun the next state is almost
+always one step away on one input, and most likely a further step along the
+slider just dragged. A session's :class:`Prefetcher` computes those states on
+a small process-wide thread pool and keeps them in a bounded LRU, so the next
+drag tick is served from memory instead of recomputed.
+
+Speculation never takes priority over real work:
+
+- each new rerun cancels the session's queued work, and running work stops at
+  its next check, so stale states are not finished;
+- all sessions share one CPU budget: workers spend at most ``NDT_PREFETCH_CPU``
+  of one core on average (0.25 by default, with a short burst allowance),
+  and wait when it is used up;
+- ``NDT_PREFETCH_WORKERS`` (1 by default) bounds the threads; 0 disables
+  prefetching.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+
+WORKERS = int(os.environ.get("NDT_PREFETCH_WORKERS", "1"))
+CPU_SHARE = float(os.environ.get("NDT_PREFETCH_CPU", "0.25"))
+# CPU seconds the budget may bank while idle, so a burst after a pause runs unthrottled.
+CPU_BURST = 0.5
+MAX_ENTRIES = 64
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class CpuBudget:
+    """Token bucket of CPU seconds, refilled at ``share`` CPU seconds per wall second up to ``burst``."""
+
+    def __init__(self, share: float = CPU_SHARE, burst: float = CPU_BURST):
+        self.share = share
+        self.burst = burst
+        self._tokens = burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.share)
+        self._stamp = now
+        return self._tokens
+
+    def wait(self, cancelled: Callable[[], bool]) -> bool:
+        """Block until there is budget to spend; False if ``cancelled()`` turned true first."""
+        while True:
+            with self._lock:
+                tokens = self._refill()
+            if cancelled():
+                return False
+            if tokens > 0:
+                return True
+            time.sleep(min(0.25, -tokens / self.share + 0.01))
+
+    def charge(self, seconds: float) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens -= seconds
+
+
+BUDGET = CpuBudget()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="prefetch")
+        return _pool
+
+
+class Prefetcher:
+    """One session's speculative work and the bounded cache it fills.
+
+    ``compute(key, check)`` produces the value for a key on a pool thread, so
+    it must not touch Streamlit; calling ``check()`` between steps stops it
+    early once newer input has made the work stale.
+    """
+
+    def __init__(self, compute: Callable[[Hashable, Callable[[], None]], object], max_entries: int = MAX_ENTRIES,
+                 budget: CpuBudget = BUDGET):
+        self._compute = compute
+        self._max_entries = max_entries
+        self._budget = budget
+        self._cache: OrderedDict[Hashable, object] = OrderedDict()
+        self._futures: list[Future] = []
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "computed": 0, "cancelled": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return WORKERS > 0
+
+    def get(self, key: Hashable):
+        """The prefetched value for ``key``, or None."""
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+            else:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+
+    def cancel(self) -> None:
+        """Drop queued work and make running work stop at its next check."""
+        with self._lock:
+            self._generation += 1
+            futures, self._futures = self._futures, []
+        self.stats["cancelled"] += sum(future.cancel() for future in futures)
+
+    def schedule(self, keys: Iterable[Hashable]) -> None:
+        """Replace any outstanding work with computing ``keys``, most likely first."""
+        self.cancel()
+        if not self.enabled:
+            return
+        with self._lock:
+            generation = self._generation
+            todo = [key for key in dict.fromkeys(keys) if key not in self._cache]
+        pool = _executor()
+        futures = [pool.submit(self._run, key, generation) for key in todo]
+        with self._lock:
+            if generation == self._generation:
+                self._futures = futures
+                return
+        for future in futures:
+            future.cancel()
+
+    def _run(self, key: Hashable, generation: int) -> None:
+        stale = lambda: generation != self._generation
+
+        def check() -> None:
+            if stale():
+                raise _Stale
+
+        if not self._budget.wait(stale):
+            return
+        began = time.thread_time()
+        try:
+            value = self._compute(key, check)
+        except _Stale:
+            return
+        finally:
+            self._budget.charge(time.thread_time() - began)
+        if not stale():
+            self.put(key, value)
+            self.stats["computed"] += 1
+
+
+class _Stale(Exception):
+    """Raised inside ``compute`` by ``check()`` once newer input has superseded the work."""
+
+
+def adjacent(values: Mapping[str, float], steps: Mapping[str, float], bounds: Mapping[str, tuple[float, float]],
+             previous: Mapping[str, float] | None = None) -> list[dict[str, float]]:
+    """Widget states one step from ``values``, most likely next first.
+
+    Inputs that moved since ``previous`` come first, continuing in the
+    direction they moved; then every other input, up a step and down a step.
+    """
+    moved = [name for name in steps if previous is not None and previous.get(name) != values[name]]
+    order = moved + [name for name in steps if name not in moved]
+    states = []
+    for name in order:
+        directions = (1, -1)
+        if name in moved and previous[name] > values[name]:
+            directions = (-1, 1)
+        for direction in directions:
+            value = round(values[name] + direction * steps[name], 6)
+            low, high = bounds[name]
+            if low <= value <= high:
+                states.append({**values, name: value})
+    return states
@@ -0,0 +1,383 @@
+"""Timing spans around the dashboard's hot paths, off unless asked for.
+
+Each page rerun is one trace: ``utils.set_page`` opens it and
+``utils.add_footer`` closes it, and everything timed in between (model
+nodes, IRR root-finding, chart drawing and rasterizing, ``st.image``
+transfer, image loading) becomes a child span. Fragment reruns are traces of
+their own. With nothing enabled, :func:`span` returns a shared no-op after
+one context-variable lookup, so instrumented code costs well under a
+microsecond per call.
+
+Enable any of:
+
+- ``NDT_TRACE_FILE=traces.jsonl``: one OTLP/JSON line per trace, readable by
+  the OpenTelemetry Collector's ``otlpjsonfile`` receiver;
+- ``NDT_METRICS_PORT=9464``: Prometheus text at ``http://host:9464/metrics``
+  (span duration histograms, reruns, process RSS and shared-cache lookups);
+- ``?debug=1`` on a page URL: that session's per-rerun breakdown and RSS in
+  the sidebar.
+
+Summarize a trace file from the repository root::
+
+    python -m tracing traces.jsonl
+"""
+
+import argparse
+import contextvars
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+SERVICE_NAME = "ndt-dashboard"
+# Upper bounds (seconds) of the Prometheus duration histogram buckets.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+TRACE_FILE = os.environ.get("NDT_TRACE_FILE") or None
+METRICS_PORT = int(os.environ["NDT_METRICS_PORT"]) if os.environ.get("NDT_METRICS_PORT") else None
+EXPORTING = bool(TRACE_FILE or METRICS_PORT)
+
+_NOOP = nullcontext()
+_current: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("trace", default=None)
+_export_lock = threading.Lock()
+_server_started = False
+_observing = False
+
+
+@dataclass(frozen=True)
+class SpanRecord:
+    """One finished span; times are Unix epoch nanoseconds."""
+
+    name: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int
+    attributes: dict = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def seconds(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+def _new_id(bits: int) -> str:
+    # Trace and span ids only need to be unique, not unguessable.
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    """Spans of one rerun, collected on the thread running it."""
+
+    def __init__(self, name: str, attributes: dict | None = None):
+        self.trace_id = _new_id(128)
+        self.root = _Span(self, name, attributes or {})
+        self.spans: list[SpanRecord] = []
+        self._open: list[str] = []
+
+    @property
+    def seconds(self) -> float:
+        """Duration of the root span, once finished."""
+        return self.spans[-1].seconds if self.spans and self.spans[-1].parent_id is None else float("nan")
+
+    def breakdown(self) -> list[tuple[int, SpanRecord]]:
+        """``(depth, span)`` for every span in start order, the root at depth 0."""
+        depth = {None: -1}
+        rows = []
+        for record in sorted(self.spans, key=lambda s: (s.start_ns, -s.end_ns)):
+            depth[record.span_id] = depth.get(record.parent_id, 0) + 1
+            rows.append((depth[record.span_id], record))
+        return rows
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attributes", "span_id", "parent_id", "start_ns")
+
+    def __init__(self, trace: Trace, name: str, attributes: dict):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self) -> "_Span":
+        trace = self.trace
+        self.span_id = _new_id(64)
+        self.parent_id = trace._open[-1] if trace._open else None
+        trace._open.append(self.span_id)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        end_ns = time.time_ns()
+        trace = self.trace
+        trace._open.pop()
+        error = None if exc is None else f"{exc_type.__name__}: {exc}"
+        trace.spans.append(SpanRecord(self.name, self.span_id, self.parent_id, self.start_ns, end_ns,
+                                      self.attributes, error))
+
+
+def span(name: str, **attributes):
+    """Context manager timing ``name`` inside the current trace; a no-op outside one."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, attributes)
+
+
+def add_span(name: str, seconds: float, **attributes) -> None:
+    """Add a span that just ended after ``seconds``, for code timed elsewhere."""
+    trace = _current.get()
+    if trace is None:
+        return
+    end_ns = time.time_ns()
+    trace.spans.append(SpanRecord(name, _new_id(64), trace._open[-1] if trace._open else None,
+                                  end_ns - int(seconds * 1e9), end_ns, attributes))
+
+
+def traced(name: str) -> Callable:
+    """Decorator: a span inside a trace, or its own trace when exporting (e.g. a fragment rerun)."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is not None:
+                with span(name):
+                    return fn(*args, **kwargs)
+            if not EXPORTING:
+                return fn(*args, **kwargs)
+            begin_trace(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                finish_trace()
+        return wrapper
+    return decorate
+
+
+def begin_trace(name: str, **attributes) -> Trace:
+    """Start a trace for this thread's work, replacing any left unfinished."""
+    global _observing
+    if not _observing:
+        # Imported here so pages that never trace don't load the model.
+        from model.graph import OBSERVERS
+
+        OBSERVERS.append(_node_span)
+        _observing = True
+    _start_metrics_server()
+    trace = Trace(name, attributes)
+    trace.root.__enter__()
+    _current.set(trace)
+    return trace
+
+
+def _node_span(name: str, seconds: float) -> None:
+    add_span(f"model.{name}", seconds)
+
+
+def finish_trace() -> Trace | None:
+    """End this thread's trace and export it; ``None`` if none was open."""
+    trace = _current.get()
+    if trace is None:
+        return None
+    _current.set(None)
+    trace.root.__exit__(None, None, None)
+    if EXPORTING:
+        _export(trace)
+    return trace
+
+
+def configure(trace_file: str | None = None, metrics_port: int | None = None) -> None:
+    """Set the exporters in code instead of through the environment."""
+    global TRACE_FILE, METRICS_PORT, EXPORTING
+    TRACE_FILE, METRICS_PORT = trace_file, metrics_port
+    EXPORTING = bool(trace_file or metrics_port)
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable, 0 where neither is)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return 0
+    # ru_maxrss is in kilobytes on Linux but bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+# ============================================================
+# EXPORTERS
+# ============================================================
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def otlp_json(trace: Trace) -> dict:
+    """``trace`` as an OTLP/JSON ``ExportTraceServiceRequest``."""
+    spans = []
+    for record in trace.spans:
+        otlp = {
+            "traceId": trace.trace_id,
+            "spanId": record.span_id,
+            "name": record.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(record.start_ns),
+            "endTimeUnixNano": str(record.end_ns),
+            "attributes": [_attribute(k, v) for k, v in record.attributes.items()],
+            "status": {"code": 2, "message": record.error} if record.error else {},
+        }
+        if record.parent_id:
+            otlp["parentSpanId"] = record.parent_id
+        spans.append(otlp)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", SERVICE_NAME),
+                                    _attribute("process.pid", os.getpid())]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+    }]}
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+        self.total += seconds
+        self.count += 1
+
+
+_durations: dict[str, _Histogram] = {}
+_traces: dict[str, int] = {}
+
+
+def _export(trace: Trace) -> None:
+    line = json.dumps(otlp_json(trace), separators=(",", ":")) if TRACE_FILE else None
+    with _export_lock:
+        if line is not None:
+            with open(TRACE_FILE, "a") as f:
+                f.write(line + "\n")
+        if METRICS_PORT:
+            for record in trace.spans:
+                _durations.setdefault(record.name, _Histogram()).observe(record.seconds)
+            _traces[trace.root.name] = _traces.get(trace.root.name, 0) + 1
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Current metrics in the Prometheus text exposition format."""
+    lines = [
+        "# HELP ndt_span_duration_seconds Time spent in instrumented dashboard code.",
+        "# TYPE ndt_span_duration_seconds histogram",
+    ]
+    with _export_lock:
+        for name, histogram in sorted(_durations.items()):
+            label = f'span="{_label(name)}"'
+            for bound, count in zip(BUCKETS, histogram.counts):
+                lines.append(f'ndt_span_duration_seconds_bucket{{{label},le="{bound:g}"}} {count}')
+            lines.append(f'ndt_span_duration_seconds_bucket{{{label},le="+Inf"}} {histogram.count}')
+            lines.append(f"ndt_span_duration_seconds_sum{{{label}}} {histogram.total!r}")
+            lines.append(f"ndt_span_duration_seconds_count{{{label}}} {histogram.count}")
+        lines += ["# HELP ndt_traces_total Finished page and fragment reruns.", "# TYPE ndt_traces_total counter"]
+        lines += [f'ndt_traces_total{{trace="{_label(name)}"}} {count}' for name, count in sorted(_traces.items())]
+    lines += [
+        "# HELP process_resident_memory_bytes Resident memory size in bytes.",
+        "# TYPE process_resident_memory_bytes gauge",
+        f"process_resident_memory_bytes {rss_bytes()}",
+    ]
+    cache = sys.modules.get("model.cache")
+    if cache is not None:
+        lines += cache.prometheus_lines()
+    return "\n".join(lines) + "\n"
+
+
+def _start_metrics_server() -> None:
+    global _server_started
+    if not METRICS_PORT or _server_started:
+        return
+    with _export_lock:
+        if _server_started:
+            return
+        _server_started = True
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer(("", METRICS_PORT), MetricsHandler)
+    except OSError as exc:
+        print(f"tracing: cannot serve metrics on port {METRICS_PORT}: {exc}", file=sys.stderr)
+        return
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+
+
+# ============================================================
+# TRACE FILE SUMMARY
+# ============================================================
+
+def read_spans(path: str) -> Iterator[tuple[str, float]]:
+    """``(name, seconds)`` of every span in an OTLP/JSON lines file."""
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    for otlp in scope_spans["spans"]:
+                        yield otlp["name"], (int(otlp["endTimeUnixNano"]) - int(otlp["startTimeUnixNano"])) / 1e9
+
+
+def main(argv: list[str] | None = None) -> None:
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="Summarize span timings from an NDT_TRACE_FILE.")
+    parser.add_argument("path", help="OTLP/JSON lines written by the dashboard")
+    args = parser.parse_args(argv)
+
+    samples: dict[str, list[float]] = {}
+    for name, seconds in read_spans(args.path):
+        samples.setdefault(name, []).append(seconds)
+    print(f"{'span':<40} {'count':>7} {'median ms':>10} {'p95 ms':>10} {'total ms':>11}")
+    for name, values in sorted(samples.items(), key=lambda item: -sum(item[1])):
+        ms = np.asarray(values) * 1e3
+        print(f"{name[:40]:<40} {len(ms):7d} {np.median(ms):10.2f} {np.percentile(ms, 95):10.2f} {ms.sum():11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,101 @@
 """Utility functions for NDT Robotics investor dashboard."""
 
+import sys
+import threading
+import time
+from pathlib import Path
+
 import streamlit as st
 
+import tracing
+
+# Colours, heading fonts, sizes and weights, borders and button corners come
+# from the [theme] in .streamlit/config.toml, which reaches the browser once
+# per session. Streamlit drops any element a run does not send again, so the
+# few rules the theme cannot express (content width, heading colours, rule
+# spacing) ride along on every run as one style-only st.html, which goes to
+# the event container and takes no space.
+PAGE_CSS = (
+    "<style>"
+    ".block-container{max-width:1200px;padding-top:2rem;padding-left:2rem;padding-right:2rem}"
+    "h1{margin-bottom:1rem;color:#0066CC}"
+    "h2{margin-top:2rem;margin-bottom:1rem;color:#1a1a1a}"
+    "hr{margin:2rem 0}"
+    "</style>"
+)
+
+# Seconds the warm-up waits so the page that started it renders first.
+WARM_UP_DELAY = 0.5
+
+_warm_up_lock = threading.Lock()
+_warm_up_started = False
+
+
+def set_page(warm: bool = True) -> None:
+    """Configure Streamlit page settings with professional styling.
 
-def set_page() -> None:
-    """Configure Streamlit page settings with professional styling."""
+    ``warm`` starts the background warm-up; the Financial Model page itself
+    passes ``False``, since on one core a warm-up racing the page slows it.
+    Also opens the rerun's trace when tracing is on (see :mod:`tracing`).
+    """
     st.set_page_config(
         page_title="NDT Robotics | Investor Dashboard",
         page_icon="🤖",
         layout="wide",
         initial_sidebar_state="expanded"
     )
-    
-    st.markdown(
-        """
-        <style>
-            /* Professional color scheme and typography */
-            :root {
-                --primary-color: #0066CC;
-                --success-color: #00C851;
-                --warning-color: #FF9500;
-                --danger-color: #FF3B30;
-                --background-light: #F8F9FA;
-                --border-color: #E0E6ED;
-            }
-            
-            .block-container {
-                max-width: 1200px;
-                padding-top: 2rem;
-                padding-left: 2rem;
-                padding-right: 2rem;
-            }
-            
-            h1, h2, h3, h4, h5, h6 {
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Helvetica Neue', sans-serif;
-                font-weight: 600;
-                letter-spacing: -0.5px;
-            }
-            
-            h1 {
-                font-size: 2.5rem;
-                margin-bottom: 1rem;
-                color: #0066CC;
-            }
-            
-            h2 {
-                font-size: 1.8rem;
-                margin-top: 2rem;
-                margin-bottom: 1rem;
-                color: #1a1a1a;
-            }
-            
-            /* Professional metric cards */
-            [data-testid="metric-container"] {
-                background-color: #F8F9FA;
-                padding: 1.5rem;
-                border-radius: 8px;
-                border: 1px solid #E0E6ED;
-            }
-            
-            /* Button styling */
-            .stButton > button {
-                border-radius: 6px;
-                padding: 0.5rem 1.5rem;
-                font-weight: 500;
-            }
-            
-            /* Dividers */
-            hr {
-                margin: 2rem 0;
-                border-color: #E0E6ED;
-            }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.html(PAGE_CSS)
+    if tracing.EXPORTING or debug_enabled():
+        page = Path(sys._getframe(1).f_code.co_filename).stem
+        tracing.begin_trace(f"rerun {page}", page=page)
+    if warm:
+        warm_up()
+
+
+def debug_enabled() -> bool:
+    """Whether this session asked for the profiling sidebar with ``?debug=1``."""
+    return st.query_params.get("debug") == "1"
+
+
+def warm_up() -> None:
+    """Load the Financial Model's chart stack in a background thread, once per process.
+
+    Visitors land on the light pages first, so by the time they open the
+    model, matplotlib, the fonts and the opening scenario's charts are ready.
+    """
+    global _warm_up_started
+    with _warm_up_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+def _warm_up() -> None:
+    time.sleep(WARM_UP_DELAY)
+    try:
+        import charts
+        import model.export  # noqa: F401
+        import model.fleet  # noqa: F401
+        import model.goalseek  # noqa: F401
+        import model.montecarlo  # noqa: F401
+        import model.sensitivity  # noqa: F401
+        from inputs import starting_assumptions
+        from model.calibrate import latest_calibration
+        from model.store import ScenarioStore
+
+        # Render what the page opens on, calibrated baseline included, so these
+        # renders land in the chart cache the first visitor's charts come from.
+        latest = latest_calibration(ScenarioStore())
+        start = starting_assumptions(latest[1] if latest else None)
+        for cumulative in (False, True):
+            charts.cash_flow_chart(start, cumulative)
+    except Exception:  # noqa: BLE001 - warming is best effort; pages load everything they need anyway
+        pass
 
 
 def add_footer() -> None:
-    """Add a professional footer to pages."""
+    """Add a professional footer to pages, then close the rerun's trace."""
     st.markdown(
         """
         <hr style='margin-top: 3rem; border: 1px solid #E0E6ED;'>
@@ -89,3 +106,26 @@ def add_footer() -> None:
         """,
         unsafe_allow_html=True,
     )
+    trace = tracing.finish_trace()
+    if trace is not None and debug_enabled():
+        show_profile(trace)
+
+
+def show_profile(trace: tracing.Trace) -> None:
+    """Sidebar breakdown of one rerun's spans, with the process's memory."""
+    total = trace.seconds
+    rows = trace.breakdown()
+    with st.sidebar.expander("⏱️ Profiling", expanded=True):
+        col_rerun, col_rss = st.columns(2)
+        col_rerun.metric("Rerun", f"{total * 1e3:,.0f} ms")
+        col_rss.metric("Process RSS", f"{tracing.rss_bytes() / 2**20:,.0f} MB")
+        st.dataframe(
+            {
+                "Span": ["\u2003" * depth + record.name for depth, record in rows],
+                "ms": [round(record.seconds * 1e3, 2) for _, record in rows],
+                "% of rerun": [round(100 * record.seconds / total, 1) for _, record in rows],
+            },
+            hide_index=True,
+            width="stretch",
+        )
+        st.caption("Cached results skip their inner spans. Fragment reruns are exported, not shown here.")